@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inkrementelles Dataset-Manifest (SQLite)
+
+Speichert pro Bild Inhalts-Hash (SHA-256), Größe, Bildabmessungen und die
+Objekte pro Klasse aus dem zugehörigen YOLO-Label. Bei jedem Lauf werden nur
+Dateien neu eingelesen, deren mtime oder Größe sich geändert hat. Die
+Train/Val-Zuordnung ergibt sich aus dem Inhalts-Hash und bleibt daher stabil,
+wenn neue Bilder hinzukommen.
+
+Verwendung:
+  python dataset_manifest.py images/ labels/            # Aktualisieren + Statistik
+  python split_dataset.py images/ labels/ out/ --manifest
+"""
+
+import os
+import struct
+import sqlite3
+import hashlib
+import argparse
+import time
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+DEFAULT_MANIFEST_NAME = '.dataset_manifest.sqlite'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    name        TEXT PRIMARY KEY,
+    sha256      TEXT NOT NULL,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    width       INTEGER,
+    height      INTEGER,
+    label_size  INTEGER,
+    label_mtime_ns INTEGER,
+    objects     INTEGER NOT NULL DEFAULT 0
+);
+CREATE TABLE IF NOT EXISTS class_counts (
+    name        TEXT NOT NULL,
+    class_id    INTEGER NOT NULL,
+    count       INTEGER NOT NULL,
+    PRIMARY KEY (name, class_id)
+);
+CREATE INDEX IF NOT EXISTS idx_class_counts_class ON class_counts (class_id);
+"""
+
+def read_image_size(data):
+    """
+    Liest Breite/Höhe aus dem Header von JPEG-, PNG- oder BMP-Daten
+    
+    Returns:
+        (width, height) oder (None, None) wenn das Format unbekannt ist
+    """
+    if data[:8] == b'\x89PNG\r\n\x1a\n' and len(data) >= 24:
+        width, height = struct.unpack('>II', data[16:24])
+        return width, height
+    
+    if data[:2] == b'BM' and len(data) >= 26:
+        width, height = struct.unpack('<ii', data[18:26])
+        return width, abs(height)
+    
+    if data[:2] == b'\xff\xd8':
+        # JPEG: Marker durchlaufen bis zum SOF-Segment
+        pos = 2
+        while pos + 9 < len(data):
+            if data[pos] != 0xFF:
+                pos += 1
+                continue
+            marker = data[pos + 1]
+            if marker in (0xD8, 0x01) or 0xD0 <= marker <= 0xD7 or marker == 0xFF:
+                pos += 1 if marker == 0xFF else 2
+                continue
+            length = struct.unpack('>H', data[pos + 2:pos + 4])[0]
+            if 0xC0 <= marker <= 0xCF and marker not in (0xC4, 0xC8, 0xCC):
+                height, width = struct.unpack('>HH', data[pos + 5:pos + 9])
+                return width, height
+            pos += 2 + length
+    
+    return None, None
+
+def parse_label_file(label_file):
+    """Zählt Objekte pro Klasse in einer YOLO-Label-Datei"""
+    counts = {}
+    with open(label_file, 'r') as f:
+        for line in f:
+            if line.strip():
+                class_id = int(line.split()[0])
+                counts[class_id] = counts.get(class_id, 0) + 1
+    return counts
+
+def split_bucket(sha256, seed=42):
+    """Bildet einen Inhalts-Hash deterministisch auf [0, 1) ab"""
+    digest = hashlib.sha256(f"{seed}:{sha256}".encode()).digest()
+    return int.from_bytes(digest[:8], 'big') / 2**64
+
+class DatasetManifest:
+    """Persistentes, inkrementell aktualisiertes Manifest eines Bild/Label-Datasets"""
+    
+    def __init__(self, image_dir, label_dir, manifest_path=None):
+        """
+        Args:
+            image_dir: Verzeichnis mit Bildern
+            label_dir: Verzeichnis mit Labels (YOLO-Format)
+            manifest_path: SQLite-Datei (default: <image_dir>/.dataset_manifest.sqlite)
+        """
+        self.image_dir = Path(image_dir)
+        self.label_dir = Path(label_dir)
+        self.manifest_path = Path(manifest_path) if manifest_path else self.image_dir / DEFAULT_MANIFEST_NAME
+        self.conn = sqlite3.connect(str(self.manifest_path))
+        self.conn.executescript(SCHEMA)
+    
+    def close(self):
+        self.conn.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _scan_images(self):
+        """stat() aller Bilder ohne sie zu öffnen"""
+        with os.scandir(self.image_dir) as entries:
+            return {
+                entry.name: entry.stat()
+                for entry in entries
+                if entry.is_file() and os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS
+            }
+    
+    def _label_stat(self, name):
+        label_file = self.label_dir / (os.path.splitext(name)[0] + '.txt')
+        try:
+            return label_file, label_file.stat()
+        except FileNotFoundError:
+            return label_file, None
+    
+    def update(self):
+        """
+        Gleicht das Manifest mit dem Dateisystem ab
+        
+        Nur neue oder geänderte Bilder werden gehasht, nur geänderte Labels neu geparst.
+        
+        Returns:
+            Dict mit Anzahl added/changed/removed/labels_updated
+        """
+        stats = {'added': 0, 'changed': 0, 'removed': 0, 'labels_updated': 0}
+        known = {
+            row[0]: row[1:]
+            for row in self.conn.execute(
+                "SELECT name, size, mtime_ns, label_size, label_mtime_ns FROM images")
+        }
+        current = self._scan_images()
+        
+        with self.conn:
+            # Gelöschte Bilder entfernen
+            for name in known.keys() - current.keys():
+                self.conn.execute("DELETE FROM images WHERE name = ?", (name,))
+                self.conn.execute("DELETE FROM class_counts WHERE name = ?", (name,))
+                stats['removed'] += 1
+            
+            for name, st in current.items():
+                previous = known.get(name)
+                label_file, label_st = self._label_stat(name)
+                label_key = (label_st.st_size, label_st.st_mtime_ns) if label_st else (None, None)
+                
+                if previous is None or previous[:2] != (st.st_size, st.st_mtime_ns):
+                    # Neue Zeile hat keine Label-Daten mehr - alte Klassen-Zähler immer verwerfen
+                    self.conn.execute("DELETE FROM class_counts WHERE name = ?", (name,))
+                    data = (self.image_dir / name).read_bytes()
+                    width, height = read_image_size(data)
+                    self.conn.execute(
+                        "INSERT OR REPLACE INTO images "
+                        "(name, sha256, size, mtime_ns, width, height, label_size, label_mtime_ns, objects) "
+                        "VALUES (?, ?, ?, ?, ?, ?, NULL, NULL, 0)",
+                        (name, hashlib.sha256(data).hexdigest(), st.st_size, st.st_mtime_ns, width, height)
+                    )
+                    stats['added' if previous is None else 'changed'] += 1
+                    previous = (st.st_size, st.st_mtime_ns, None, None)
+                
+                if previous[2:] != label_key:
+                    counts = parse_label_file(label_file) if label_st else {}
+                    self.conn.execute("DELETE FROM class_counts WHERE name = ?", (name,))
+                    self.conn.executemany(
+                        "INSERT INTO class_counts (name, class_id, count) VALUES (?, ?, ?)",
+                        [(name, class_id, count) for class_id, count in counts.items()]
+                    )
+                    self.conn.execute(
+                        "UPDATE images SET label_size = ?, label_mtime_ns = ?, objects = ? WHERE name = ?",
+                        (label_key[0], label_key[1], sum(counts.values()), name)
+                    )
+                    stats['labels_updated'] += 1
+        
+        return stats
+    
+    def image_paths(self):
+        """Alle Bilder im Manifest als Pfade (sortiert)"""
+        return [self.image_dir / row[0] for row in
+                self.conn.execute("SELECT name FROM images ORDER BY name")]
+    
+    def split_assignment(self, train_ratio=0.8, val_ratio=0.2, seed=42):
+        """
+        Hash-basierte Train/Val-Zuordnung
+        
+        Jedes Bild landet anhand seines Inhalts-Hashes in einem festen Bucket.
+        Neue Bilder verschieben daher keine bestehenden Zuordnungen.
+        
+        Returns:
+            (train_images, val_images) als Pfad-Listen
+        """
+        train_images, val_images = [], []
+        for name, sha256 in self.conn.execute("SELECT name, sha256 FROM images ORDER BY name"):
+            bucket = split_bucket(sha256, seed)
+            if bucket < train_ratio:
+                train_images.append(self.image_dir / name)
+            elif bucket < train_ratio + val_ratio:
+                val_images.append(self.image_dir / name)
+        return train_images, val_images
+    
+    def statistics(self):
+        """Dataset-Statistiken direkt aus dem Manifest"""
+        images, labeled, objects = self.conn.execute(
+            "SELECT COUNT(*), COUNT(label_size), COALESCE(SUM(objects), 0) FROM images"
+        ).fetchone()
+        class_counts = dict(self.conn.execute(
+            "SELECT class_id, SUM(count) FROM class_counts GROUP BY class_id ORDER BY class_id"
+        ))
+        sizes = self.conn.execute(
+            "SELECT width, height, COUNT(*) FROM images GROUP BY width, height ORDER BY COUNT(*) DESC"
+        ).fetchall()
+        return {
+            'images': images,
+            'labels': labeled,
+            'objects': objects,
+            'class_counts': class_counts,
+            'image_sizes': sizes
+        }
+    
+    def duplicates(self):
+        """Inhaltsgleiche Bilder (gleicher SHA-256) als Liste von Namens-Gruppen"""
+        return [row[0].split('\n') for row in self.conn.execute(
+            "SELECT GROUP_CONCAT(name, char(10)) FROM images GROUP BY sha256 HAVING COUNT(*) > 1"
+        )]
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Inkrementelles Dataset-Manifest',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Beispiele:
+  # Manifest aktualisieren und Statistik ausgeben
+  python dataset_manifest.py images/ labels/
+
+  # Manifest an anderem Ort ablegen
+  python dataset_manifest.py images/ labels/ --manifest bird.sqlite
+        """
+    )
+    
+    parser.add_argument('image_dir', help='Verzeichnis mit Bildern')
+    parser.add_argument('label_dir', help='Verzeichnis mit Labels (YOLO-Format)')
+    parser.add_argument('--manifest', help=f'Manifest-Datei (default: <image_dir>/{DEFAULT_MANIFEST_NAME})')
+    
+    args = parser.parse_args()
+    
+    if not Path(args.image_dir).is_dir():
+        print(f"❌ Bild-Verzeichnis nicht gefunden: {args.image_dir}")
+        return 1
+    
+    start = time.time()
+    with DatasetManifest(args.image_dir, args.label_dir, args.manifest) as manifest:
+        changes = manifest.update()
+        stats = manifest.statistics()
+        duplicates = manifest.duplicates()
+    elapsed = time.time() - start
+    
+    print(f"🗂️  Manifest aktualisiert in {elapsed * 1000:.0f}ms: "
+          f"+{changes['added']} neu, {changes['changed']} geändert, "
+          f"-{changes['removed']} entfernt, {changes['labels_updated']} Labels")
+    print(f"   Bilder: {stats['images']}, Labels: {stats['labels']}, Objekte: {stats['objects']}")
+    for class_id, count in stats['class_counts'].items():
+        print(f"   Klasse {class_id}: {count} Objekte")
+    if duplicates:
+        print(f"⚠️  {len(duplicates)} Gruppen inhaltsgleicher Bilder gefunden")
+    
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,284 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Duplikat-Filter für extrahierte Frames
+
+Statische Vogelhaus-Aufnahmen liefern viele nahezu identische Frames.
+Dieses Modul berechnet einen Perceptual Hash (dHash, 64 Bit) pro Bild und
+verwirft Bilder, deren Hamming-Abstand zu einem bereits behaltenen Bild
+unter der Schwelle liegt. Die Suche läuft über einen BK-Tree und skaliert
+damit auch auf hunderttausende Bilder.
+
+Verwendung:
+  # Während der Extraktion
+  python extract_frames.py video.mp4 frames/ --interval 2 --dedup-threshold 6
+
+  # Nachträglich über bestehende Verzeichnisse
+  python dedup_frames.py frames/ --threshold 6 --action move
+"""
+
+import cv2
+import shutil
+import argparse
+from pathlib import Path
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+
+def dhash(image, hash_size=8):
+    """
+    Berechnet den Difference-Hash eines Bildes
+    
+    Args:
+        image: Bild als NumPy-Array (BGR oder Graustufen)
+        hash_size: Kantenlänge des Hash-Rasters (8 → 64 Bit)
+    
+    Returns:
+        Hash als int
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    diff = small[:, 1:] > small[:, :-1]
+    
+    value = 0
+    for bit in diff.flatten():
+        value = (value << 1) | int(bit)
+    return value
+
+def hamming_distance(a, b):
+    """Anzahl unterschiedlicher Bits zweier Hashes"""
+    return bin(a ^ b).count('1')
+
+class BKTree:
+    """
+    BK-Tree über Hamming-Abstände für schnelle Nachbarschaftssuche
+    
+    Jeder Knoten ist [hash, item, {abstand: kindknoten}]. Die Suche besucht
+    nur Kinder, deren Kantenabstand im Intervall [d - r, d + r] liegt.
+    """
+    
+    def __init__(self):
+        self.root = None
+        self.size = 0
+    
+    def add(self, value, item=None):
+        """Fügt einen Hash (mit optionalem Element) ein"""
+        self.size += 1
+        if self.root is None:
+            self.root = [value, item, {}]
+            return
+        
+        node = self.root
+        while True:
+            distance = hamming_distance(value, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = [value, item, {}]
+                return
+            node = child
+    
+    def find(self, value, max_distance):
+        """
+        Sucht alle Einträge mit Abstand <= max_distance
+        
+        Returns:
+            Liste von (abstand, hash, item) Tupeln
+        """
+        if self.root is None:
+            return []
+        
+        matches = []
+        candidates = [self.root]
+        while candidates:
+            node = candidates.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                matches.append((distance, node[0], node[1]))
+            
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in node[2].items():
+                if low <= edge <= high:
+                    candidates.append(child)
+        
+        return matches
+    
+    def has_match(self, value, max_distance):
+        """True wenn mindestens ein Eintrag innerhalb max_distance liegt"""
+        if self.root is None:
+            return False
+        
+        candidates = [self.root]
+        while candidates:
+            node = candidates.pop()
+            distance = hamming_distance(value, node[0])
+            if distance <= max_distance:
+                return True
+            
+            low, high = distance - max_distance, distance + max_distance
+            for edge, child in node[2].items():
+                if low <= edge <= high:
+                    candidates.append(child)
+        
+        return False
+    
+    def __len__(self):
+        return self.size
+
+class FrameDeduplicator:
+    """Entscheidet pro Frame, ob er visuell neu ist (und merkt sich neue Frames)"""
+    
+    def __init__(self, threshold=6):
+        """
+        Args:
+            threshold: Maximaler Hamming-Abstand, ab dem ein Frame als Duplikat gilt
+        """
+        self.threshold = threshold
+        self.index = BKTree()
+        self.kept = 0
+        self.skipped = 0
+    
+    def is_duplicate(self, image, item=None):
+        """
+        Prüft einen Frame und nimmt ihn bei Neuheit in den Index auf
+        
+        Returns:
+            True wenn der Frame ein Duplikat ist und verworfen werden sollte
+        """
+        value = dhash(image)
+        if self.index.has_match(value, self.threshold):
+            self.skipped += 1
+            return True
+        
+        self.index.add(value, item)
+        self.kept += 1
+        return False
+
+def find_images(directories, recursive=True, exclude=None):
+    """
+    Sammelt alle Bilder aus den Verzeichnissen (sortiert, damit frühe Frames gewinnen)
+    
+    Args:
+        exclude: Verzeichnis, dessen Inhalt übersprungen wird (z.B. der Duplikat-Ordner)
+    """
+    excluded = Path(exclude).resolve() if exclude else None
+    images = []
+    for directory in directories:
+        pattern = '**/*' if recursive else '*'
+        images.extend(
+            p for p in Path(directory).glob(pattern)
+            if p.is_file() and p.suffix.lower() in IMAGE_EXTENSIONS
+            and not (excluded and excluded in p.resolve().parents)
+        )
+    return sorted(images)
+
+def default_duplicate_dir(directories):
+    """Standard-Zielordner für verschobene Duplikate: <erstes Verzeichnis>/_duplicates"""
+    return Path(directories[0]) / '_duplicates'
+
+def deduplicate_directories(directories, threshold=6, action='report', duplicate_dir=None):
+    """
+    Entfernt nahezu identische Bilder aus bestehenden Verzeichnissen
+    
+    Args:
+        directories: Liste von Bild-Verzeichnissen (rekursiv durchsucht)
+        threshold: Maximaler Hamming-Abstand für Duplikate
+        action: 'report' (nur zählen), 'move' oder 'delete'
+        duplicate_dir: Zielverzeichnis für action='move' (default: <erstes
+                       Verzeichnis>/_duplicates); wird bei jeder Aktion
+                       übersprungen, damit verschobene Duplikate nicht
+                       später die Originale verdrängen
+    
+    Returns:
+        (behalten, duplikate) Tupel
+    """
+    duplicate_dir = Path(duplicate_dir) if duplicate_dir else default_duplicate_dir(directories)
+    images = find_images(directories, exclude=duplicate_dir)
+    if not images:
+        print(f"❌ Keine Bilder gefunden in: {', '.join(str(d) for d in directories)}")
+        return 0, 0
+    
+    print(f"📸 Prüfe {len(images)} Bilder (Schwelle: {threshold} Bit)")
+    
+    if action == 'move':
+        duplicate_dir.mkdir(parents=True, exist_ok=True)
+    
+    dedup = FrameDeduplicator(threshold)
+    unreadable = 0
+    
+    for i, image_path in enumerate(images, start=1):
+        image = cv2.imread(str(image_path), cv2.IMREAD_GRAYSCALE)
+        if image is None:
+            unreadable += 1
+            continue
+        
+        if dedup.is_duplicate(image, item=str(image_path)):
+            # YOLO-Label mit gleichem Namen gehört zum Bild
+            label_path = image_path.with_suffix('.txt')
+            companions = [image_path] + ([label_path] if label_path.exists() else [])
+            
+            for path in companions:
+                if action == 'move':
+                    target = duplicate_dir / path.name
+                    if target.exists():
+                        target = duplicate_dir / f"{path.parent.name}_{path.name}"
+                    shutil.move(str(path), str(target))
+                elif action == 'delete':
+                    path.unlink()
+        
+        if i % 1000 == 0:
+            print(f"   ⏳ {i}/{len(images)} geprüft, {dedup.skipped} Duplikate")
+    
+    print(f"\n📊 Ergebnis:")
+    print(f"   Behalten: {dedup.kept}")
+    print(f"   Duplikate: {dedup.skipped} ({dedup.skipped / len(images) * 100:.1f}%)")
+    if unreadable:
+        print(f"   Nicht lesbar: {unreadable}")
+    if action == 'report':
+        print("ℹ️  Nur Analyse - mit --action move oder --action delete anwenden")
+    elif action == 'move':
+        print(f"   Verschoben nach: {duplicate_dir}")
+    
+    return dedup.kept, dedup.skipped
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Duplikat-Filter für extrahierte Frames',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Beispiele:
+  # Nur analysieren
+  python dedup_frames.py frames/
+
+  # Duplikate in Unterordner verschieben
+  python dedup_frames.py frames/ --threshold 6 --action move
+
+  # Mehrere Verzeichnisse gemeinsam, Duplikate löschen
+  python dedup_frames.py frames_2024/ frames_2025/ --threshold 4 --action delete
+        """
+    )
+    
+    parser.add_argument('directories', nargs='+', help='Verzeichnisse mit Bildern')
+    parser.add_argument('--threshold', type=int, default=6,
+                       help='Maximaler Hamming-Abstand (0-64) für Duplikate (default: 6)')
+    parser.add_argument('--action', choices=['report', 'move', 'delete'], default='report',
+                       help='Was mit Duplikaten passiert (default: report)')
+    parser.add_argument('--duplicate-dir',
+                       help='Zielverzeichnis für --action move, wird beim Durchsuchen immer '
+                            'übersprungen (default: <erstes Verzeichnis>/_duplicates)')
+    
+    args = parser.parse_args()
+    
+    for directory in args.directories:
+        if not Path(directory).is_dir():
+            print(f"❌ Verzeichnis nicht gefunden: {directory}")
+            return 1
+    
+    if not 0 <= args.threshold <= 64:
+        print("❌ --threshold muss zwischen 0 und 64 liegen")
+        return 1
+    
+    deduplicate_directories(args.directories, args.threshold, args.action, args.duplicate_dir)
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
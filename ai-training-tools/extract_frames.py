@@ -5,14 +5,156 @@ Frame-Extraktion aus Vogelhaus-Videos für AI-Training
 
 Verwendung:
   python extract_frames.py input_video.mp4 output_dir/ --interval 10
+  python extract_frames.py videos/ frames/ --batch --jobs 4
+  python extract_frames.py video.mp4 frames/ --interval 2 --dedup-threshold 6
 """
 
 import cv2
 import os
+import sys
+import time
 import argparse
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
-def extract_frames(video_path, output_dir, interval=30, max_frames=None):
+from dedup_frames import FrameDeduplicator
+
+try:
+    from ultralytics import YOLO
+    ULTRALYTICS_AVAILABLE = True
+except ImportError:
+    ULTRALYTICS_AVAILABLE = False
+
+# Ab diesem Abstand (in Frames) lohnt sich Seeking statt sequentiellem grab()
+# (Seeking springt zum vorherigen Keyframe und dekodiert nur von dort aus)
+SEEK_MIN_FRAME_GAP = 60
+
+# COCO-Klasse "bird" (wie im StreamProcessor)
+COCO_BIRD_CLASS_ID = 14
+
+# Geladene Detektoren pro Prozess (Modell-Pfad → (model, bird_class_id))
+_DETECTOR_CACHE = {}
+
+def _seek_to_frame(cap, target_frame):
+    """Springt zu einem Frame; gibt False zurück wenn der Container kein Seeking kann"""
+    if not cap.set(cv2.CAP_PROP_POS_FRAMES, target_frame):
+        return False
+    position = int(cap.get(cv2.CAP_PROP_POS_FRAMES))
+    # Manche Streams (z.B. rohes .h264) melden Erfolg, springen aber nicht
+    return abs(position - target_frame) <= 1
+
+def _skip_frames(cap, count):
+    """Überspringt Frames ohne BGR-Konvertierung (grab ohne retrieve)"""
+    for _ in range(count):
+        if not cap.grab():
+            return False
+    return True
+
+def _print_progress(saved_count, target_count, start_time):
+    """Einzeilige Fortschrittsanzeige statt Ausgabe pro Frame"""
+    elapsed = time.time() - start_time
+    rate = saved_count / elapsed if elapsed > 0 else 0
+    total = f"/{target_count}" if target_count else ""
+    sys.stdout.write(f"\r   ⏳ {saved_count}{total} Frames gespeichert ({rate:.1f} Frames/s)")
+    sys.stdout.flush()
+
+class FrameSampler:
+    """
+    Liefert Frames eines Videos in festem Abstand als (frame_index, frame)
+    
+    Je nach Modus wird per Keyframe-Seeking gesprungen, per grab() ohne
+    retrieve übersprungen oder jeder Frame dekodiert. Videos ohne
+    Seeking-Unterstützung fallen automatisch auf grab() zurück.
+    """
+    
+    def __init__(self, video_path, interval, seek_mode='auto'):
+        self.video_path = str(video_path)
+        self.cap = cv2.VideoCapture(self.video_path)
+        self.opened = self.cap.isOpened()
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) if self.opened else 0
+        self.total_frames = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT)) if self.opened else 0
+        self.frame_interval = max(1, int(self.fps * interval)) if self.fps > 0 else 1
+        
+        # Modus wählen: Seeking nur bei großen Abständen und bekannter Länge
+        if seek_mode == 'auto':
+            if self.total_frames > 0 and self.frame_interval >= SEEK_MIN_FRAME_GAP:
+                seek_mode = 'seek'
+            else:
+                seek_mode = 'grab'
+        self.mode = seek_mode
+    
+    @property
+    def duration(self):
+        return self.total_frames / self.fps if self.fps > 0 else 0
+    
+    @property
+    def expected_samples(self):
+        return self.total_frames // self.frame_interval + 1 if self.total_frames > 0 else None
+    
+    def __iter__(self):
+        cap = self.cap
+        frame_index = 0
+        
+        while True:
+            if self.mode == 'read':
+                ret, frame = cap.read()
+                if not ret:
+                    return
+                if frame_index % self.frame_interval == 0:
+                    yield frame_index, frame
+                frame_index += 1
+                continue
+            
+            ret, frame = cap.retrieve() if cap.grab() else (False, None)
+            if not ret:
+                return
+            yield frame_index, frame
+            
+            # Zum nächsten Ziel-Frame springen
+            next_index = frame_index + self.frame_interval
+            if self.total_frames > 0 and next_index >= self.total_frames:
+                return
+            
+            if self.mode == 'seek':
+                if not _seek_to_frame(cap, next_index):
+                    # Container unterstützt kein Seeking → neu öffnen und sequentiell weiter
+                    cap.release()
+                    cap = self.cap = cv2.VideoCapture(self.video_path)
+                    self.mode = 'grab'
+                    if not _skip_frames(cap, next_index):
+                        return
+            else:
+                if not _skip_frames(cap, self.frame_interval - 1):
+                    return
+            
+            frame_index = next_index
+    
+    def release(self):
+        self.cap.release()
+
+def _open_sampler(video_path, interval, seek_mode):
+    """Öffnet ein Video für die Extraktion; None bei Fehler"""
+    sampler = FrameSampler(video_path, interval, seek_mode)
+    if not sampler.opened:
+        print(f"❌ Fehler: Kann Video nicht öffnen: {video_path}")
+        return None
+    if sampler.fps <= 0:
+        print(f"❌ Fehler: Ungültige FPS in {video_path}")
+        sampler.release()
+        return None
+    return sampler
+
+def _print_video_info(sampler, interval):
+    print(f"📹 Video-Info:")
+    print(f"   FPS: {sampler.fps:.2f}")
+    print(f"   Dauer: {sampler.duration:.1f} Sekunden")
+    print(f"   Frames gesamt: {sampler.total_frames}")
+    print(f"   Extrahiere alle {interval} Sekunden (alle {sampler.frame_interval} Frames)")
+    print(f"   Modus: {sampler.mode}")
+
+def extract_frames(video_path, output_dir, interval=30, max_frames=None,
+                   seek_mode='auto', dedup_threshold=None, detector_options=None,
+                   verbose=True):
     """
     Extrahiert Frames aus einem Video in regelmäßigen Abständen
     
@@ -21,70 +163,266 @@ def extract_frames(video_path, output_dir, interval=30, max_frames=None):
         output_dir: Ausgabe-Verzeichnis für Frames
         interval: Intervall in Sekunden zwischen Frames
         max_frames: Maximum Anzahl Frames (None = unbegrenzt)
+        seek_mode: 'seek' (Keyframe-Seeking), 'grab' (grab ohne retrieve),
+                   'read' (jeden Frame dekodieren) oder 'auto'
+        dedup_threshold: Hamming-Schwelle für Duplikat-Filter (None = aus)
+        detector_options: Dict für Smart-Sampling (siehe extract_bird_frames),
+                          None = blindes Sampling im festen Intervall
+        verbose: Video-Info und Fortschritt ausgeben
+    
+    Returns:
+        Dict mit Statistiken oder None bei Fehler
     """
     
+    if detector_options is not None:
+        return extract_bird_frames(
+            video_path, output_dir, interval=interval, max_frames=max_frames,
+            seek_mode=seek_mode, dedup_threshold=dedup_threshold,
+            verbose=verbose, **detector_options
+        )
+    
     # Ausgabe-Verzeichnis erstellen
     Path(output_dir).mkdir(parents=True, exist_ok=True)
     
     # Video öffnen
-    cap = cv2.VideoCapture(video_path)
-    if not cap.isOpened():
-        print(f"❌ Fehler: Kann Video nicht öffnen: {video_path}")
-        return False
-    
-    # Video-Eigenschaften
-    fps = cap.get(cv2.CAP_PROP_FPS)
-    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-    duration = total_frames / fps
-    frame_interval = int(fps * interval)
+    sampler = _open_sampler(video_path, interval, seek_mode)
+    if sampler is None:
+        return None
     
-    print(f"📹 Video-Info:")
-    print(f"   FPS: {fps:.2f}")
-    print(f"   Dauer: {duration:.1f} Sekunden")
-    print(f"   Frames gesamt: {total_frames}")
-    print(f"   Extrahiere alle {interval} Sekunden (alle {frame_interval} Frames)")
+    if verbose:
+        _print_video_info(sampler, interval)
     
     # Frame-Extraktion
-    frame_count = 0
     saved_count = 0
+    failed_count = 0
+    dedup = FrameDeduplicator(dedup_threshold) if dedup_threshold is not None else None
+    target_count = sampler.expected_samples
+    if max_frames and target_count:
+        target_count = min(target_count, max_frames)
+    start_time = time.time()
     
-    while True:
-        ret, frame = cap.read()
-        if not ret:
+    for frame_index, frame in sampler:
+        # Nahezu identische Frames (statisches Futterhaus) verwerfen
+        if dedup is not None and dedup.is_duplicate(frame):
+            continue
+        
+        # Dateiname mit Zeitstempel
+        timestamp = frame_index / sampler.fps
+        filename = f"frame_{saved_count:04d}_t{timestamp:.1f}s.jpg"
+        filepath = os.path.join(output_dir, filename)
+        
+        # Frame speichern
+        if cv2.imwrite(filepath, frame):
+            saved_count += 1
+        else:
+            failed_count += 1
+            print(f"\n❌ Fehler beim Speichern: {filename}")
+        
+        if verbose and saved_count % 10 == 0:
+            _print_progress(saved_count, target_count, start_time)
+        
+        # Maximum erreicht?
+        if max_frames and saved_count >= max_frames:
             break
-            
-        # Alle X Frames einen Frame speichern
-        if frame_count % frame_interval == 0:
-            # Dateiname mit Zeitstempel
-            timestamp = frame_count / fps
-            filename = f"frame_{saved_count:04d}_t{timestamp:.1f}s.jpg"
-            filepath = os.path.join(output_dir, filename)
-            
-            # Frame speichern
-            success = cv2.imwrite(filepath, frame)
-            if success:
-                saved_count += 1
-                print(f"✅ Gespeichert: {filename} ({saved_count} Frames)")
-            else:
-                print(f"❌ Fehler beim Speichern: {filename}")
-            
-            # Maximum erreicht?
-            if max_frames and saved_count >= max_frames:
-                print(f"🎯 Maximum von {max_frames} Frames erreicht")
+    
+    sampler.release()
+    elapsed = time.time() - start_time
+    
+    if verbose:
+        _print_progress(saved_count, target_count, start_time)
+        print(f"\n\n✅ Extraktion abgeschlossen:")
+        print(f"   Extrahiert: {saved_count} Frames in {elapsed:.1f}s")
+        if failed_count:
+            print(f"   Fehlgeschlagen: {failed_count} Frames")
+        if dedup:
+            print(f"   Duplikate verworfen: {dedup.skipped} Frames")
+        if max_frames and saved_count >= max_frames:
+            print(f"   🎯 Maximum von {max_frames} Frames erreicht")
+        print(f"   Ausgabe: {output_dir}")
+    
+    return {
+        'video': str(video_path),
+        'saved': saved_count,
+        'failed': failed_count,
+        'duplicates': dedup.skipped if dedup else 0,
+        'duration': sampler.duration,
+        'elapsed': elapsed,
+        'mode': sampler.mode
+    }
+
+def load_bird_detector(model_path=None):
+    """
+    Lädt den gleichen YOLO-Detektor wie der StreamProcessor (pro Prozess gecacht)
+    
+    Args:
+        model_path: Eigenes Modell; None = config/models/yolov8n.pt (COCO)
+    
+    Returns:
+        (model, bird_class_id) - bird_class_id ist None bei eigenen Modellen
+    """
+    key = model_path or 'default'
+    if key in _DETECTOR_CACHE:
+        return _DETECTOR_CACHE[key]
+    
+    if model_path:
+        detector = (YOLO(str(model_path)), None)
+    else:
+        model_file = Path(__file__).resolve().parent.parent / "config" / "models" / "yolov8n.pt"
+        if not model_file.exists():
+            model_file = "yolov8n.pt"  # Wird von Ultralytics heruntergeladen
+        detector = (YOLO(str(model_file)), COCO_BIRD_CLASS_ID)
+    
+    _DETECTOR_CACHE[key] = detector
+    return detector
+
+def extract_bird_frames(video_path, output_dir, interval=1.0, max_frames=None,
+                        seek_mode='auto', dedup_threshold=None, verbose=True,
+                        model_path=None, threshold=0.35, imgsz=320, batch_size=8,
+                        negative_ratio=0.1, label_class=0):
+    """
+    Smart-Sampling: speichert nur Frames, in denen der Detektor Vögel findet
+    
+    Kandidaten-Frames werden im Abstand `interval` gezogen und in Batches bei
+    niedriger Auflösung durch YOLO geschickt. Zu jedem gespeicherten Bild
+    wird ein YOLO-Label (.txt) mit Vorab-Boxen daneben geschrieben, sodass
+    split_dataset.py das Verzeichnis direkt als Bild- und Label-Ordner nutzen kann.
+    
+    Args:
+        model_path: Eigenes YOLO-Modell (None = COCO yolov8n, Klasse 14 'bird')
+        threshold: Mindest-Konfidenz für eine Vorab-Box
+        imgsz: Inferenz-Auflösung (klein = schnell)
+        batch_size: Frames pro Inferenz-Aufruf
+        negative_ratio: Anteil Frames ohne Vogel relativ zu positiven Frames
+                        (werden mit leerer Label-Datei gespeichert)
+        label_class: Klassen-ID für die Vorab-Labels des COCO-Modells (Vogelart
+                     später korrigieren); eigene Modelle schreiben ihre Klassen-IDs
+    
+    Returns:
+        Dict mit Statistiken oder None bei Fehler
+    """
+    
+    if not ULTRALYTICS_AVAILABLE:
+        print("❌ Smart-Sampling benötigt Ultralytics: pip install ultralytics")
+        return None
+    
+    Path(output_dir).mkdir(parents=True, exist_ok=True)
+    
+    sampler = _open_sampler(video_path, interval, seek_mode)
+    if sampler is None:
+        return None
+    
+    if verbose:
+        _print_video_info(sampler, interval)
+        print(f"   Smart-Sampling: Schwelle {threshold}, imgsz {imgsz}, "
+              f"Batch {batch_size}, Negativ-Anteil {negative_ratio:.0%}")
+    
+    try:
+        model, bird_class_id = load_bird_detector(model_path)
+    except Exception as e:
+        print(f"❌ Fehler beim Laden des Models: {e}")
+        sampler.release()
+        return None
+    
+    classes = [bird_class_id] if bird_class_id is not None else None
+    dedup = FrameDeduplicator(dedup_threshold) if dedup_threshold is not None else None
+    stats = {'candidates': 0, 'positives': 0, 'negatives': 0, 'failed': 0}
+    start_time = time.time()
+    
+    def save_sample(frame_index, frame, labels):
+        saved = stats['positives'] + stats['negatives']
+        timestamp = frame_index / sampler.fps
+        stem = f"frame_{saved:04d}_t{timestamp:.1f}s"
+        if not cv2.imwrite(os.path.join(output_dir, f"{stem}.jpg"), frame):
+            stats['failed'] += 1
+            return
+        with open(os.path.join(output_dir, f"{stem}.txt"), 'w') as f:
+            f.writelines(labels)
+        stats['positives' if labels else 'negatives'] += 1
+    
+    def limit_reached():
+        return max_frames and stats['positives'] + stats['negatives'] >= max_frames
+    
+    def process_batch(batch):
+        results = model(
+            [frame for _, frame in batch],
+            verbose=False,
+            conf=threshold,
+            imgsz=imgsz,
+            classes=classes
+        )
+        for (frame_index, frame), result in zip(batch, results):
+            if limit_reached():
+                return
+            # COCO "bird" → label_class, eigene Modelle behalten ihre Klassen-ID
+            labels = [
+                f"{label_class if bird_class_id is not None else int(cls_id)} {x:.6f} {y:.6f} {w:.6f} {h:.6f}\n"
+                for (x, y, w, h), cls_id in zip(result.boxes.xywhn.tolist(), result.boxes.cls.tolist())
+            ]
+            if labels:
+                save_sample(frame_index, frame, labels)
+            elif stats['negatives'] < negative_ratio * max(stats['positives'], 1):
+                # Kontrollierter Anteil Hintergrundbilder gegen False Positives
+                save_sample(frame_index, frame, [])
+    
+    batch = []
+    for frame_index, frame in sampler:
+        if dedup is not None and dedup.is_duplicate(frame):
+            continue
+        
+        stats['candidates'] += 1
+        batch.append((frame_index, frame))
+        if len(batch) >= batch_size:
+            process_batch(batch)
+            batch = []
+            if verbose:
+                _print_progress(stats['positives'] + stats['negatives'], None, start_time)
+            if limit_reached():
                 break
-                
-        frame_count += 1
     
-    cap.release()
+    if batch and not limit_reached():
+        process_batch(batch)
     
-    print(f"\n✅ Extraktion abgeschlossen:")
-    print(f"   Extrahiert: {saved_count} Frames")
-    print(f"   Ausgabe: {output_dir}")
+    sampler.release()
+    elapsed = time.time() - start_time
+    saved_count = stats['positives'] + stats['negatives']
     
-    return True
+    if verbose:
+        print(f"\n\n✅ Smart-Sampling abgeschlossen:")
+        print(f"   Geprüft: {stats['candidates']} Frames in {elapsed:.1f}s")
+        print(f"   Mit Vogel: {stats['positives']} Frames")
+        print(f"   Ohne Vogel: {stats['negatives']} Frames")
+        if dedup:
+            print(f"   Duplikate verworfen: {dedup.skipped} Frames")
+        print(f"   Ausgabe (Bilder + Labels): {output_dir}")
+    
+    return {
+        'video': str(video_path),
+        'saved': saved_count,
+        'failed': stats['failed'],
+        'duplicates': dedup.skipped if dedup else 0,
+        'candidates': stats['candidates'],
+        'positives': stats['positives'],
+        'negatives': stats['negatives'],
+        'duration': sampler.duration,
+        'elapsed': elapsed,
+        'mode': sampler.mode
+    }
+
+def _init_worker():
+    """Initializer für den Prozess-Pool: ein Thread pro Prozess, Parallelität kommt aus dem Pool"""
+    cv2.setNumThreads(1)
+    try:
+        import torch
+        torch.set_num_threads(1)
+    except ImportError:
+        pass
 
-def process_multiple_videos(video_dir, output_base_dir, **kwargs):
-    """Verarbeitet mehrere Videos in einem Verzeichnis"""
+def _extract_worker(video_path, output_dir, kwargs):
+    """Worker für den Prozess-Pool (ein Video pro Prozess, ohne Einzelausgabe)"""
+    return extract_frames(video_path, output_dir, verbose=False, **kwargs)
+
+def process_multiple_videos(video_dir, output_base_dir, jobs=1, **kwargs):
+    """Verarbeitet mehrere Videos in einem Verzeichnis (optional parallel)"""
     
     video_extensions = {'.mp4', '.avi', '.mov', '.mkv', '.wmv'}
     video_files = []
@@ -97,17 +435,63 @@ def process_multiple_videos(video_dir, output_base_dir, **kwargs):
         print(f"❌ Keine Videos gefunden in: {video_dir}")
         return False
     
+    video_files = sorted(set(video_files))
     print(f"📂 Gefundene Videos: {len(video_files)}")
     
-    for video_file in video_files:
-        print(f"\n🎬 Verarbeite: {video_file.name}")
-        
-        # Ausgabe-Unterverzeichnis für jedes Video
-        output_dir = Path(output_base_dir) / video_file.stem
-        
-        success = extract_frames(str(video_file), str(output_dir), **kwargs)
-        if not success:
-            print(f"❌ Fehler bei: {video_file.name}")
+    start_time = time.time()
+    total_saved = 0
+    total_duplicates = 0
+    failed_videos = []
+    
+    if jobs <= 1:
+        for video_file in video_files:
+            print(f"\n🎬 Verarbeite: {video_file.name}")
+            
+            # Ausgabe-Unterverzeichnis für jedes Video
+            output_dir = Path(output_base_dir) / video_file.stem
+            
+            stats = extract_frames(str(video_file), str(output_dir), **kwargs)
+            if stats:
+                total_saved += stats['saved']
+                total_duplicates += stats['duplicates']
+            else:
+                failed_videos.append(video_file.name)
+                print(f"❌ Fehler bei: {video_file.name}")
+    else:
+        print(f"⚙️  Parallele Verarbeitung mit {jobs} Prozessen")
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker) as executor:
+            futures = {
+                executor.submit(_extract_worker, str(video_file),
+                                str(Path(output_base_dir) / video_file.stem), kwargs): video_file
+                for video_file in video_files
+            }
+            
+            for done, future in enumerate(as_completed(futures), start=1):
+                video_file = futures[future]
+                try:
+                    stats = future.result()
+                except Exception as e:
+                    print(f"❌ Fehler bei {video_file.name}: {e}")
+                    stats = None
+                
+                if stats:
+                    total_saved += stats['saved']
+                    total_duplicates += stats['duplicates']
+                    print(f"   [{done}/{len(video_files)}] ✅ {video_file.name}: "
+                          f"{stats['saved']} Frames ({stats['elapsed']:.1f}s, {stats['mode']})")
+                else:
+                    failed_videos.append(video_file.name)
+                    print(f"   [{done}/{len(video_files)}] ❌ {video_file.name}")
+    
+    elapsed = time.time() - start_time
+    print(f"\n📊 Zusammenfassung:")
+    print(f"   Videos: {len(video_files) - len(failed_videos)}/{len(video_files)} erfolgreich")
+    print(f"   Frames gesamt: {total_saved}")
+    if total_duplicates:
+        print(f"   Duplikate verworfen: {total_duplicates}")
+    print(f"   Dauer: {elapsed:.1f}s")
+    if failed_videos:
+        print(f"   Fehlgeschlagen: {', '.join(failed_videos)}")
     
     return True
 
@@ -123,19 +507,49 @@ Beispiele:
   # Alle Videos in einem Ordner
   python extract_frames.py videos/ frames/ --batch --interval 5 --max-frames 100
   
+  # Ganze Saison parallel mit 4 Prozessen
+  python extract_frames.py season/ frames/ --batch --interval 30 --jobs 4
+  
   # Hochfrequente Extraktion für Action-Szenen
   python extract_frames.py feeding_time.mp4 frames/ --interval 1 --max-frames 200
+  
+  # Smart-Sampling: nur Frames mit Vögeln, inkl. YOLO-Vorab-Labels
+  python extract_frames.py season/ frames/ --batch --smart --interval 1 --dedup-threshold 6
         """
     )
     
     parser.add_argument('input', help='Input-Video oder Verzeichnis mit Videos')
     parser.add_argument('output', help='Ausgabe-Verzeichnis für Frames')
-    parser.add_argument('--interval', type=float, default=30, 
-                       help='Intervall zwischen Frames in Sekunden (default: 30)')
+    parser.add_argument('--interval', type=float,
+                       help='Intervall zwischen Frames in Sekunden (default: 30, mit --smart: 1)')
     parser.add_argument('--max-frames', type=int, 
                        help='Maximum Anzahl Frames pro Video (default: unbegrenzt)')
     parser.add_argument('--batch', action='store_true',
                        help='Verarbeite alle Videos im Input-Verzeichnis')
+    parser.add_argument('--jobs', type=int, default=1,
+                       help='Anzahl paralleler Prozesse für --batch (default: 1)')
+    parser.add_argument('--seek-mode', choices=['auto', 'seek', 'grab', 'read'], default='auto',
+                       help='Frame-Zugriff: seek (Keyframe-Seeking), grab (ohne Dekodierung nach BGR), '
+                            'read (jeden Frame lesen) (default: auto)')
+    parser.add_argument('--dedup-threshold', type=int,
+                       help='Nahezu identische Frames verwerfen: max. Hamming-Abstand des '
+                            'Perceptual Hash, z.B. 6 (default: aus)')
+    
+    smart = parser.add_argument_group('Smart-Sampling (nur Frames mit Vögeln + YOLO-Labels)')
+    smart.add_argument('--smart', action='store_true',
+                      help='Detektor wie im StreamProcessor nutzen und nur Frames mit Vögeln speichern')
+    smart.add_argument('--model', help='Eigenes YOLO-Modell (default: config/models/yolov8n.pt)')
+    smart.add_argument('--smart-threshold', type=float, default=0.35,
+                      help='Mindest-Konfidenz für Vorab-Labels (default: 0.35)')
+    smart.add_argument('--smart-imgsz', type=int, default=320,
+                      help='Inferenz-Auflösung (default: 320)')
+    smart.add_argument('--smart-batch', type=int, default=8,
+                      help='Frames pro Inferenz-Batch (default: 8)')
+    smart.add_argument('--negative-ratio', type=float, default=0.1,
+                      help='Anteil Frames ohne Vogel relativ zu Frames mit Vogel (default: 0.1)')
+    smart.add_argument('--label-class', type=int, default=0,
+                      help='Klassen-ID in den Vorab-Labels beim COCO-Modell (default: 0); '
+                           'mit --model werden die Klassen-IDs des Modells übernommen')
     
     args = parser.parse_args()
     
@@ -146,21 +560,49 @@ Beispiele:
         print(f"❌ Input nicht gefunden: {args.input}")
         return 1
     
+    if args.jobs < 1:
+        print("❌ --jobs muss mindestens 1 sein")
+        return 1
+    
+    if args.interval is None:
+        args.interval = 1.0 if args.smart else 30
+    
+    detector_options = None
+    if args.smart:
+        if not ULTRALYTICS_AVAILABLE:
+            print("❌ --smart benötigt Ultralytics: pip install ultralytics")
+            return 1
+        detector_options = {
+            'model_path': args.model,
+            'threshold': args.smart_threshold,
+            'imgsz': args.smart_imgsz,
+            'batch_size': args.smart_batch,
+            'negative_ratio': args.negative_ratio,
+            'label_class': args.label_class
+        }
+    
     # Batch-Verarbeitung oder einzelnes Video
     if args.batch or input_path.is_dir():
         success = process_multiple_videos(
             args.input, args.output,
+            jobs=args.jobs,
             interval=args.interval,
-            max_frames=args.max_frames
+            max_frames=args.max_frames,
+            seek_mode=args.seek_mode,
+            dedup_threshold=args.dedup_threshold,
+            detector_options=detector_options
         )
     else:
         success = extract_frames(
             args.input, args.output,
             interval=args.interval,
-            max_frames=args.max_frames
+            max_frames=args.max_frames,
+            seek_mode=args.seek_mode,
+            dedup_threshold=args.dedup_threshold,
+            detector_options=detector_options
         )
     
     return 0 if success else 1
 
 if __name__ == "__main__":
-    exit(main())
\ No newline at end of file
+    exit(main())
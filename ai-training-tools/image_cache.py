@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vorskalierter Bild-Cache (Memory-Mapped) für CPU-Training
+
+Dekodiert jedes Trainings- und Validierungsbild genau einmal, skaliert es
+wie Ultralytics (längere Seite = imgsz, Seitenverhältnis bleibt) und legt es
+in einem festen imgsz x imgsz Slot eines uint8-Memmaps ab. Ein JSON-Index
+speichert Pfad, SHA-256 und Originalgröße; geänderte Dateien werden beim
+nächsten Build neu dekodiert, unveränderte aus dem alten Cache übernommen.
+Daten-Datei und Index tragen dieselbe Build-ID, passen sie nicht zusammen
+(abgebrochener Build), wird der Cache verworfen und neu gebaut.
+
+Verwendung:
+  python image_cache.py bird_dataset/data.yaml --imgsz 640
+  python image_cache.py bird_dataset/data.yaml --imgsz 640 --benchmark
+  python train_bird_model.py bird_dataset/data.yaml --image-cache
+"""
+
+import os
+import json
+import math
+import time
+import uuid
+import hashlib
+import argparse
+from pathlib import Path
+
+import cv2
+import numpy as np
+import yaml
+
+IMAGE_EXTENSIONS = {'.jpg', '.jpeg', '.png', '.bmp'}
+CACHE_DIR_NAME = '.image_cache'
+HEADER_SIZE = 64  # Build-ID am Anfang der Daten-Datei
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """SHA-256 einer Datei (blockweise gelesen)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+def resize_to_imgsz(image, imgsz):
+    """Skaliert wie Ultralytics load_image: längere Seite = imgsz, Seitenverhältnis bleibt"""
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(math.ceil(w0 * r), imgsz), min(math.ceil(h0 * r), imgsz)
+        image = cv2.resize(image, (w, h), interpolation=cv2.INTER_LINEAR)
+    return image
+
+def collect_dataset_images(config_path):
+    """
+    Sammelt alle Bilder aus train/val einer data.yaml (Verzeichnis oder Bildliste)
+    
+    Returns:
+        Sortierte Liste absoluter Pfade (als str)
+    """
+    with open(config_path, 'r', encoding='utf-8') as f:
+        config = yaml.safe_load(f)
+    
+    root = Path(config.get('path', Path(config_path).parent))
+    images = set()
+    for split in ('train', 'val'):
+        entries = config.get(split)
+        if not entries:
+            continue
+        for entry in entries if isinstance(entries, list) else [entries]:
+            source = root / entry
+            if source.is_file():
+                with open(source, 'r', encoding='utf-8') as f:
+                    for line in f:
+                        line = line.strip()
+                        if line:
+                            path = Path(line) if os.path.isabs(line) else root / line
+                            images.add(str(path.resolve()))
+            elif source.is_dir():
+                images.update(
+                    str(p.resolve()) for p in source.rglob('*')
+                    if p.suffix.lower() in IMAGE_EXTENSIONS
+                )
+    return sorted(images)
+
+class ImageCache:
+    """
+    Lesezugriff auf einen gebauten Cache
+    
+    Das Memmap wird erst beim ersten Zugriff geöffnet, damit die Instanz
+    problemlos an DataLoader-Worker übergeben werden kann.
+    """
+    
+    def __init__(self, cache_dir, imgsz):
+        self.cache_dir = Path(cache_dir)
+        self.imgsz = imgsz
+        self.data_file = self.cache_dir / f"images_{imgsz}.u8"
+        self.index_file = self.cache_dir / f"index_{imgsz}.json"
+        self._images = None
+        self._entries = None
+        self._slots = None
+        self._build_id = None
+    
+    def exists(self):
+        return self.data_file.exists() and self.index_file.exists()
+    
+    def is_valid(self):
+        """True wenn Daten-Datei und Index aus demselben Build stammen"""
+        if not self.exists():
+            return False
+        try:
+            self._load_index()
+        except (OSError, ValueError, KeyError):
+            return False
+        return self._build_id is not None and self._read_build_id() == self._build_id
+    
+    def _read_build_id(self):
+        with open(self.data_file, 'rb') as f:
+            return f.read(HEADER_SIZE).rstrip(b'\0').decode('ascii', errors='replace')
+    
+    def _load_index(self):
+        if self._entries is None:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            self._build_id = index.get('build_id')
+            self._entries = index['entries']
+            self._slots = {entry['path']: slot for slot, entry in enumerate(self._entries)}
+        return self._entries
+    
+    def _open(self):
+        if self._images is None:
+            entries = self._load_index()
+            if self._build_id is None or self._read_build_id() != self._build_id:
+                raise RuntimeError(f"Bild-Cache {self.cache_dir} inkonsistent (Daten und Index aus "
+                                   f"verschiedenen Builds) - neu bauen mit image_cache.py")
+            self._images = np.memmap(self.data_file, dtype=np.uint8, mode='r', offset=HEADER_SIZE,
+                                     shape=(len(entries), self.imgsz, self.imgsz, 3))
+        return self._images
+    
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+    
+    def __len__(self):
+        return len(self._load_index())
+    
+    def get(self, path):
+        """
+        Liefert das vorskalierte Bild zu einem Pfad
+        
+        Returns:
+            (image, (h0, w0)) oder None wenn der Pfad nicht im Cache liegt
+        """
+        self._load_index()
+        slot = self._slots.get(str(Path(path).resolve()))
+        if slot is None:
+            return None
+        entry = self._entries[slot]
+        image = self._open()[slot, :entry['h'], :entry['w']]
+        # Kopie: Augmentierungen schreiben in das Bild, Memmap ist read-only
+        return np.array(image), (entry['h0'], entry['w0'])
+
+def build_cache(image_paths, cache_dir, imgsz=640, verbose=True):
+    """
+    Baut bzw. aktualisiert den Cache für eine Bildliste
+    
+    Unveränderte Bilder (gleiche Größe/mtime, sonst gleicher SHA-256) werden
+    aus dem bestehenden Cache übernommen, alle anderen neu dekodiert.
+    
+    Returns:
+        ImageCache oder None bei Fehler
+    """
+    cache = ImageCache(cache_dir, imgsz)
+    cache.cache_dir.mkdir(parents=True, exist_ok=True)
+    
+    old_entries, old_images = {}, None
+    if cache.is_valid():
+        for slot, entry in enumerate(cache._load_index()):
+            old_entries[entry['path']] = (slot, entry)
+        old_images = cache._open()
+    elif cache.exists() and verbose:
+        print("⚠️  Bild-Cache unvollständig (Daten und Index passen nicht zusammen) - baue neu")
+    
+    size_gb = len(image_paths) * imgsz * imgsz * 3 / 1024**3
+    if verbose:
+        print(f"🗃️  Baue Bild-Cache: {len(image_paths)} Bilder @ {imgsz}px ({size_gb:.1f} GB)")
+    
+    build_id = uuid.uuid4().hex
+    tmp_file = cache.data_file.with_suffix('.u8.tmp')
+    tmp_index = cache.index_file.with_suffix('.json.tmp')
+    images = np.memmap(tmp_file, dtype=np.uint8, mode='w+', offset=HEADER_SIZE,
+                       shape=(max(len(image_paths), 1), imgsz, imgsz, 3))
+    
+    entries = []
+    stats = {'reused': 0, 'decoded': 0, 'failed': 0}
+    start_time = time.time()
+    
+    for path in image_paths:
+        st = os.stat(path)
+        old = old_entries.get(path)
+        
+        if old and (old[1]['size'], old[1]['mtime_ns']) == (st.st_size, st.st_mtime_ns):
+            sha256 = old[1]['sha256']
+        else:
+            sha256 = file_sha256(path)
+        
+        slot = len(entries)
+        if old and old[1]['sha256'] == sha256:
+            entry = dict(old[1], size=st.st_size, mtime_ns=st.st_mtime_ns)
+            images[slot] = old_images[old[0]]
+            stats['reused'] += 1
+        else:
+            image = cv2.imread(path)
+            if image is None:
+                stats['failed'] += 1
+                continue
+            h0, w0 = image.shape[:2]
+            image = resize_to_imgsz(image, imgsz)
+            h, w = image.shape[:2]
+            images[slot, :h, :w] = image
+            entry = {'path': path, 'sha256': sha256, 'size': st.st_size,
+                     'mtime_ns': st.st_mtime_ns, 'h0': h0, 'w0': w0, 'h': h, 'w': w}
+            stats['decoded'] += 1
+        
+        entries.append(entry)
+        if verbose and len(entries) % 500 == 0:
+            print(f"   ⏳ {len(entries)}/{len(image_paths)} Bilder")
+    
+    images.flush()
+    del images, old_images
+    cache._images = None
+    
+    with open(tmp_file, 'r+b') as f:
+        f.write(build_id.encode('ascii').ljust(HEADER_SIZE, b'\0'))
+        os.fsync(f.fileno())
+    with open(tmp_index, 'w', encoding='utf-8') as f:
+        json.dump({'imgsz': imgsz, 'build_id': build_id, 'entries': entries}, f)
+        f.flush()
+        os.fsync(f.fileno())
+    
+    # Beide Dateien atomar ersetzen; stirbt der Build dazwischen, passen die
+    # Build-IDs nicht zusammen und der Cache wird beim nächsten Lauf neu gebaut
+    os.replace(tmp_file, cache.data_file)
+    os.replace(tmp_index, cache.index_file)
+    
+    if verbose:
+        print(f"✅ Cache fertig in {time.time() - start_time:.1f}s: "
+              f"{stats['decoded']} dekodiert, {stats['reused']} übernommen"
+              + (f", {stats['failed']} nicht lesbar" if stats['failed'] else ""))
+    
+    return ImageCache(cache_dir, imgsz)
+
+def default_cache_dir(config_path):
+    """Cache-Verzeichnis neben der data.yaml"""
+    return Path(config_path).resolve().parent / CACHE_DIR_NAME
+
+def benchmark(cache, image_paths, limit=500):
+    """
+    Vergleicht die Ladezeit pro Bild: JPEG dekodieren + skalieren vs. Cache
+    
+    Returns:
+        (ms_ohne_cache, ms_mit_cache)
+    """
+    sample = image_paths[:limit]
+    
+    start = time.perf_counter()
+    for path in sample:
+        resize_to_imgsz(cv2.imread(path), cache.imgsz)
+    decode_ms = (time.perf_counter() - start) / len(sample) * 1000
+    
+    start = time.perf_counter()
+    for path in sample:
+        cache.get(path)
+    cache_ms = (time.perf_counter() - start) / len(sample) * 1000
+    
+    return decode_ms, cache_ms
+
+def make_cached_trainer(cache):
+    """
+    Erzeugt eine DetectionTrainer-Klasse, deren Datasets Bilder aus dem Cache laden
+    
+    Bilder, die nicht im Cache liegen, werden wie gewohnt von Ultralytics geladen.
+    """
+    from ultralytics.data.dataset import YOLODataset
+    from ultralytics.models.yolo.detect import DetectionTrainer
+    
+    class MemmapYOLODataset(YOLODataset):
+        image_cache = cache
+        
+        def load_image(self, i, rect_mode=True):
+            hit = self.image_cache.get(self.im_files[i]) if rect_mode else None
+            if hit is None:
+                return super().load_image(i, rect_mode)
+            
+            image, original_shape = hit
+            # Mosaic zieht Partnerbilder aus dem Buffer (wie in BaseDataset.load_image)
+            if self.augment:
+                self.buffer.append(i)
+                if len(self.buffer) >= self.max_buffer_length:
+                    self.buffer.pop(0)
+            return image, original_shape, image.shape[:2]
+    
+    class CachedDetectionTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode="train", batch=None):
+            dataset = super().build_dataset(img_path, mode, batch)
+            # Bereits initialisiertes Dataset (Labels, Augmentierungen) auf Cache-Zugriff umstellen
+            dataset.__class__ = MemmapYOLODataset
+            return dataset
+    
+    return CachedDetectionTrainer
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Vorskalierter Bild-Cache für CPU-Training',
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Beispiele:
+  # Cache bauen bzw. aktualisieren
+  python image_cache.py bird_dataset/data.yaml --imgsz 640
+
+  # Ladezeit mit und ohne Cache vergleichen
+  python image_cache.py bird_dataset/data.yaml --imgsz 640 --benchmark
+        """
+    )
+    
+    parser.add_argument('dataset_config', help='Pfad zur data.yaml Datei')
+    parser.add_argument('--imgsz', type=int, default=640,
+                       help='Ziel-Bildgröße wie beim Training (default: 640)')
+    parser.add_argument('--cache-dir', help=f'Cache-Verzeichnis (default: neben data.yaml in {CACHE_DIR_NAME}/)')
+    parser.add_argument('--benchmark', action='store_true',
+                       help='Ladezeit pro Bild mit und ohne Cache messen')
+    
+    args = parser.parse_args()
+    
+    if not Path(args.dataset_config).exists():
+        print(f"❌ Dataset-Konfiguration nicht gefunden: {args.dataset_config}")
+        return 1
+    
+    image_paths = collect_dataset_images(args.dataset_config)
+    if not image_paths:
+        print("❌ Keine Bilder in train/val gefunden")
+        return 1
+    
+    cache_dir = args.cache_dir or default_cache_dir(args.dataset_config)
+    cache = build_cache(image_paths, cache_dir, args.imgsz)
+    
+    if args.benchmark:
+        decode_ms, cache_ms = benchmark(cache, image_paths)
+        print(f"\n⏱️  Ladezeit pro Bild:")
+        print(f"   Ohne Cache (dekodieren + skalieren): {decode_ms:.2f}ms")
+        print(f"   Mit Cache (Memmap):                  {cache_ms:.2f}ms")
+        if cache_ms > 0:
+            print(f"   Faktor: {decode_ms / cache_ms:.1f}x")
+    
+    return 0
+
+if __name__ == "__main__":
+    exit(main())
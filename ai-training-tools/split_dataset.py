@@ -7,12 +7,101 @@ Teilt ein Dataset in Training- und Validierungssets auf.
 """
 
 import os
+import sys
 import shutil
 import random
 import argparse
 from pathlib import Path
 
-def split_dataset(image_dir, label_dir, output_dir, train_ratio=0.8, val_ratio=0.2, seed=42):
+from dataset_manifest import DatasetManifest
+
+# ioctl FICLONE (Linux): Copy-on-Write Klon auf btrfs/XFS ohne Datenkopie
+FICLONE = 0x40049409
+
+LINK_MODES = ['copy', 'hardlink', 'reflink', 'symlink', 'auto']
+
+def _reflink(src, dest):
+    """Erstellt einen Reflink (CoW-Klon); OSError wenn das Dateisystem es nicht kann"""
+    if not sys.platform.startswith('linux'):
+        raise OSError("Reflink nur unter Linux unterstützt")
+    import fcntl
+    with open(src, 'rb') as fsrc, open(dest, 'wb') as fdest:
+        try:
+            fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdest.close()
+            os.unlink(dest)
+            raise
+    shutil.copystat(src, dest)
+
+def place_file(src, dest, mode='copy'):
+    """
+    Legt eine Datei im Ziel ab - als Kopie oder Link
+    
+    Args:
+        src: Quelldatei
+        dest: Zielpfad (wird ggf. ersetzt)
+        mode: 'copy', 'hardlink', 'reflink', 'symlink' oder
+              'auto' (reflink → hardlink → copy)
+    
+    Returns:
+        Tatsächlich verwendeter Modus (Fallback auf 'copy' bei Fehlern)
+    """
+    src, dest = Path(src), Path(dest)
+    
+    # Bestehende Dateien/Links aus früheren Splits ersetzen
+    if dest.exists() or dest.is_symlink():
+        dest.unlink()
+    
+    attempts = ['reflink', 'hardlink'] if mode == 'auto' else [mode]
+    for attempt in attempts:
+        try:
+            if attempt == 'hardlink':
+                os.link(src, dest)
+            elif attempt == 'reflink':
+                _reflink(src, dest)
+            elif attempt == 'symlink':
+                os.symlink(src.resolve(), dest)
+            else:
+                break
+            return attempt
+        except OSError:
+            # z.B. anderes Dateisystem (EXDEV) oder kein CoW-Support
+            continue
+    
+    shutil.copy2(src, dest)
+    return 'copy'
+
+def _label_path_for_ultralytics(image_path):
+    """Label-Pfad, den Ultralytics zu einem Bild erwartet (/images/ → /labels/)"""
+    sa, sb = f"{os.sep}images{os.sep}", f"{os.sep}labels{os.sep}"
+    return Path(sb.join(str(image_path).rsplit(sa, 1)).rsplit('.', 1)[0] + '.txt')
+
+def write_image_lists(output_path, label_path, train_images, val_images):
+    """
+    Schreibt Ultralytics-Bildlisten (train.txt/val.txt) statt Verzeichnisse zu befüllen
+    
+    Returns:
+        Anzahl Bilder, deren Label Ultralytics nicht finden wird
+    """
+    output_path.mkdir(parents=True, exist_ok=True)
+    label_path = label_path.resolve()
+    unreachable = 0
+    
+    for split_name, images_list in (('train', train_images), ('val', val_images)):
+        with open(output_path / f'{split_name}.txt', 'w', encoding='utf-8') as f:
+            for img_path in images_list:
+                img_path = img_path.resolve()
+                f.write(f"{img_path}\n")
+                
+                label_src = label_path / (img_path.stem + '.txt')
+                if label_src.exists() and _label_path_for_ultralytics(img_path) != label_src:
+                    unreachable += 1
+    
+    return unreachable
+
+def split_dataset(image_dir, label_dir, output_dir, train_ratio=0.8, val_ratio=0.2, seed=42,
+                  link_mode='copy', list_only=False, manifest=None):
     """
     Teilt Dataset in Training/Validation auf
     
@@ -23,6 +112,10 @@ def split_dataset(image_dir, label_dir, output_dir, train_ratio=0.8, val_ratio=0
         train_ratio: Anteil Training (0.0-1.0)
         val_ratio: Anteil Validation (0.0-1.0)
         seed: Random seed für Reproduzierbarkeit
+        link_mode: Wie Dateien im Ziel abgelegt werden (siehe place_file)
+        list_only: Nur train.txt/val.txt Bildlisten schreiben, keine Dateien ablegen
+        manifest: DatasetManifest für stabile, hash-basierte Aufteilung
+                  (None = zufällige Aufteilung mit seed)
     """
     
     # Random seed setzen
@@ -33,62 +126,86 @@ def split_dataset(image_dir, label_dir, output_dir, train_ratio=0.8, val_ratio=0
     label_path = Path(label_dir)
     output_path = Path(output_dir)
     
-    # Alle Bilder finden (verschiedene Formate)
-    image_extensions = {'.jpg', '.jpeg', '.png', '.bmp'}
-    images = []
-    for ext in image_extensions:
-        images.extend(image_path.glob(f'*{ext}'))
-        images.extend(image_path.glob(f'*{ext.upper()}'))
-    
-    if not images:
-        print(f"❌ Keine Bilder gefunden in: {image_dir}")
-        return False
-    
-    print(f"📸 Gefunden: {len(images)} Bilder")
-    
-    # Zufällige Reihenfolge
-    random.shuffle(images)
-    
-    # Aufteilung berechnen
-    total_images = len(images)
-    train_count = int(total_images * train_ratio)
-    val_count = int(total_images * val_ratio)
-    
-    # Sicherstellen dass train + val <= total
-    if train_count + val_count > total_images:
-        val_count = total_images - train_count
-    
-    train_images = images[:train_count]
-    val_images = images[train_count:train_count + val_count]
+    if manifest is not None:
+        # Zuordnung aus dem Inhalts-Hash: neue Bilder verschieben keine alten
+        train_images, val_images = manifest.split_assignment(train_ratio, val_ratio, seed)
+        total_images = manifest.statistics()['images']
+        if not total_images:
+            print(f"❌ Keine Bilder gefunden in: {image_dir}")
+            return False
+        print(f"📸 Gefunden: {total_images} Bilder (Manifest, stabile Aufteilung)")
+    else:
+        # Alle Bilder finden (verschiedene Formate)
+        image_extensions = {'.jpg', '.jpeg', '.png', '.bmp'}
+        images = []
+        for ext in image_extensions:
+            images.extend(image_path.glob(f'*{ext}'))
+            images.extend(image_path.glob(f'*{ext.upper()}'))
+        
+        if not images:
+            print(f"❌ Keine Bilder gefunden in: {image_dir}")
+            return False
+        
+        print(f"📸 Gefunden: {len(images)} Bilder")
+        
+        # Zufällige Reihenfolge
+        random.shuffle(images)
+        
+        # Aufteilung berechnen
+        total_images = len(images)
+        train_count = int(total_images * train_ratio)
+        val_count = int(total_images * val_ratio)
+        
+        # Sicherstellen dass train + val <= total
+        if train_count + val_count > total_images:
+            val_count = total_images - train_count
+        
+        train_images = images[:train_count]
+        val_images = images[train_count:train_count + val_count]
     
     print(f"📊 Aufteilung:")
     print(f"   Training: {len(train_images)} Bilder ({len(train_images)/total_images*100:.1f}%)")
     print(f"   Validation: {len(val_images)} Bilder ({len(val_images)/total_images*100:.1f}%)")
     
+    # Nur Bildlisten: Split in Millisekunden, kein zusätzlicher Speicher
+    if list_only:
+        unreachable = write_image_lists(output_path, label_path, train_images, val_images)
+        print(f"✅ Bildlisten geschrieben: {output_path / 'train.txt'}, {output_path / 'val.txt'}")
+        if unreachable:
+            print(f"⚠️  {unreachable} Labels liegen nicht dort, wo Ultralytics sie sucht")
+            print("   (…/images/x.jpg → …/labels/x.txt oder x.txt neben dem Bild)")
+        create_dataset_config(output_path, len(train_images), len(val_images),
+                              train_path='train.txt', val_path='val.txt')
+        return True
+    
     # Verzeichnisstruktur erstellen
     splits = ['train', 'val']
     for split in splits:
         (output_path / 'images' / split).mkdir(parents=True, exist_ok=True)
         (output_path / 'labels' / split).mkdir(parents=True, exist_ok=True)
     
-    # Dateien kopieren
+    # Dateien kopieren bzw. verlinken
+    used_modes = {}
+    
     def copy_split(images_list, split_name):
         copied_images = 0
         copied_labels = 0
         
         for img_path in images_list:
-            # Bild kopieren
+            # Bild ablegen
             dest_img = output_path / 'images' / split_name / img_path.name
-            shutil.copy2(img_path, dest_img)
+            used = place_file(img_path, dest_img, link_mode)
+            used_modes[used] = used_modes.get(used, 0) + 1
             copied_images += 1
             
-            # Entsprechendes Label suchen und kopieren
+            # Entsprechendes Label suchen und ablegen
             label_file = img_path.stem + '.txt'
             label_src = label_path / label_file
             
             if label_src.exists():
                 dest_label = output_path / 'labels' / split_name / label_file
-                shutil.copy2(label_src, dest_label)
+                used = place_file(label_src, dest_label, link_mode)
+                used_modes[used] = used_modes.get(used, 0) + 1
                 copied_labels += 1
             else:
                 print(f"⚠️  Label fehlt für: {img_path.name}")
@@ -103,20 +220,25 @@ def split_dataset(image_dir, label_dir, output_dir, train_ratio=0.8, val_ratio=0
     val_imgs, val_lbls = copy_split(val_images, 'val')
     print(f"✅ Validation: {val_imgs} Bilder, {val_lbls} Labels kopiert")
     
+    if link_mode != 'copy':
+        summary = ', '.join(f"{mode}: {count}" for mode, count in sorted(used_modes.items()))
+        print(f"🔗 Ablage-Modus: {summary}")
+    
     # Dataset-Konfiguration erstellen
     create_dataset_config(output_path, train_imgs, val_imgs)
     
     return True
 
-def create_dataset_config(output_dir, train_count, val_count):
+def create_dataset_config(output_dir, train_count, val_count,
+                          train_path='images/train', val_path='images/val'):
     """Erstellt data.yaml Konfigurationsdatei"""
     
     config_content = f"""# Dataset-Konfiguration für YOLO Training
 # Generiert automatisch von split_dataset.py
 
 path: {output_dir.absolute()}  # Dataset-Wurzelverzeichnis
-train: images/train   # Training-Bilder (relativ zu 'path')
-val: images/val       # Validierungs-Bilder (relativ zu 'path')
+train: {train_path}   # Training-Bilder (Verzeichnis oder Bildliste, relativ zu 'path')
+val: {val_path}       # Validierungs-Bilder (Verzeichnis oder Bildliste, relativ zu 'path')
 
 # Statistiken
 train_images: {train_count}
@@ -150,9 +272,19 @@ names:
     print(f"📄 Konfiguration erstellt: {config_path}")
     print("⚠️  WICHTIG: Passen Sie die Klassennamen in data.yaml an!")
 
-def analyze_dataset(image_dir, label_dir):
+def analyze_dataset(image_dir, label_dir, manifest=None):
     """Analysiert ein Dataset und gibt Statistiken aus"""
     
+    if manifest is not None:
+        # Statistiken aus dem Manifest (nur geänderte Dateien werden eingelesen)
+        changes = manifest.update()
+        stats = manifest.statistics()
+        print(f"🗂️  Manifest: +{changes['added']} neu, {changes['changed']} geändert, "
+              f"-{changes['removed']} entfernt")
+        print_dataset_statistics(stats['images'], stats['labels'],
+                                 stats['objects'], stats['class_counts'])
+        return
+    
     image_path = Path(image_dir)
     label_path = Path(label_dir)
     
@@ -178,10 +310,15 @@ def analyze_dataset(image_dir, label_dir):
                     class_counts[class_id] = class_counts.get(class_id, 0) + 1
                     total_objects += 1
     
+    print_dataset_statistics(len(images), len(labels), total_objects, class_counts)
+
+def print_dataset_statistics(image_count, label_count, total_objects, class_counts):
+    """Gibt Dataset-Statistiken aus"""
+    
     print(f"📊 Dataset-Analyse:")
-    print(f"   Bilder: {len(images)}")
-    print(f"   Labels: {len(labels)}")
-    print(f"   Bilder ohne Label: {len(images) - len(labels)}")
+    print(f"   Bilder: {image_count}")
+    print(f"   Labels: {label_count}")
+    print(f"   Bilder ohne Label: {image_count - label_count}")
     print(f"   Objekte gesamt: {total_objects}")
     print(f"   Klassen: {len(class_counts)}")
     
@@ -203,6 +340,12 @@ Beispiele:
   # Custom-Aufteilung 70/30 
   python split_dataset.py images/ labels/ bird_dataset/ --train-ratio 0.7 --val-ratio 0.3
   
+  # Hardlinks/Reflinks statt Kopien (kein zusätzlicher Speicher)
+  python split_dataset.py images/ labels/ bird_dataset/ --link-mode auto
+  
+  # Nur Bildlisten train.txt/val.txt schreiben
+  python split_dataset.py data/images/ data/labels/ bird_dataset/ --list-only
+  
   # Dataset analysieren
   python split_dataset.py images/ labels/ --analyze-only
         """
@@ -219,6 +362,14 @@ Beispiele:
                        help='Random seed (default: 42)')
     parser.add_argument('--analyze-only', action='store_true',
                        help='Nur Dataset-Analyse, keine Aufteilung')
+    parser.add_argument('--link-mode', choices=LINK_MODES, default='copy',
+                       help='Ablage im Ziel: copy, hardlink, reflink, symlink oder '
+                            'auto (reflink → hardlink → copy) (default: copy)')
+    parser.add_argument('--list-only', action='store_true',
+                       help='Nur Ultralytics-Bildlisten (train.txt/val.txt) schreiben')
+    parser.add_argument('--manifest', nargs='?', const='', metavar='PATH',
+                       help='Inkrementelles SQLite-Manifest nutzen: schnelle Analyse und stabile, '
+                            'hash-basierte Aufteilung (default-Pfad: <image_dir>/.dataset_manifest.sqlite)')
     
     args = parser.parse_args()
     
@@ -231,41 +382,50 @@ Beispiele:
         print(f"❌ Label-Verzeichnis nicht gefunden: {args.label_dir}")
         return 1
     
-    # Nur Analyse?
-    if args.analyze_only:
-        analyze_dataset(args.image_dir, args.label_dir)
-        return 0
-    
-    # Output-Verzeichnis erforderlich für Split
-    if not args.output_dir:
-        print("❌ Ausgabe-Verzeichnis erforderlich (außer bei --analyze-only)")
-        return 1
-    
-    # Ratio validieren
-    if args.train_ratio + args.val_ratio > 1.0:
-        print("❌ train_ratio + val_ratio darf nicht > 1.0 sein")
-        return 1
-    
-    # Dataset analysieren
-    print("📊 Analysiere Dataset...")
-    analyze_dataset(args.image_dir, args.label_dir)
-    
-    print(f"\n🔄 Teile Dataset auf...")
-    success = split_dataset(
-        args.image_dir, args.label_dir, args.output_dir,
-        args.train_ratio, args.val_ratio, args.seed
-    )
-    
-    if success:
-        print(f"\n✅ Dataset erfolgreich aufgeteilt in: {args.output_dir}")
-        print("📝 Nächste Schritte:")
-        print("   1. Klassennamen in data.yaml anpassen")
-        print("   2. Training starten mit: python train_bird_model.py")
-    else:
-        print("❌ Fehler beim Aufteilen des Datasets")
-        return 1
+    manifest = None
+    if args.manifest is not None:
+        manifest = DatasetManifest(args.image_dir, args.label_dir, args.manifest or None)
     
-    return 0
+    try:
+        # Nur Analyse?
+        if args.analyze_only:
+            analyze_dataset(args.image_dir, args.label_dir, manifest)
+            return 0
+        
+        # Output-Verzeichnis erforderlich für Split
+        if not args.output_dir:
+            print("❌ Ausgabe-Verzeichnis erforderlich (außer bei --analyze-only)")
+            return 1
+        
+        # Ratio validieren
+        if args.train_ratio + args.val_ratio > 1.0:
+            print("❌ train_ratio + val_ratio darf nicht > 1.0 sein")
+            return 1
+        
+        # Dataset analysieren
+        print("📊 Analysiere Dataset...")
+        analyze_dataset(args.image_dir, args.label_dir, manifest)
+        
+        print(f"\n🔄 Teile Dataset auf...")
+        success = split_dataset(
+            args.image_dir, args.label_dir, args.output_dir,
+            args.train_ratio, args.val_ratio, args.seed,
+            link_mode=args.link_mode, list_only=args.list_only, manifest=manifest
+        )
+        
+        if success:
+            print(f"\n✅ Dataset erfolgreich aufgeteilt in: {args.output_dir}")
+            print("📝 Nächste Schritte:")
+            print("   1. Klassennamen in data.yaml anpassen")
+            print("   2. Training starten mit: python train_bird_model.py")
+        else:
+            print("❌ Fehler beim Aufteilen des Datasets")
+            return 1
+        
+        return 0
+    finally:
+        if manifest:
+            manifest.close()
 
 if __name__ == "__main__":
     exit(main())
\ No newline at end of file
@@ -7,6 +7,7 @@ Verwendet YOLOv8 für das Training eines spezialisierten Vogelarten-Detektors.
 """
 
 import argparse
+import time
 import yaml
 from pathlib import Path
 import torch
@@ -54,6 +55,13 @@ def check_requirements():
     
     return True
 
+def count_images(path):
+    """Zählt Bilder in einem Verzeichnis oder Einträge einer Bildliste (.txt)"""
+    if path.is_file():
+        with open(path, 'r', encoding='utf-8') as f:
+            return sum(1 for line in f if line.strip())
+    return len(list(path.glob('*.jpg'))) + len(list(path.glob('*.png')))
+
 def load_dataset_config(config_path):
     """Lädt und validiert Dataset-Konfiguration"""
     
@@ -86,9 +94,9 @@ def load_dataset_config(config_path):
             print(f"❌ Validierungs-Pfad nicht gefunden: {val_path}")
             return None
         
-        # Bilder zählen
-        train_images = len(list(train_path.glob('*.jpg'))) + len(list(train_path.glob('*.png')))
-        val_images = len(list(val_path.glob('*.jpg'))) + len(list(val_path.glob('*.png')))
+        # Bilder zählen (Verzeichnis oder Ultralytics-Bildliste)
+        train_images = count_images(train_path)
+        val_images = count_images(val_path)
         
         print(f"📊 Dataset-Info:")
         print(f"   Klassen: {config['nc']}")
@@ -148,6 +156,22 @@ def train_bird_model(config_path, **training_args):
     print(f"   Device: {device}")
     print(f"   Experiment: {experiment_name}")
     
+    # Optional: vorskalierter Memmap-Cache statt JPEG-Dekodierung pro Epoche
+    trainer = None
+    use_image_cache = training_args.get('image_cache', False)
+    if use_image_cache:
+        from image_cache import build_cache, collect_dataset_images, default_cache_dir, make_cached_trainer
+        cache_dir = training_args.get('cache_dir') or default_cache_dir(config_path)
+        cache = build_cache(collect_dataset_images(config_path), cache_dir, imgsz)
+        trainer = make_cached_trainer(cache)
+    print(f"   Bild-Cache: {'Memmap' if use_image_cache else 'aus'}")
+    
+    # Epochen-Dauer messen (Vergleich mit/ohne Bild-Cache)
+    epoch_times = []
+    epoch_start = {}
+    model.add_callback("on_train_epoch_start", lambda t: epoch_start.update(t=time.time()))
+    model.add_callback("on_train_epoch_end", lambda t: epoch_times.append(time.time() - epoch_start['t']))
+    
     try:
         # Training starten
         results = model.train(
@@ -165,10 +189,15 @@ def train_bird_model(config_path, **training_args):
             workers=training_args.get('workers', 4),
             optimizer=training_args.get('optimizer', 'auto'),
             lr0=training_args.get('learning_rate', 0.01),
-            weight_decay=training_args.get('weight_decay', 0.0005)
+            weight_decay=training_args.get('weight_decay', 0.0005),
+            trainer=trainer
         )
         
         print("✅ Training erfolgreich abgeschlossen!")
+        if epoch_times:
+            mean_epoch = sum(epoch_times) / len(epoch_times)
+            print(f"⏱️  Ø Epochen-Dauer: {mean_epoch:.1f}s "
+                  f"({'mit' if use_image_cache else 'ohne'} Bild-Cache, {len(epoch_times)} Epochen)")
         
         # Modell-Info
         best_model_path = Path(project_name) / experiment_name / 'weights' / 'best.pt'
@@ -200,6 +229,9 @@ Beispiele:
   
   # High-Quality Training
   python train_bird_model.py data.yaml --epochs 200 --model-size s --batch-size 8
+  
+  # CPU-Training mit vorskaliertem Bild-Cache
+  python train_bird_model.py data.yaml --image-cache --imgsz 640
         """
     )
     
@@ -224,6 +256,10 @@ Beispiele:
                        help='Initiale Lernrate (default: 0.01)')
     parser.add_argument('--optimizer', choices=['SGD', 'Adam', 'AdamW', 'auto'], default='auto',
                        help='Optimizer (default: auto)')
+    parser.add_argument('--image-cache', action='store_true',
+                       help='Bilder einmalig vorskalieren und per Memmap laden (siehe image_cache.py)')
+    parser.add_argument('--cache-dir',
+                       help='Verzeichnis für den Bild-Cache (default: .image_cache/ neben data.yaml)')
     parser.add_argument('--check-only', action='store_true',
                        help='Nur Requirements und Dataset prüfen, nicht trainieren')
     
@@ -256,7 +292,9 @@ Beispiele:
         patience=args.patience,
         workers=args.workers,
         learning_rate=args.learning_rate,
-        optimizer=args.optimizer
+        optimizer=args.optimizer,
+        image_cache=args.image_cache,
+        cache_dir=args.cache_dir
     )
     
     return 0 if success else 1
@@ -19,6 +19,12 @@ if [ ! -f "$VENV_PYTHON" ]; then
     exit 1
 fi
 
+# Optionale kurze GOP für Keyframe-Decode im Leerlauf (z.B. STREAM_GOP=5 ./run-auto-trigger.sh --idle-keyframes)
+STREAM_ARGS=""
+if [ -n "$STREAM_GOP" ]; then
+    STREAM_ARGS=" --gop $STREAM_GOP"
+fi
+
 # Prüfe Preview-Stream und starte automatisch falls nötig
 echo -n "🔍 Prüfe Preview-Stream... "
 if ssh -i ~/.ssh/id_rsa_ai-had roimme@raspberrypi-5-ai-had './start-rtsp-stream.sh --status' > /dev/null 2>&1; then
@@ -26,7 +32,7 @@ if ssh -i ~/.ssh/id_rsa_ai-had roimme@raspberrypi-5-ai-had './start-rtsp-stream.
 else
     echo "⚠️  läuft nicht"
     echo -n "🚀 Starte Stream automatisch... "
-    if ssh -i ~/.ssh/id_rsa_ai-had roimme@raspberrypi-5-ai-had 'nohup ./start-rtsp-stream.sh > /dev/null 2>&1 &' && sleep 3; then
+    if ssh -i ~/.ssh/id_rsa_ai-had roimme@raspberrypi-5-ai-had "nohup ./start-rtsp-stream.sh$STREAM_ARGS > /dev/null 2>&1 &" && sleep 3; then
         if ssh -i ~/.ssh/id_rsa_ai-had roimme@raspberrypi-5-ai-had './start-rtsp-stream.sh --status' > /dev/null 2>&1; then
             echo "✅ gestartet"
         else
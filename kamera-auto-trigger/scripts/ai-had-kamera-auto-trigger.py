@@ -22,10 +22,19 @@ Verwendung:
 """
 
 # CPU-Optimierung: Begrenze Thread-Nutzung für AI-Inferenz
+# Thread-Anzahl aus Inferenz-Profil (inference_tuner.py), sonst 2
 import os
-os.environ['OMP_NUM_THREADS'] = '2'  # OpenMP auf 2 Threads begrenzen
-os.environ['OPENBLAS_NUM_THREADS'] = '2'  # OpenBLAS auf 2 Threads begrenzen
-os.environ['MKL_NUM_THREADS'] = '2'  # Intel MKL auf 2 Threads begrenzen
+import json
+try:
+    _profile_file = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                 '..', '..', 'config', 'inference_profile.json')
+    with open(_profile_file, 'r', encoding='utf-8') as _f:
+        _inference_threads = str(int(json.load(_f).get('threads') or 2))
+except (OSError, ValueError):
+    _inference_threads = '2'
+os.environ['OMP_NUM_THREADS'] = _inference_threads  # OpenMP-Threads begrenzen
+os.environ['OPENBLAS_NUM_THREADS'] = _inference_threads  # OpenBLAS-Threads begrenzen
+os.environ['MKL_NUM_THREADS'] = _inference_threads  # Intel MKL-Threads begrenzen
 
 import paramiko
 from scp import SCPClient
@@ -48,12 +57,15 @@ python_skripte_dir = os.path.join(project_root, 'python-skripte')
 sys.path.insert(0, python_skripte_dir)
 
 from config import config
+from recorder import VideoRecorder, SlowMotionRecorder
+from transfer_scheduler import TransferScheduler, MBIT
 __version__ = "1.2.0"  # Setzen Sie hier die aktuelle Version ein
 
 # Import StreamProcessor aus gleichem Verzeichnis
 try:
     sys.path.insert(0, script_dir)
     from stream_processor import StreamProcessor
+    from motion_vectors import parse_roi
     HAS_STREAM_PROCESSOR = True
 except ImportError:
     HAS_STREAM_PROCESSOR = False
@@ -70,6 +82,9 @@ trigger_count = 0
 last_trigger_time = None
 start_time = datetime.now()
 stream_processor = None  # StreamProcessor-Instanz
+recorder = None  # Recorder-Instanz (eine Agent-Sitzung für alle Aufnahmen)
+scheduler = None  # Transfer-Scheduler (drosselt Kopien zugunsten des Preview-Streams)
+pending_collects = []  # Aufnahmen, deren Dateien im Hintergrund kopiert werden
 monitoring_paused = False  # Flag zum Pausieren der Status-Reports während Aufnahme
 
 # Tracking für anhaltende Last-Probleme
@@ -100,6 +115,21 @@ parser = argparse.ArgumentParser(
 
 parser.add_argument('--version', action='version', version=f'Vogel-Kamera-Linux Auto-Trigger v{__version__}')
 parser.add_argument('--trigger-duration', type=int, default=2, help='Aufnahmedauer bei Vogel-Erkennung in Minuten (default: 2)')
+parser.add_argument('--event-recording', action='store_true',
+                    help='Aufnahme endet, wenn der Vogel weg ist (--trigger-duration ist dann die Maximallänge)')
+parser.add_argument('--min-length', type=int, default=15, help='Mindestlänge im Ereignis-Modus in Sekunden (default: 15)')
+parser.add_argument('--post-roll', type=int, default=5, help='Nachlauf nach der letzten Aktivität in Sekunden (default: 5)')
+parser.add_argument('--segment-length', type=int,
+                    help='HD-Aufnahme in Segmente dieser Länge (Sekunden) teilen, Transfer und Remux laufen schon während der Aufnahme')
+parser.add_argument('--fragmented-mp4', action='store_true',
+                    help='HD-Aufnahme als fragmentiertes MP4 schon während der Aufnahme schreiben (abspielbar auch nach Abbruch, benötigt PyAV)')
+parser.add_argument('--background-transfer', action='store_true',
+                    help='Aufnahme-Dateien erst nach dem Neustart des Preview-Streams im Hintergrund kopieren '
+                         '(gedrosselt, pausiert während ein Vogel erkannt wird)')
+parser.add_argument('--transfer-limit', type=float,
+                    help='Feste Übertragungsrate für Kopien in Mbit/s (default: aus Durchsatz-Messung)')
+parser.add_argument('--delete-remote', action='store_true',
+                    help='Kopierte Dateien auf dem Raspberry Pi löschen, sobald ihre SHA-256-Prüfsumme übereinstimmt')
 parser.add_argument('--ai-model', type=str, default='bird-species', choices=['yolov8', 'bird-species', 'custom'], 
                     help='AI-Modell für Vogel-Erkennung (default: bird-species)')
 parser.add_argument('--ai-model-path', type=str, help='Pfad zu benutzerdefiniertem AI-Modell (für --ai-model custom)')
@@ -113,6 +143,28 @@ parser.add_argument('--cooldown', type=int, default=30, help='Wartezeit zwischen
 parser.add_argument('--trigger-threshold', type=float, default=0.50, help='AI-Schwelle für Trigger (default: 0.40, CPU-optimierter Kompromiss)')
 parser.add_argument('--preview-fps', type=int, default=5, help='FPS für Monitoring-Modus (default: 5, CPU-optimierter Kompromiss)')
 parser.add_argument('--preview-width', type=int, default=640, help='Breite für Monitoring-Vorschau (default: 640, CPU-optimierter Kompromiss)')
+parser.add_argument('--detect-interval', type=int, default=1,
+                    help='Volle AI-Inferenz nur jedes N-te Frame während ein Vogel verfolgt wird (default: 1 = jedes Frame)')
+parser.add_argument('--tracker', type=str, default='template', choices=['template', 'kcf', 'csrt', 'mil'],
+                    help='Tracker zwischen den Inferenzen bei --detect-interval > 1 (default: template)')
+parser.add_argument('--cascade-model', type=str,
+                    help='Zweitmodell für Kaskade (z.B. yolov8s.pt): Hauptmodell screent, nur unsichere Frames gehen an Stufe 2')
+parser.add_argument('--cascade-band', type=float, nargs=2, default=[0.25, 0.70], metavar=('LOW', 'HIGH'),
+                    help='Unsicheres Konfidenz-Band der Screening-Stufe (default: 0.25 0.70)')
+parser.add_argument('--screen-imgsz', type=int, default=320, help='Eingabegröße der Screening-Stufe (default: 320)')
+parser.add_argument('--motion-gate', type=float,
+                    help='YOLO im Leerlauf überspringen, wenn weniger als dieser ROI-Anteil laut H.264-Bewegungsvektoren bewegt ist (z.B. 0.01, benötigt PyAV)')
+parser.add_argument('--motion-roi', type=str, default='0,0,1,1',
+                    help='ROI für Bewegungs-Score als x1,y1,x2,y2 relativ (default: 0,0,1,1)')
+parser.add_argument('--idle-keyframes', action='store_true',
+                    help='Im Leerlauf nur Keyframes dekodieren, bei Aktivität voller Decode (benötigt PyAV, startet Stream mit kurzer GOP)')
+parser.add_argument('--stream-gop', type=int,
+                    help='Keyframe-Abstand des Preview-Streams in Frames (default: bei --idle-keyframes = --preview-fps)')
+parser.add_argument('--pixel-format', type=str, default='BGR', choices=['BGR', 'GRAY8'],
+                    help='Ausgabeformat der Decoder-Pipeline (default: BGR)')
+parser.add_argument('--decode-threads', type=int, default=0, help='H.264-Decoder-Threads (default: 0 = automatisch)')
+parser.add_argument('--stall-timeout', type=float, default=5.0,
+                    help='Sekunden ohne Frame bis zum automatischen Reconnect des Preview-Streams (default: 5)')
 parser.add_argument('--preview-height', type=int, default=480, help='Höhe für Monitoring-Vorschau (default: 480, CPU-optimierter Kompromiss)')
 parser.add_argument('--max-cpu-temp', type=float, default=70.0, help='Maximale CPU-Temperatur in °C (default: 70)')
 parser.add_argument('--max-cpu-load', type=float, default=5.0, help='Maximale CPU-Load (default: 5.0)')
@@ -155,7 +207,7 @@ print(f"""
   Modus: Automatische Vogel-Erkennung
   Trigger-KI: {args.ai_model}
   Aufnahme-Modus: {recording_mode}{recording_model}
-  Trigger-Dauer: {args.trigger_duration} Minuten
+  Trigger-Dauer: {args.trigger_duration} Minuten{' (max., Ereignis-Modus)' if args.event_recording else ''}
   Cooldown: {args.cooldown} Sekunden
   Schwelle: {args.trigger_threshold}
 ╚══════════════════════════════════════════════════════════════╝
@@ -307,18 +359,65 @@ def check_for_bird_detection():
         # Gibt immer False zurück wenn kein StreamProcessor verfügbar
         return False
 
+def stream_start_args():
+    """Zusatz-Argumente für start-rtsp-stream.sh (kurze GOP für Keyframe-Decode)"""
+    gop = args.stream_gop or (args.preview_fps if args.idle_keyframes else None)
+    return ["--gop", str(gop)] if gop else []
+
+def create_recorder():
+    """Erzeugt den Recorder für den gewählten Aufnahme-Modus (Priorität: Zeitlupe > AI > Standard)"""
+    if args.recording_slowmo:
+        # ZEITLUPE: feste Auflösung und 120fps für Performance
+        return SlowMotionRecorder(rotation=args.rotation, cam=args.cam, remote_host=remote_host,
+                                  event_mode=args.event_recording, min_length=args.min_length,
+                                  post_roll=args.post_roll, scheduler=scheduler,
+                                  delete_remote=args.delete_remote)
+    return VideoRecorder(
+        width=args.width,
+        height=args.height,
+        rotation=args.rotation,
+        cam=args.cam,
+        ai_model=args.recording_ai_model if args.recording_ai else None,
+        ai_model_path=args.ai_model_path,
+        event_mode=args.event_recording,
+        min_length=args.min_length,
+        post_roll=args.post_roll,
+        segment_length=args.segment_length,
+        fragmented=args.fragmented_mp4,
+        remote_host=remote_host,
+        scheduler=scheduler,
+        delete_remote=args.delete_remote
+    )
+
+def stop_preview_stream():
+    """Stoppt Wrapper (der rpicam-vid automatisch neu startet) UND rpicam-vid selbst"""
+    agent = recorder.ensure_connected()
+    agent.kill_processes(["stream-wrapper.sh", "rpicam-vid"])
+    agent.remove_files(["/tmp/rtsp-stream.pid"])
+
+def restart_preview_stream():
+    """Startet den Preview-Stream auf dem Raspberry Pi neu (für den Stall-Watchdog)"""
+    stop_preview_stream()
+    time.sleep(2)
+    recorder.restart_preview_stream(stream_start_args())
+    # rpicam-vid braucht ~5-8 Sekunden für Init
+    time.sleep(8)
+
 def trigger_recording():
-    """Starte HD-Aufnahme auf Remote-Host"""
+    """Starte HD-Aufnahme auf Remote-Host (im eigenen Prozess über den Recorder)"""
     global trigger_count, last_trigger_time, stream_processor, monitoring_paused
     
-    timestamp = datetime.now().strftime("%A__%Y-%m-%d__%H-%M-%S")
-    year = datetime.now().year
-    week_number = datetime.now().isocalendar()[1]
-    
     # Pausiere Status-Reports während Aufnahme (reduziert System-Last)
     monitoring_paused = True
-    print(f"\n🎬 TRIGGER! Starte {args.trigger_duration}-minütige Aufnahme...")
-    print(f"   Zeitstempel: {timestamp}")
+    if args.event_recording:
+        print(f"\n🎬 TRIGGER! Starte Ereignis-Aufnahme (max. {args.trigger_duration} Minuten)...")
+    else:
+        print(f"\n🎬 TRIGGER! Starte {args.trigger_duration}-minütige Aufnahme...")
+    print(f"   Zeitpunkt: {datetime.now().strftime('%A__%Y-%m-%d__%H-%M-%S')}")
+    # Erkennungs-Zusammenfassung für den Archiv-Index
+    trigger = stream_processor.last_trigger if stream_processor else None
+    if trigger and trigger['confidence'] is not None:
+        print(f"   Konfidenz: {trigger['confidence']:.2f} ({trigger['detection_frames']} Frames mit Vogel)")
     print(f"   ⏸️  Status-Reports pausiert während Aufnahme")
     
     try:
@@ -329,100 +428,50 @@ def trigger_recording():
             
             # Stoppe Stream-Prozess auf Raspberry Pi (inkl. Wrapper!)
             try:
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh.connect(remote_host['hostname'], username=remote_host['username'], 
-                           key_filename=remote_host['key_filename'], timeout=5)
-                # Stoppe Wrapper (der rpicam-vid automatisch neu startet)
-                # UND rpicam-vid selbst
-                ssh.exec_command("pkill -9 -f stream-wrapper.sh; pkill -9 -f rpicam-vid; rm -f /tmp/rtsp-stream.pid")
-                ssh.close()
+                stop_preview_stream()
                 time.sleep(2)  # Warte bis Prozesse sicher beendet sind
                 print("   ✅ Preview-Stream auf Raspberry Pi gestoppt")
             except Exception as e:
                 print(f"   ⚠️  Konnte Stream auf Raspberry Pi nicht stoppen: {e}")
         
-        # Wähle das richtige Recording-Skript basierend auf Modus (Priorität: Zeitlupe > AI > Standard)
-        script_dir = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
-        
         if args.recording_slowmo:
-            # ZEITLUPE: Nutze Zeitlupen-Skript (120fps, 1536x864)
             print(f"   🎬 Modus: Zeitlupen-Aufnahme (120fps, 1536x864)")
-            
-            recording_script = os.path.join(script_dir, 'python-skripte', 'ai-had-kamera-remote-param-vogel-libcamera-zeitlupe.py')
-            
-            cmd = [
-                'python3',
-                recording_script,
-                '--duration', str(args.trigger_duration),
-                '--width', '1536',  # Zeitlupe: feste Auflösung für Performance
-                '--height', '864',
-                '--fps', '120',     # Zeitlupe: 120fps
-                '--rotation', str(args.rotation),
-                '--cam', str(args.cam),
-                '--slowmotion'      # Aktiviere Zeitlupen-Flag
-            ]
+        elif args.recording_ai:
+            print(f"   🤖 Modus: Aufnahme MIT KI ({args.recording_ai_model})")
         else:
-            # Standard oder AI: Nutze AI-Modul-Skript
-            recording_script = os.path.join(script_dir, 'python-skripte', 'ai-had-kamera-remote-param-vogel-libcamera-single-AI-Modul.py')
-            
-            if args.recording_ai:
-                # MIT KI: Objekterkennung während Aufnahme
-                print(f"   🤖 Modus: Aufnahme MIT KI ({args.recording_ai_model})")
-                
-                cmd = [
-                    'python3',
-                    recording_script,
-                    '--duration', str(args.trigger_duration),
-                    '--width', str(args.width),
-                    '--height', str(args.height),
-                    '--rotation', str(args.rotation),
-                    '--cam', str(args.cam),
-                    '--ai-modul', 'on',
-                    '--ai-model', args.recording_ai_model,
-                    '--no-stream-restart'  # Auto-Trigger managed Stream-Neustart selbst
-                ]
-                
-                if args.recording_ai_model == 'custom' and args.ai_model_path:
-                    cmd.extend(['--ai-model-path', args.ai_model_path])
-            else:
-                # OHNE KI: Nur Video-Aufnahme (schneller, weniger CPU-Last)
-                print(f"   📹 Modus: Aufnahme OHNE KI (nur Video)")
-                
-                cmd = [
-                    'python3',
-                    recording_script,
-                    '--duration', str(args.trigger_duration),
-                    '--width', str(args.width),
-                    '--height', str(args.height),
-                    '--rotation', str(args.rotation),
-                    '--cam', str(args.cam),
-                '--ai-modul', 'off',  # KI deaktiviert = nur Video
-                '--no-stream-restart'  # Auto-Trigger managed Stream-Neustart selbst
-            ]
+            print(f"   📹 Modus: Aufnahme OHNE KI (nur Video)")
         
-        # Führe Aufnahme-Skript aus
-        result = subprocess.run(cmd, capture_output=False, text=True)
+        # Unbeaufsichtigt: Warnungen nur protokollieren (Last-Abbruch übernimmt der Ressourcen-Monitor)
+        if not recorder.check_readiness():
+            print("   ⚠️  Aufnahme wird trotzdem gestartet (Auto-Trigger)")
         
-        if result.returncode == 0:
+        # Aufnahme im eigenen Prozess (bestehende Agent-Sitzung, kein neuer Interpreter).
+        # Laufende Hintergrund-Kopien ruhen währenddessen.
+        if scheduler:
+            scheduler.defer("recording")
+        try:
+            result = recorder.capture(args.trigger_duration * 60)
+        finally:
+            if scheduler:
+                scheduler.resume("recording")
+        result["trigger"] = trigger
+        
+        if background_transfer():
+            # Kopieren erst nach dem Neustart des Preview-Streams (gedrosselt)
             trigger_count += 1
             last_trigger_time = datetime.now()
-            print(f"✅ Aufnahme #{trigger_count} erfolgreich abgeschlossen")
+            print(f"✅ Aufnahme #{trigger_count} beendet ({result['length_s']:.0f}s) - Dateien werden im Hintergrund kopiert")
+            worker = threading.Thread(target=collect_in_background, args=(result, trigger_count), daemon=True)
+            pending_collects.append((worker, result))
+            worker.start()
         else:
-            print(f"❌ Fehler bei Aufnahme: Exit Code {result.returncode}")
+            report_result(recorder.collect(result))
         
         # Stream wieder starten und verbinden nach Aufnahme
         if stream_processor:
             print("   📡 Starte Preview-Stream auf Raspberry Pi neu...")
             try:
-                # Starte Stream-Skript auf Raspberry Pi neu
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh.connect(remote_host['hostname'], username=remote_host['username'], 
-                           key_filename=remote_host['key_filename'], timeout=5)
-                # Starte Stream im Hintergrund mit bash -c für persistente Ausführung
-                ssh.exec_command("bash -c 'nohup ~/start-rtsp-stream.sh > /tmp/stream-restart.log 2>&1 & disown'")
-                ssh.close()
+                recorder.restart_preview_stream(stream_start_args())
                 print("   ✅ Preview-Stream-Start initiiert")
                 
                 # Warte bis Stream bereit ist (rpicam-vid braucht ~5-8 Sekunden für Init)
@@ -452,13 +501,7 @@ def trigger_recording():
         if stream_processor:
             print("   📡 Versuche Preview-Stream neu zu starten...")
             try:
-                ssh = paramiko.SSHClient()
-                ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-                ssh.connect(remote_host['hostname'], username=remote_host['username'], 
-                           key_filename=remote_host['key_filename'], timeout=5)
-                # Nutze bash -c mit disown für persistente Ausführung
-                ssh.exec_command("bash -c 'nohup ~/start-rtsp-stream.sh > /tmp/stream-restart.log 2>&1 & disown'")
-                ssh.close()
+                recorder.restart_preview_stream(stream_start_args())
                 time.sleep(8)  # Warte länger bei Fehler-Recovery
                 stream_processor.connect()
             except:
@@ -472,6 +515,39 @@ def trigger_recording():
         monitoring_paused = False
         print("   ▶️  Status-Reports wieder aktiv\n")
 
+def background_transfer():
+    """Kopieren im Hintergrund nur ohne Transfers während der Aufnahme (Segmente/fragmentiertes MP4)"""
+    return args.background_transfer and not args.segment_length and not args.fragmented_mp4
+
+def report_result(result, number=None):
+    """Gibt das Ergebnis einer Aufnahme aus"""
+    global trigger_count, last_trigger_time
+    
+    if number is None and result["success"]:
+        trigger_count += 1
+        last_trigger_time = datetime.now()
+        number = trigger_count
+    if result["success"]:
+        print(f"✅ Aufnahme #{number} erfolgreich abgeschlossen ({result['length_s']:.0f}s)")
+        for output_file in result["output_files"]:
+            print(f"   📁 {output_file}")
+    elif result.get("missing_files") and result["output_files"]:
+        print(f"⚠️  Aufnahme unvollständig: {len(result['missing_files'])} Teil(e) fehlen, Sync-Dienst holt sie nach")
+        for output_file in result["output_files"]:
+            print(f"   📁 {output_file}")
+    else:
+        print(f"❌ Fehler bei Aufnahme: {result['local_path']}")
+
+def collect_in_background(result, number):
+    """Kopiert und verarbeitet eine Aufnahme, während die Überwachung weiterläuft"""
+    try:
+        report_result(recorder.collect(result), number)
+    except Exception as e:
+        print(f"❌ Fehler beim Kopieren von Aufnahme #{number}: {e}")
+        recorder.enqueue_result(result)
+    finally:
+        pending_collects[:] = [(w, r) for w, r in pending_collects if r is not result]
+
 def print_status_report():
     """Gebe Status-Report aus"""
     global trigger_count, last_trigger_time, start_time
@@ -525,6 +601,18 @@ def print_status_report():
         if not status['healthy'] or (local_status and not local_status['healthy']):
             print(f"\n⚠️  WARNUNG: System-Ressourcen kritisch!")
     
+    # Kopien zum Client
+    if scheduler:
+        transfers = scheduler.get_statistics()
+        print(f"\n📦 Transfers:")
+        print(f"   Laufend: {transfers['transfers']} ({transfers['bytes_in_flight'] / 1024 / 1024:.1f} MB offen), "
+              f"gesamt {transfers['total_bytes'] / 1024 / 1024:.1f} MB")
+        print(f"   Rate: {transfers['achieved_mbit']:.1f} / {transfers['rate_mbit']:.1f} Mbit/s erlaubt")
+        if transfers['deferred']:
+            print(f"   ⏸️  Pausiert: {', '.join(transfers['deferred'])}")
+        if transfers['latency_ms'] is not None:
+            print(f"   📶 Latenz: {transfers['latency_ms']:.1f}ms (Leerlauf {transfers['idle_latency_ms']:.1f}ms)")
+    
     print(f"{'='*70}\n")
 
 def resource_monitor():
@@ -661,6 +749,9 @@ def monitoring_loop():
             # PLACEHOLDER: Prüfe auf Vogel-Erkennung
             # In echter Implementierung: AI-Analyse auf Preview-Stream
             bird_detected = check_for_bird_detection()
+            # Kopien pausieren, solange ein Vogel verfolgt wird
+            if scheduler:
+                scheduler.note_detection(bird_detected)
             
             if bird_detected:
                 print(f"🐦 Vogel erkannt!")
@@ -681,7 +772,7 @@ def monitoring_loop():
 
 def shutdown():
     """Sauberes Beenden"""
-    global running, stream_processor
+    global running, stream_processor, recorder
     
     print("\n\n🛑 Beende Auto-Trigger...")
     running = False
@@ -698,22 +789,49 @@ def shutdown():
         stats = stream_processor.get_statistics()
         print(f"   Frames verarbeitet: {stats['frames_processed']}")
         print(f"   Vögel erkannt: {stats['birds_detected']}")
+        if stats['stalls'] > 0:
+            print(f"   Stream-Ausfälle: {stats['stalls']} (Ø Wiederherstellung {stats['avg_time_to_recover'] or 0:.1f}s, "
+                  f"max {stats['max_time_to_recover'] or 0:.1f}s, {stats['remote_restarts']} Remote-Neustarts)")
+        if stats['avg_read_time'] > 0:
+            print(f"   Ø Frame-Kosten ({stats['capture_backend']}, {stats['output_size'][0]}x{stats['output_size'][1]}): "
+                  f"{stats['avg_read_time']*1000:.1f}ms")
         if stats['avg_inference_time'] > 0:
             print(f"   Ø Inferenz-Zeit: {stats['avg_inference_time']*1000:.1f}ms")
+        if stats['tracked_frames'] > 0:
+            print(f"   Inferenzen: {stats['inference_calls']} (getrackt: {stats['tracked_frames']} Frames)")
+        if stats['motion_skipped'] > 0:
+            print(f"   Ohne Bewegung übersprungen: {stats['motion_skipped']} Frames")
+        if stats['decoder']:
+            for mode, dec in stats['decoder'].items():
+                if dec['frames'] > 0:
+                    label = 'voll' if mode == 'full' else 'Keyframes'
+                    print(f"   Decoder ({label}): {dec['frames']} Frames, {dec['cpu_ms_per_frame']:.1f}ms Prozess-CPU/Frame, "
+                          f"{dec['cpu_load'] * 100:.1f}% Prozess-CPU")
+        cascade = stats['cascade']
+        if cascade and cascade['screened'] > 0:
+            print(f"   Kaskade: {cascade['screen_positive_rate']*100:.0f}% sicher positiv, "
+                  f"{cascade['screen_negative_rate']*100:.0f}% sicher negativ, "
+                  f"{cascade['ambiguous_rate']*100:.0f}% Stufe 2 ({cascade['stage2_positive_rate']*100:.0f}% davon positiv)")
+            print(f"   Ø Kosten/Frame: {cascade['mean_cost_ms']:.1f}ms "
+                  f"(Screen {cascade['mean_screen_ms']:.1f}ms, Stufe 2 {cascade['mean_stage2_ms']:.1f}ms)")
+    
+    # Nicht fertig kopierte Aufnahmen dem Sync-Dienst überlassen
+    if recorder and pending_collects:
+        print(f"📦 {len(pending_collects)} Aufnahme(n) noch nicht kopiert - Eintrag für den Sync-Dienst")
+        for _, result in list(pending_collects):
+            recorder.enqueue_result(result)
     
     # Beende alle Remote-Prozesse
-    try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(remote_host['hostname'], username=remote_host['username'], 
-                   key_filename=remote_host['key_filename'], timeout=10)
-        
-        ssh.exec_command("pkill -f rpicam-vid")
-        ssh.exec_command("pkill -f arecord")
-        ssh.close()
-        print("✅ Remote-Prozesse beendet")
-    except Exception as e:
-        print(f"⚠️ Fehler beim Beenden der Remote-Prozesse: {e}")
+    if recorder:
+        recorder.stop()
+        try:
+            if not recorder.recording:
+                recorder.ensure_connected().kill_processes(["rpicam-vid", "arecord"], signal_name="TERM")
+            # Beim Schließen der Sitzung beendet der Agent noch laufende Aufnahmen selbst
+            recorder.close()
+            print("✅ Remote-Prozesse beendet")
+        except Exception as e:
+            print(f"⚠️ Fehler beim Beenden der Remote-Prozesse: {e}")
     
     print("\n👋 Auto-Trigger sauber beendet. Auf Wiedersehen!")
     sys.exit(0)
@@ -728,20 +846,29 @@ signal.signal(signal.SIGTERM, signal_handler)
 
 def main():
     """Hauptfunktion"""
-    global monitoring_thread, stream_processor
+    global monitoring_thread, stream_processor, recorder, scheduler
     
-    # Prüfe Verbindung zum Remote-Host
+    # Prüfe Verbindung zum Remote-Host (Agent-Sitzung bleibt für alle Aufnahmen offen)
     try:
-        ssh = paramiko.SSHClient()
-        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
-        ssh.connect(remote_host['hostname'], username=remote_host['username'], 
-                   key_filename=remote_host['key_filename'], timeout=10)
-        ssh.close()
+        # Drosseln nur für Hintergrund-Kopien oder feste Rate - die Kopie direkt
+        # nach der Aufnahme läuft ohne Preview-Stream und bleibt ungedrosselt
+        if background_transfer() or args.transfer_limit:
+            scheduler = TransferScheduler(remote_host['hostname'], preview_kbit=1000, rate_mbit=args.transfer_limit)
+        recorder = create_recorder()
+        agent = recorder.ensure_connected()
         print(f"✅ Verbindung zu {remote_host['hostname']} erfolgreich\n")
     except Exception as e:
         print(f"❌ Keine Verbindung zu {remote_host['hostname']}: {e}")
         sys.exit(1)
     
+    if background_transfer() and not args.transfer_limit:
+        print("📶 Messe Durchsatz für Hintergrund-Kopien...")
+        try:
+            probe = scheduler.probe(agent.ssh)
+            print(f"   {probe.get('throughput_mbit', 0):.1f} Mbit/s gemessen → Kopien mit {probe['rate_mbit']:.1f} Mbit/s\n")
+        except Exception as e:
+            print(f"   ⚠️  Messung fehlgeschlagen ({e}) - starte mit {scheduler.bucket.rate / MBIT:.1f} Mbit/s\n")
+    
     # Initialisiere StreamProcessor wenn verfügbar
     if HAS_STREAM_PROCESSOR:
         print("🎬 Initialisiere Stream-Verarbeitung...")
@@ -755,7 +882,21 @@ def main():
             height=args.preview_height,
             fps=args.preview_fps,
             trigger_duration=1.0,  # Vogel muss 1 Sekunde erkannt werden für Trigger
-            debug=False
+            debug=False,
+            detect_interval=args.detect_interval,
+            tracker_type=args.tracker,
+            cascade_model=args.cascade_model,
+            screen_imgsz=args.screen_imgsz,
+            cascade_low=args.cascade_band[0],
+            cascade_high=args.cascade_band[1],
+            decoder='pyav' if args.motion_gate is not None else 'opencv',
+            motion_gate=args.motion_gate,
+            motion_roi=parse_roi(args.motion_roi),
+            idle_keyframes=args.idle_keyframes,
+            pixel_format=args.pixel_format,
+            decode_threads=args.decode_threads,
+            stall_timeout=args.stall_timeout,
+            restart_callback=restart_preview_stream
         )
         
         # Verbinde mit Preview-Stream
@@ -0,0 +1,180 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Box-Tracker für Detect-then-Track
+=================================
+
+Führt die Bounding-Boxes der letzten YOLO-Erkennung über die folgenden
+Frames weiter, damit der StreamProcessor nur jedes N-te Frame (oder bei
+verlorenem Tracking) eine volle Inferenz braucht.
+
+Tracker-Typen:
+- template: Normierte Kreuzkorrelation im Suchfenster (OpenCV-Core, liefert Score)
+- kcf / csrt / mil: OpenCV-Tracker (benötigt ggf. opencv-contrib-python)
+
+Verwendung:
+    from bird_tracker import BoxTracker
+
+    tracker = BoxTracker("template", min_confidence=0.6)
+    tracker.start(frame, detections)
+    ok, detections = tracker.update(next_frame)
+"""
+
+import cv2
+import numpy as np
+from typing import List, Dict, Any, Tuple, Optional
+
+TRACKER_TYPES = ("template", "kcf", "csrt", "mil")
+
+
+def _create_cv_tracker(kind: str) -> Optional[Any]:
+    """Erzeugt einen OpenCV-Tracker (neue oder legacy API)."""
+    name = f"Tracker{kind.upper()}_create"
+    for module in (cv2, getattr(cv2, "legacy", None)):
+        factory = getattr(module, name, None) if module is not None else None
+        if factory is not None:
+            return factory()
+    return None
+
+
+def _to_gray(frame: np.ndarray) -> np.ndarray:
+    """Graustufen für den Template-Tracker (GRAY8-Frames unverändert)."""
+    return frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+
+def _clip_box(box: List[int], width: int, height: int) -> List[int]:
+    x1, y1, x2, y2 = box
+    x1 = max(0, min(int(x1), width - 1))
+    y1 = max(0, min(int(y1), height - 1))
+    x2 = max(x1 + 1, min(int(x2), width))
+    y2 = max(y1 + 1, min(int(y2), height))
+    return [x1, y1, x2, y2]
+
+
+class _TemplateTrack:
+    """Verfolgt eine Box per Template-Matching in einem Suchfenster."""
+
+    def __init__(self, gray: np.ndarray, box: List[int], search_margin: float):
+        x1, y1, x2, y2 = box
+        self.template = gray[y1:y2, x1:x2].copy()
+        self.box = box
+        self.search_margin = search_margin
+
+    def update(self, gray: np.ndarray) -> Tuple[bool, List[int], float]:
+        height, width = gray.shape[:2]
+        x1, y1, x2, y2 = self.box
+        bw, bh = x2 - x1, y2 - y1
+        mx, my = int(bw * self.search_margin) + 2, int(bh * self.search_margin) + 2
+
+        sx1, sy1 = max(0, x1 - mx), max(0, y1 - my)
+        sx2, sy2 = min(width, x2 + mx), min(height, y2 + my)
+        search = gray[sy1:sy2, sx1:sx2]
+        if search.shape[0] < bh or search.shape[1] < bw:
+            return False, self.box, 0.0
+
+        scores = cv2.matchTemplate(search, self.template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, (dx, dy) = cv2.minMaxLoc(scores)
+        self.box = [sx1 + dx, sy1 + dy, sx1 + dx + bw, sy1 + dy + bh]
+        return True, self.box, float(score)
+
+
+class _OpenCVTrack:
+    """Wrapper um einen OpenCV-Tracker (KCF/CSRT/MIL)."""
+
+    def __init__(self, kind: str, frame: np.ndarray, box: List[int]):
+        self.tracker = _create_cv_tracker(kind)
+        if self.tracker is None:
+            raise RuntimeError(f"OpenCV-Tracker '{kind}' nicht verfügbar (opencv-contrib-python?)")
+        x1, y1, x2, y2 = box
+        self.tracker.init(frame, (x1, y1, x2 - x1, y2 - y1))
+        self.box = box
+
+    def update(self, frame: np.ndarray) -> Tuple[bool, List[int], float]:
+        ok, (x, y, w, h) = self.tracker.update(frame)
+        if ok:
+            self.box = [int(x), int(y), int(x + w), int(y + h)]
+        # OpenCV-Tracker liefern keinen Score - Erfolg gilt als volle Konfidenz
+        return bool(ok), self.box, 1.0 if ok else 0.0
+
+
+class BoxTracker:
+    """
+    Verfolgt die Boxen der letzten Erkennung bis zur nächsten Inferenz.
+    """
+
+    def __init__(self, tracker_type: str = "template", min_confidence: float = 0.6,
+                 search_margin: float = 0.5):
+        """
+        Initialisiert den Tracker.
+
+        Args:
+            tracker_type: template, kcf, csrt oder mil
+            min_confidence: Minimaler Tracking-Score (nur template) bevor neu erkannt wird
+            search_margin: Suchfenster-Rand relativ zur Box-Größe (nur template)
+        """
+        if tracker_type not in TRACKER_TYPES:
+            raise ValueError(f"Ungültiger Tracker-Typ: {tracker_type}")
+        if tracker_type != "template" and _create_cv_tracker(tracker_type) is None:
+            raise RuntimeError(f"OpenCV-Tracker '{tracker_type}' nicht verfügbar (opencv-contrib-python?)")
+
+        self.tracker_type = tracker_type
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+        self.tracks: List[Tuple[Any, Dict[str, Any]]] = []
+
+    @property
+    def active(self) -> bool:
+        return bool(self.tracks)
+
+    def reset(self):
+        self.tracks = []
+
+    def start(self, frame: np.ndarray, detections: List[Dict[str, Any]]):
+        """
+        Startet Tracks für alle Erkennungen eines Frames.
+
+        Args:
+            frame: Frame der Erkennung (BGR oder Graustufen)
+            detections: Detections aus StreamProcessor.detect_objects
+        """
+        self.reset()
+        height, width = frame.shape[:2]
+        gray = _to_gray(frame) if self.tracker_type == "template" else None
+        if self.tracker_type != "template" and frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+
+        for detection in detections:
+            box = _clip_box(detection["bbox"], width, height)
+            if box[2] - box[0] < 4 or box[3] - box[1] < 4:
+                continue
+            if self.tracker_type == "template":
+                track = _TemplateTrack(gray, box, self.search_margin)
+            else:
+                track = _OpenCVTrack(self.tracker_type, frame, box)
+            self.tracks.append((track, detection))
+
+    def update(self, frame: np.ndarray) -> Tuple[bool, List[Dict[str, Any]]]:
+        """
+        Führt alle Tracks auf das neue Frame weiter.
+
+        Returns:
+            (ok, detections) - ok ist False sobald ein Track verloren geht
+            oder unter min_confidence fällt (dann neu erkennen)
+        """
+        if not self.tracks:
+            return False, []
+
+        if self.tracker_type == "template":
+            source = _to_gray(frame)
+        else:
+            source = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR) if frame.ndim == 2 else frame
+        detections = []
+
+        for track, detection in self.tracks:
+            ok, box, score = track.update(source)
+            if not ok or score < self.min_confidence:
+                self.reset()
+                return False, []
+            detections.append(dict(detection, bbox=[int(v) for v in box], track_score=score))
+
+        return True, detections
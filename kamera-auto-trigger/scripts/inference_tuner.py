@@ -0,0 +1,358 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Inferenz-Tuner für den Auto-Trigger
+===================================
+
+Misst auf dem lokalen Rechner ein Raster aus Thread-Anzahl, Eingabegröße
+(imgsz) und Backend (PyTorch, ONNX, OpenVINO) gegen einen festen Satz
+Vorschau-Frames und speichert das schnellste Profil, das die Erkennungsrate
+der Referenz (PyTorch @ 640) hält, als JSON. StreamProcessor und Auto-Trigger
+laden dieses Profil beim Start.
+
+Jede Thread-Anzahl läuft in einem eigenen Prozess, da OMP/BLAS-Threads nur
+vor dem Import von torch/numpy gesetzt werden können. ONNX Runtime und
+OpenVINO ignorieren diese Variablen; ihre Sessions werden nach dem Laden mit
+intra_op_num_threads bzw. INFERENCE_NUM_THREADS neu angelegt
+(apply_backend_threads). Gelingt das nicht, wird das Backend nur einmal mit
+seiner Standard-Thread-Anzahl gemessen (threads: null im Profil).
+
+Verwendung:
+    # Frames sammeln (z.B. aus Aufnahmen)
+    python ../../ai-training-tools/extract_frames.py clip.mp4 tune_frames/ --interval 2
+
+    # Tuning starten
+    python inference_tuner.py --frames tune_frames/
+
+    # Aktuelles Profil anzeigen
+    python inference_tuner.py --show
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import subprocess
+import statistics
+from datetime import datetime
+from pathlib import Path
+from typing import Optional, Dict, Any, List
+
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent
+DEFAULT_PROFILE_PATH = PROJECT_ROOT / "config" / "inference_profile.json"
+DEFAULT_MODEL_FILE = PROJECT_ROOT / "config" / "models" / "yolov8n.pt"
+BIRD_CLASS_ID = 14  # COCO class ID für "bird"
+
+# Standardwerte wie bisher fest im StreamProcessor
+DEFAULT_PROFILE = {
+    "threads": 2,
+    "imgsz": 640,
+    "backend": "pytorch",
+    "model_file": None,
+    "iou": 0.45,
+    "max_det": 5
+}
+
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def load_inference_profile(path: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Lädt das Inferenz-Profil und ergänzt fehlende Werte mit Standardwerten.
+    
+    Args:
+        path: Profil-Datei (default: config/inference_profile.json)
+        
+    Returns:
+        Profil-Dictionary (Standardwerte wenn keine Datei existiert)
+    """
+    profile = dict(DEFAULT_PROFILE)
+    profile_file = Path(path) if path else DEFAULT_PROFILE_PATH
+    
+    try:
+        with open(profile_file, "r", encoding="utf-8") as f:
+            profile.update(json.load(f))
+        profile["loaded_from"] = str(profile_file)
+    except (OSError, ValueError):
+        profile["loaded_from"] = None
+    
+    return profile
+
+
+def apply_backend_threads(model: Any, threads: int) -> bool:
+    """
+    Überträgt die Thread-Anzahl auf das Backend eines geladenen YOLO-Modells.
+    
+    PyTorch nutzt torch.set_num_threads (Aufrufer). Für ONNX Runtime und
+    OpenVINO wird die Session mit eigener Thread-Option neu erstellt. Das
+    Backend existiert erst nach der ersten Inferenz.
+    
+    Returns:
+        True wenn die Thread-Anzahl wirksam ist, False wenn das Backend sie nicht übernimmt
+    """
+    backend = getattr(getattr(model, "predictor", None), "model", None)
+    if backend is None:
+        return False
+    if getattr(backend, "pt", False):
+        return True
+    
+    try:
+        # Statische ONNX-Modelle mit IO-Binding hängen an der alten Session
+        io_binding = getattr(backend, "use_io_binding", hasattr(backend, "io") and not getattr(backend, "dynamic", False))
+        if getattr(backend, "onnx", False) and not io_binding:
+            import onnxruntime
+            options = onnxruntime.SessionOptions()
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+            providers = backend.session.get_providers()
+            backend.session = onnxruntime.InferenceSession(str(backend.w), sess_options=options, providers=providers)
+            return True
+        if getattr(backend, "xml", False) and hasattr(backend, "ov_model"):
+            backend.ov_compiled_model = backend.core.compile_model(
+                backend.ov_model, device_name="CPU",
+                config={"PERFORMANCE_HINT": "LATENCY", "INFERENCE_NUM_THREADS": threads}
+            )
+            return True
+    except Exception as e:
+        print(f"⚠️  Threads für Backend nicht setzbar: {e}")
+    return False
+
+
+def _load_frames(frames_dir: str, max_frames: int) -> List[Any]:
+    import cv2
+    
+    files = sorted(
+        p for p in Path(frames_dir).iterdir()
+        if p.suffix.lower() in {".jpg", ".jpeg", ".png", ".bmp"}
+    )[:max_frames]
+    frames = [cv2.imread(str(p)) for p in files]
+    return [f for f in frames if f is not None]
+
+
+def _run_worker(spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Misst einen Backend/Thread-Punkt für alle imgsz-Werte (läuft im Unterprozess).
+    """
+    import torch
+    from ultralytics import YOLO
+    
+    torch.set_num_threads(spec["threads"])
+    frames = _load_frames(spec["frames"], spec["max_frames"])
+    model = YOLO(spec["model_file"], task="detect")
+    classes = [BIRD_CLASS_ID] if spec["bird_only"] else None
+    
+    # Erste Inferenz legt das Backend an, danach Threads für ONNX/OpenVINO setzen
+    threads_applied = False
+    if frames:
+        model(frames[0], verbose=False, imgsz=spec["imgsz"][0])
+        threads_applied = apply_backend_threads(model, spec["threads"])
+    
+    results = {}
+    for imgsz in spec["imgsz"]:
+        # Warm-up (Graph-Aufbau, Speicher-Allokation)
+        for frame in frames[:3]:
+            model(frame, verbose=False, imgsz=imgsz)
+        
+        latencies, positives = [], []
+        for frame in frames:
+            start = time.perf_counter()
+            result = model(frame, verbose=False, conf=spec["threshold"], iou=spec["iou"],
+                           max_det=spec["max_det"], imgsz=imgsz, classes=classes)
+            latencies.append((time.perf_counter() - start) * 1000)
+            positives.append(len(result[0].boxes) > 0)
+        
+        results[str(imgsz)] = {
+            "latency_ms": statistics.median(latencies),
+            "p90_ms": sorted(latencies)[int(len(latencies) * 0.9) - 1] if latencies else 0,
+            "positives": positives
+        }
+    
+    return {"threads_applied": threads_applied, "imgsz": results}
+
+
+def _measure(spec: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """Startet einen Worker-Prozess mit gesetzten Thread-Variablen."""
+    env = dict(os.environ)
+    for var in THREAD_ENV_VARS:
+        env[var] = str(spec["threads"])
+    
+    proc = subprocess.run(
+        [sys.executable, __file__, "--worker", json.dumps(spec)],
+        capture_output=True, text=True, env=env
+    )
+    if proc.returncode != 0:
+        print(f"   ⚠️  Messung fehlgeschlagen: {proc.stderr.strip().splitlines()[-1:]}")
+        return None
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def _export_backend(model_file: str, backend: str) -> Optional[str]:
+    """Exportiert das Modell für ONNX/OpenVINO (dynamische Eingabegröße)."""
+    if backend == "pytorch":
+        return model_file
+    
+    from ultralytics import YOLO
+    try:
+        exported = YOLO(model_file).export(format=backend, dynamic=True, verbose=False)
+        return str(exported)
+    except Exception as e:
+        print(f"   ⚠️  Export nach {backend} fehlgeschlagen: {e}")
+        return None
+
+
+def tune(
+    frames_dir: str,
+    threads: List[int],
+    imgsizes: List[int],
+    backends: List[str],
+    model_file: str,
+    threshold: float = 0.5,
+    iou: float = 0.45,
+    max_det: int = 5,
+    max_frames: int = 100,
+    min_recall: float = 0.95,
+    bird_only: bool = True
+) -> Optional[Dict[str, Any]]:
+    """
+    Führt das Tuning-Raster aus und wählt das schnellste Profil mit ausreichendem Recall.
+    
+    Returns:
+        Profil-Dictionary oder None bei Fehler
+    """
+    base_spec = {
+        "frames": frames_dir, "max_frames": max_frames, "threshold": threshold,
+        "iou": iou, "max_det": max_det, "bird_only": bird_only
+    }
+    
+    # Referenz: PyTorch @ 640 mit allen Kernen
+    print("📐 Referenz-Messung (PyTorch, imgsz 640)...")
+    reference = _measure(dict(base_spec, model_file=model_file, threads=os.cpu_count() or 4, imgsz=[640]))
+    if not reference:
+        return None
+    ref_positives = reference["imgsz"]["640"]["positives"]
+    ref_count = sum(ref_positives)
+    print(f"   {len(ref_positives)} Frames, {ref_count} mit Vogel")
+    if ref_count == 0:
+        print("⚠️  Keine Vögel in den Referenz-Frames - Recall nicht messbar, wähle nur nach Latenz")
+    
+    candidates = []
+    for backend in backends:
+        backend_file = _export_backend(model_file, backend)
+        if not backend_file:
+            continue
+        
+        for thread_count in threads:
+            print(f"⏱️  {backend}, {thread_count} Threads, imgsz {imgsizes}...")
+            measured = _measure(dict(base_spec, model_file=backend_file, threads=thread_count, imgsz=imgsizes))
+            if not measured:
+                continue
+            
+            # Backend übernimmt keine Thread-Anzahl: ein Durchlauf mit Standard-Threads genügt
+            sweep = measured["threads_applied"]
+            if not sweep:
+                print(f"   ℹ️  {backend} übernimmt keine Thread-Anzahl - gemessen mit Backend-Standard")
+            
+            for imgsz, result in measured["imgsz"].items():
+                hits = sum(1 for r, p in zip(ref_positives, result["positives"]) if r and p)
+                recall = hits / ref_count if ref_count else 1.0
+                candidates.append({
+                    "threads": thread_count if sweep else None, "imgsz": int(imgsz), "backend": backend,
+                    "model_file": None if backend == "pytorch" else backend_file,
+                    "latency_ms": round(result["latency_ms"], 2),
+                    "p90_ms": round(result["p90_ms"], 2),
+                    "recall": round(recall, 3)
+                })
+                print(f"   imgsz {imgsz}: {result['latency_ms']:.1f}ms, Recall {recall * 100:.0f}%")
+            
+            if not sweep:
+                break
+    
+    valid = [c for c in candidates if c["recall"] >= min_recall]
+    if not valid:
+        print(f"❌ Kein Profil erreicht den Mindest-Recall von {min_recall * 100:.0f}%")
+        return None
+    
+    best = min(valid, key=lambda c: c["latency_ms"])
+    best.update({
+        "iou": iou,
+        "max_det": max_det,
+        "host": socket.gethostname(),
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "frames": len(ref_positives),
+        "candidates": candidates
+    })
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inferenz-Tuner für den Auto-Trigger")
+    parser.add_argument("--frames", help="Verzeichnis mit Vorschau-Frames (JPEG/PNG)")
+    parser.add_argument("--threads", default="1,2,4", help="Thread-Anzahlen (default: 1,2,4)")
+    parser.add_argument("--imgsz", default="256,320,416,640", help="Eingabegrößen (default: 256,320,416,640)")
+    parser.add_argument("--backends", default="pytorch,onnx",
+                        help="Backends: pytorch, onnx, openvino (default: pytorch,onnx)")
+    parser.add_argument("--model", default=str(DEFAULT_MODEL_FILE), help="Basis-Modell (default: config/models/yolov8n.pt)")
+    parser.add_argument("--threshold", type=float, default=0.5, help="Erkennungs-Schwelle (default: 0.5)")
+    parser.add_argument("--max-frames", type=int, default=100, help="Maximale Anzahl Frames (default: 100)")
+    parser.add_argument("--min-recall", type=float, default=0.95,
+                        help="Mindest-Recall gegenüber Referenz (default: 0.95)")
+    parser.add_argument("--all-classes", action="store_true", help="Alle Klassen zählen (Custom-Modelle)")
+    parser.add_argument("--output", default=str(DEFAULT_PROFILE_PATH), help="Profil-Datei")
+    parser.add_argument("--show", action="store_true", help="Aktuelles Profil anzeigen")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    
+    args = parser.parse_args()
+    
+    if args.worker:
+        print(json.dumps(_run_worker(json.loads(args.worker))))
+        return 0
+    
+    if args.show:
+        profile = load_inference_profile(args.output)
+        if not profile["loaded_from"]:
+            print(f"ℹ️  Kein Profil gefunden ({args.output}) - Standardwerte:")
+        for key in ("threads", "imgsz", "backend", "model_file", "iou", "max_det", "latency_ms", "recall", "host", "created"):
+            if key in profile:
+                print(f"   {key}: {profile[key]}")
+        return 0
+    
+    if not args.frames or not Path(args.frames).is_dir():
+        print("❌ --frames Verzeichnis erforderlich")
+        return 1
+    
+    model_file = args.model if Path(args.model).exists() else "yolov8n.pt"
+    
+    print("=" * 70)
+    print("🔧 Inferenz-Tuning")
+    print("=" * 70)
+    
+    profile = tune(
+        args.frames,
+        threads=[int(t) for t in args.threads.split(",")],
+        imgsizes=[int(s) for s in args.imgsz.split(",")],
+        backends=[b.strip() for b in args.backends.split(",")],
+        model_file=model_file,
+        threshold=args.threshold,
+        max_frames=args.max_frames,
+        min_recall=args.min_recall,
+        bird_only=not args.all_classes
+    )
+    if not profile:
+        return 1
+    
+    Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(profile, f, indent=2)
+    
+    print("=" * 70)
+    print(f"✅ Bestes Profil: {profile['backend']}, {profile['threads'] or 'Standard-'} Threads, imgsz {profile['imgsz']}")
+    print(f"   Latenz: {profile['latency_ms']:.1f}ms (p90 {profile['p90_ms']:.1f}ms), Recall {profile['recall'] * 100:.0f}%")
+    print(f"   Gespeichert: {args.output}")
+    print("=" * 70)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bewegungserkennung aus H.264-Bewegungsvektoren
+==============================================
+
+Der Preview-Stream von rpicam-vid ist H.264 - der Encoder auf dem Pi hat die
+Bewegungsvektoren also schon berechnet. Dieser Decoder (PyAV/FFmpeg mit
+``export_mvs``) liest sie pro Makroblock mit aus und bildet daraus einen
+Bewegungs-Score für die ROI, ohne zusätzliche Pixel-Arbeit. Der
+StreamProcessor nutzt den Score, um YOLO auf statischen Frames zu überspringen.
+
+Im Leerlauf kann der Decoder außerdem nur Keyframes (IDR) dekodieren und die
+Pixel-Rekonstruktion der P-Frames auslassen (``skip_frame=NONKEY``). Die
+Prozess-CPU-Zeit während des Dekodierens wird getrennt pro Modus gemessen.
+
+Skalierung und Farbformat (BGR/GRAY8) erledigt swscale direkt beim
+Auslesen des Frames, so wie die GStreamer-Pipeline im StreamProcessor.
+
+Installation:
+    pip install av
+
+Verwendung:
+    from motion_vectors import MotionVectorCapture
+
+    cap = MotionVectorCapture("tcp://raspberrypi-5-ai-had:8554", roi=(0.1, 0.1, 0.9, 0.9))
+    ret, frame = cap.read()
+    print(cap.motion_score)  # Anteil bewegter ROI-Fläche (None bei I-Frames)
+"""
+
+import time
+import numpy as np
+from typing import Optional, Tuple, Dict, Any
+
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+# Pipeline-Farbformate -> PyAV/FFmpeg-Pixelformate
+PIXEL_FORMATS = {"BGR": "bgr24", "GRAY8": "gray"}
+
+
+def parse_roi(value: str) -> Tuple[float, float, float, float]:
+    """
+    Parst eine ROI im Format "x1,y1,x2,y2" (relativ, 0.0 - 1.0).
+    """
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) != 4 or not all(0.0 <= v <= 1.0 for v in parts) or parts[0] >= parts[2] or parts[1] >= parts[3]:
+        raise ValueError(f"Ungültige ROI: {value} (erwartet x1,y1,x2,y2 zwischen 0 und 1)")
+    return tuple(parts)
+
+
+def motion_score(vectors: np.ndarray, width: int, height: int,
+                 roi: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0),
+                 min_magnitude: float = 1.0) -> float:
+    """
+    Berechnet den Anteil bewegter Fläche in der ROI aus Makroblock-Vektoren.
+
+    Args:
+        vectors: Strukturiertes Array der FFmpeg-Bewegungsvektoren
+                 (Felder w, h, dst_x, dst_y, motion_x, motion_y, motion_scale)
+        width: Frame-Breite
+        height: Frame-Höhe
+        roi: Relative ROI (x1, y1, x2, y2)
+        min_magnitude: Mindest-Verschiebung in Pixeln, ab der ein Block als bewegt gilt
+
+    Returns:
+        Bewegter Flächenanteil der ROI (0.0 - 1.0)
+    """
+    x1, y1, x2, y2 = roi[0] * width, roi[1] * height, roi[2] * width, roi[3] * height
+    roi_area = (x2 - x1) * (y2 - y1)
+    if len(vectors) == 0 or roi_area <= 0:
+        return 0.0
+
+    inside = (
+        (vectors["dst_x"] >= x1) & (vectors["dst_x"] < x2) &
+        (vectors["dst_y"] >= y1) & (vectors["dst_y"] < y2)
+    )
+    scale = np.maximum(vectors["motion_scale"], 1).astype(np.float32)
+    magnitude = np.hypot(vectors["motion_x"] / scale, vectors["motion_y"] / scale)
+    moving = inside & (magnitude >= min_magnitude)
+
+    moving_area = float(np.sum(vectors["w"][moving].astype(np.float32) * vectors["h"][moving]))
+    return min(1.0, moving_area / roi_area)
+
+
+def summarize_decoder_statistics(stats: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+    """
+    Ergänzt rohe Decoder-Zähler um CPU-Zeit pro Frame und CPU-Last.
+
+    cpu_time ist Prozess-CPU (time.process_time) während read(): sie enthält
+    die FFmpeg-Decoder-Threads, aber auch alles, was andere Threads des
+    Prozesses in dieser Zeit rechnen. Werte sind daher eine Obergrenze.
+
+    Args:
+        stats: {full|keyframe: {frames, cpu_time, wall_time}}
+
+    Returns:
+        Dictionary mit zusätzlich cpu_ms_per_frame und cpu_load
+        (Prozess-CPU-Sekunden pro Sekunde in diesem Modus)
+    """
+    return {
+        mode: dict(
+            values,
+            cpu_ms_per_frame=values["cpu_time"] / values["frames"] * 1000 if values["frames"] else 0.0,
+            cpu_load=values["cpu_time"] / values["wall_time"] if values["wall_time"] > 0 else 0.0
+        )
+        for mode, values in stats.items()
+    }
+
+
+class MotionVectorCapture:
+    """
+    VideoCapture-kompatibler H.264-Decoder mit Bewegungsvektor-Export.
+    """
+
+    def __init__(self, url: str, roi: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0),
+                 min_magnitude: float = 1.0, timeout: int = 10,
+                 output_size: Optional[Tuple[int, int]] = None, pixel_format: str = "BGR",
+                 decode_threads: int = 0):
+        """
+        Öffnet den Stream.
+
+        Args:
+            url: Stream-URL (z.B. tcp://host:8554)
+            roi: Relative ROI für den Bewegungs-Score
+            min_magnitude: Mindest-Verschiebung in Pixeln pro Block
+            timeout: Verbindungs-Timeout in Sekunden
+            output_size: Ausgabegröße (Breite, Höhe), None = Stream-Größe
+            pixel_format: BGR oder GRAY8 (einkanalig)
+            decode_threads: H.264-Decoder-Threads (0 = FFmpeg-Automatik)
+        """
+        if not HAS_PYAV:
+            raise RuntimeError("PyAV nicht installiert. Installiere mit: pip install av")
+
+        self.roi = roi
+        self.min_magnitude = min_magnitude
+        self.output_size = output_size
+        self.av_format = PIXEL_FORMATS[pixel_format]
+        self.motion_score: Optional[float] = None
+        self.keyframe_only = False
+        self.decoder_stats = {
+            mode: {"frames": 0, "cpu_time": 0.0, "wall_time": 0.0}
+            for mode in ("full", "keyframe")
+        }
+        self._mode_started = time.time()
+
+        self.container = av.open(
+            url,
+            format="h264",
+            options={"fflags": "nobuffer", "flags": "low_delay"},
+            timeout=timeout
+        )
+        stream = self.container.streams.video[0]
+        stream.codec_context.options = {"flags2": "+export_mvs"}
+        stream.thread_type = "AUTO"
+        if decode_threads > 0:
+            stream.codec_context.thread_count = decode_threads
+        self._codec = stream.codec_context
+        self._frames = self.container.decode(stream)
+
+    def isOpened(self) -> bool:
+        return self.container is not None
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """
+        Dekodiert das nächste Frame und aktualisiert motion_score.
+
+        Returns:
+            (success, frame) Tuple wie cv2.VideoCapture.read (BGR oder Graustufen)
+        """
+        # Prozess-CPU statt thread_time: mit thread_type AUTO dekodieren
+        # FFmpeg-Worker-Threads, der aufrufende Thread wartet nur
+        cpu_start = time.process_time()
+        try:
+            frame = next(self._frames)
+        except (StopIteration, av.error.FFmpegError):
+            return False, None
+
+        vectors = frame.side_data.get("MOTION_VECTORS")
+        if vectors is not None:
+            self.motion_score = motion_score(vectors.to_ndarray(), frame.width, frame.height,
+                                             self.roi, self.min_magnitude)
+        else:
+            # I-Frames enthalten keine Vektoren - Bewegung unbekannt
+            self.motion_score = None
+
+        width, height = self.output_size or (frame.width, frame.height)
+        image = frame.reformat(width=width, height=height, format=self.av_format).to_ndarray()
+        stats = self.decoder_stats["keyframe" if self.keyframe_only else "full"]
+        stats["frames"] += 1
+        stats["cpu_time"] += time.process_time() - cpu_start
+        return True, image
+
+    def set_keyframe_only(self, enabled: bool):
+        """
+        Schaltet zwischen Keyframe-Decode (Leerlauf) und vollem Decode um.
+
+        Das Zurückschalten direkt nach einem dekodierten Keyframe ist sauber,
+        da die folgenden P-Frames auf diesen Keyframe referenzieren.
+        """
+        if enabled == self.keyframe_only:
+            return
+
+        now = time.time()
+        self.decoder_stats["keyframe" if self.keyframe_only else "full"]["wall_time"] += now - self._mode_started
+        self._mode_started = now
+
+        self._codec.skip_frame = "NONKEY" if enabled else "DEFAULT"
+        self.keyframe_only = enabled
+        # Ohne P-Frames gibt es keine Bewegungsvektoren
+        self.motion_score = None
+
+    def get_decoder_statistics(self) -> Dict[str, Dict[str, float]]:
+        """
+        Gibt die rohen Decoder-Zähler pro Modus zurück (inkl. laufendem Modus).
+
+        Returns:
+            Dictionary {full|keyframe: {frames, cpu_time, wall_time}}
+        """
+        current = "keyframe" if self.keyframe_only else "full"
+        return {
+            mode: dict(stats, wall_time=stats["wall_time"] + (time.time() - self._mode_started if mode == current else 0.0))
+            for mode, stats in self.decoder_stats.items()
+        }
+
+    def release(self):
+        if self.container is not None:
+            self.container.close()
+            self.container = None
@@ -32,11 +32,16 @@ Verwendung:
 import cv2
 import numpy as np
 import time
+import random
 import threading
-from typing import Optional, Tuple, Dict, Any
+from typing import Optional, Tuple, Dict, Any, Callable
 from pathlib import Path
 import logging
 
+from inference_tuner import load_inference_profile, apply_backend_threads
+from bird_tracker import BoxTracker
+from motion_vectors import MotionVectorCapture, HAS_PYAV, summarize_decoder_statistics
+
 # Conditional imports
 try:
     from ultralytics import YOLO
@@ -45,9 +50,75 @@ except ImportError:
     HAS_YOLO = False
     print("⚠️  Ultralytics YOLO nicht installiert. Installiere mit: pip install ultralytics")
 
+try:
+    import torch
+    HAS_TORCH = True
+except ImportError:
+    HAS_TORCH = False
+
 # Logger setup
 logger = logging.getLogger(__name__)
 
+# disconnect() wartet so lange auf einen laufenden Reconnect des Watchdogs
+WATCHDOG_STOP_TIMEOUT = 60.0
+
+
+def scaled_size(width: int, height: int, imgsz: int) -> Tuple[int, int]:
+    """
+    Berechnet die Ausgabegröße mit langer Seite = imgsz (nie hochskaliert).
+    
+    Returns:
+        (width, height) - gerade Werte für den Scaler
+    """
+    scale = min(1.0, imgsz / max(width, height))
+    return int(round(width * scale / 2) * 2), int(round(height * scale / 2) * 2)
+
+
+def build_gstreamer_pipeline(
+    host: str,
+    port: int,
+    timeout: int = 10,
+    width: Optional[int] = None,
+    height: Optional[int] = None,
+    pixel_format: str = "BGR",
+    decode_threads: int = 0
+) -> str:
+    """
+    Baut die GStreamer-Pipeline für den TCP-H.264-Stream.
+    
+    Skalierung und Farbkonvertierung passieren in der Pipeline, der appsink
+    hält höchstens ein Frame (alte Frames werden verworfen).
+    
+    Args:
+        host: Hostname des Raspberry Pi
+        port: TCP-Port
+        timeout: Timeout in Sekunden, nach dem ein hängender TCP-Read abbricht
+        width: Ausgabebreite (None = Stream-Größe)
+        height: Ausgabehöhe (None = Stream-Größe)
+        pixel_format: BGR oder GRAY8
+        decode_threads: Decoder-Threads (0 = avdec_h264-Automatik, sonst feste Anzahl)
+        
+    Returns:
+        Pipeline-Beschreibung für cv2.VideoCapture(..., cv2.CAP_GSTREAMER)
+    """
+    caps = f"video/x-raw,format={pixel_format}"
+    if width and height:
+        caps += f",width={width},height={height}"
+    
+    decoder = "avdec_h264"
+    if decode_threads > 0:
+        decoder += f" max-threads={decode_threads}"
+    
+    return (
+        f"tcpclientsrc host={host} port={port} timeout={timeout} ! "
+        "h264parse ! "
+        f"{decoder} ! "
+        "videoscale ! "
+        "videoconvert ! "
+        f"{caps} ! "
+        "appsink drop=1 max-buffers=1 sync=0"
+    )
+
 
 class StreamProcessor:
     """
@@ -66,7 +137,28 @@ class StreamProcessor:
         fps: int = 5,
         timeout: int = 10,
         trigger_duration: float = 1.0,
-        debug: bool = False
+        debug: bool = False,
+        profile_path: Optional[str] = None,
+        detect_interval: int = 1,
+        tracker_type: str = "template",
+        track_min_confidence: float = 0.6,
+        cascade_model: Optional[str] = None,
+        screen_imgsz: int = 320,
+        cascade_low: float = 0.25,
+        cascade_high: float = 0.70,
+        decoder: str = "opencv",
+        motion_gate: Optional[float] = None,
+        motion_roi: Tuple[float, float, float, float] = (0.0, 0.0, 1.0, 1.0),
+        idle_keyframes: bool = False,
+        idle_timeout: float = 10.0,
+        activity_threshold: float = 0.02,
+        scale_to_imgsz: bool = True,
+        pixel_format: str = "BGR",
+        decode_threads: int = 0,
+        stall_timeout: float = 5.0,
+        reconnect_max_delay: float = 60.0,
+        restart_callback: Optional[Callable[[], None]] = None,
+        restart_after: int = 3
     ):
         """
         Initialisiert StreamProcessor.
@@ -83,6 +175,34 @@ class StreamProcessor:
             timeout: Timeout für Stream-Verbindung (Sekunden)
             trigger_duration: Mindest-Dauer in Sekunden für Trigger (default: 1.0)
             debug: Debug-Modus aktivieren
+            profile_path: Inferenz-Profil von inference_tuner.py
+                          (default: config/inference_profile.json)
+            detect_interval: Volle Inferenz nur jedes N-te Frame während ein Vogel
+                             verfolgt wird (1 = jedes Frame, kein Tracking)
+            tracker_type: Tracker zwischen den Inferenzen (template, kcf, csrt, mil)
+            track_min_confidence: Tracking-Score unter dem sofort neu erkannt wird
+            cascade_model: Genaueres Zweitmodell (z.B. yolov8s.pt) - aktiviert Kaskade:
+                           das Hauptmodell screent mit screen_imgsz, nur Frames mit
+                           Konfidenz zwischen cascade_low und cascade_high gehen an Stufe 2
+            screen_imgsz: Eingabegröße der Screening-Stufe
+            cascade_low: Darunter gilt ein Frame ohne Stufe 2 als negativ
+            cascade_high: Darüber gilt ein Frame ohne Stufe 2 als positiv
+            decoder: opencv (GStreamer/FFMPEG) oder pyav (mit H.264-Bewegungsvektoren)
+            motion_gate: Bewegter ROI-Flächenanteil, unter dem YOLO im Leerlauf
+                         übersprungen wird (nur decoder=pyav, None = aus)
+            motion_roi: Relative ROI (x1, y1, x2, y2) für den Bewegungs-Score
+            idle_keyframes: Im Leerlauf nur Keyframes dekodieren (erzwingt decoder=pyav,
+                            Stream sollte mit kurzer GOP laufen: start-rtsp-stream.sh --gop)
+            idle_timeout: Sekunden ohne Aktivität bis zurück in den Keyframe-Modus
+            activity_threshold: Geänderter Bildanteil (Keyframe-Differenz bzw.
+                                Bewegungsvektoren), ab dem voll dekodiert wird
+            scale_to_imgsz: Frames bereits im Decoder auf die Inferenz-Größe skalieren
+            pixel_format: Ausgabeformat der Pipeline (BGR oder GRAY8, bleibt bis zur Inferenz einkanalig)
+            decode_threads: H.264-Decoder-Threads (0 = Decoder-Automatik, sonst feste Anzahl)
+            stall_timeout: Sekunden ohne gültiges Frame bis zum Reconnect
+            reconnect_max_delay: Obergrenze des exponentiellen Backoffs (Sekunden)
+            restart_callback: Optional, startet den Stream auf dem Pi neu
+            restart_after: Fehlversuche bis restart_callback aufgerufen wird
         """
         self.host = host
         self.port = port
@@ -96,6 +216,83 @@ class StreamProcessor:
         self.trigger_duration = trigger_duration
         self.debug = debug
         
+        # Inferenz-Profil (Threads, imgsz, Backend) vom Tuner
+        self.profile = load_inference_profile(profile_path)
+        self.imgsz = int(self.profile["imgsz"])
+        self.iou = float(self.profile["iou"])
+        self.max_det = int(self.profile["max_det"])
+        
+        # Detect-then-Track: Inferenz nur jedes N-te Frame während eines Besuchs
+        self.detect_interval = max(1, detect_interval)
+        self.tracker = BoxTracker(tracker_type, track_min_confidence) if self.detect_interval > 1 else None
+        self.frames_since_detection = 0
+        
+        # Zwei-Stufen-Kaskade (Screening + Zweitmodell im unsicheren Band)
+        self.cascade_model_path = cascade_model
+        self.screen_imgsz = screen_imgsz
+        self.cascade_low = cascade_low
+        self.cascade_high = cascade_high
+        self.cascade_stats = {
+            "screen_positive": 0,
+            "screen_negative": 0,
+            "ambiguous": 0,
+            "stage2_positive": 0,
+            "screen_time": 0.0,
+            "stage2_time": 0.0
+        }
+        
+        # Bewegungsvektor-Gate: YOLO auf statischen Frames im Leerlauf überspringen
+        if idle_keyframes:
+            decoder = "pyav"
+        if decoder == "pyav" and not HAS_PYAV:
+            logger.warning("PyAV nicht installiert - verwende OpenCV-Decoder ohne Bewegungsvektoren")
+            decoder = "opencv"
+        self.decoder = decoder
+        self.motion_gate = motion_gate if decoder == "pyav" else None
+        self.motion_roi = motion_roi
+        self.motion_max_skip = max(1, fps * 2)  # Spätestens alle 2s trotzdem erkennen
+        self.motion_skip_run = 0
+        self.motion_skipped = 0
+        self.last_bird_detected = False
+        
+        # Keyframe-Decode im Leerlauf, voller Decode bei Aktivität
+        self.idle_keyframes = idle_keyframes and decoder == "pyav"
+        self.idle_timeout = idle_timeout
+        self.activity_threshold = activity_threshold
+        self.last_activity_time = time.time()
+        self._idle_reference: Optional[np.ndarray] = None
+        self.decoder_totals = {
+            mode: {"frames": 0, "cpu_time": 0.0, "wall_time": 0.0}
+            for mode in ("full", "keyframe")
+        }
+        
+        # Pipeline-Konfiguration (Skalierung/Konvertierung im Decoder statt in Python)
+        self.pixel_format = pixel_format
+        self.decode_threads = decode_threads
+        self.output_size = scaled_size(width, height, self.imgsz) if scale_to_imgsz else (width, height)
+        self.pipeline: Optional[str] = None
+        self.capture_backend: Optional[str] = None
+        self.avg_read_time = 0.0
+        
+        # Stall-Watchdog mit exponentiellem Backoff
+        self.stall_timeout = stall_timeout
+        self.reconnect_max_delay = reconnect_max_delay
+        self.restart_callback = restart_callback
+        self.restart_after = max(1, restart_after)
+        self.last_frame_time = time.time()
+        self.stall_started: Optional[float] = None
+        self.reconnect_attempts = 0
+        self.next_reconnect_time = 0.0
+        self.stalls = 0
+        self.remote_restarts = 0
+        self.recovery_times = []
+        self.reconnect_pending = threading.Event()
+        self.watchdog_thread: Optional[threading.Thread] = None
+        # Lesezustand für die Stall-Erkennung
+        self.read_started: Optional[float] = None
+        self.waiting_since: Optional[float] = None
+        self.last_read_end = 0.0
+        
         # Stream-Verbindung
         self.cap: Optional[cv2.VideoCapture] = None
         self.connected = False
@@ -104,9 +301,12 @@ class StreamProcessor:
         # Detection History für Trigger-Dauer
         self.detection_history = []  # Liste von (timestamp, detected) Tuples
         self.first_detection_time = None
+        self.trigger_detections = []  # Detections (nur Inferenz) seit first_detection_time
+        self.last_trigger: Optional[Dict[str, Any]] = None  # Zusammenfassung des letzten Triggers
         
         # AI-Model
         self.model: Optional[Any] = None
+        self.cascade: Optional[Any] = None
         self.model_loaded = False
         
         # Statistics
@@ -114,10 +314,13 @@ class StreamProcessor:
         self.birds_detected = 0
         self.last_detection_time = 0
         self.avg_inference_time = 0
+        self.inference_calls = 0
+        self.tracked_frames = 0
         
-        # Threading
-        self.lock = threading.Lock()
-        self.stop_event = threading.Event()
+        # Threading (reentrant: connect() hält den Lock, _open() schließt eine alte Capture)
+        self.lock = threading.RLock()
+        # Nur disconnect() setzt closed - Reconnects des Watchdogs setzen es nie zurück
+        self.closed = threading.Event()
         
         logger.info(f"StreamProcessor initialisiert: {self.stream_url}")
     
@@ -145,14 +348,24 @@ class StreamProcessor:
             else:
                 logger.info(f"Verwende lokales Model: {model_file}")
             
+            # Exportiertes Backend aus dem Profil (ONNX/OpenVINO)
+            exported = self.profile.get("model_file")
+            if self.model_type != "custom" and exported and Path(exported).exists():
+                logger.info(f"Verwende {self.profile['backend']}-Backend aus Profil: {exported}")
+                model_file = exported
+            
+            threads = self.profile["threads"]
+            if HAS_TORCH and threads:
+                torch.set_num_threads(int(threads))
+            
             if self.model_type == "bird-species":
                 logger.info("Lade bird-species Model (COCO class 14: bird)...")
-                self.model = YOLO(str(model_file))  # Nano-Model für Performance
+                self.model = YOLO(str(model_file), task="detect")  # Nano-Model für Performance
                 self.bird_class_id = 14  # COCO class ID für "bird"
                 
             elif self.model_type == "yolov8":
                 logger.info("Lade YOLOv8 Model...")
-                self.model = YOLO(str(model_file))
+                self.model = YOLO(str(model_file), task="detect")
                 self.bird_class_id = 14
                 
             elif self.model_type == "custom" and self.model_path:
@@ -167,9 +380,23 @@ class StreamProcessor:
                 logger.error(f"Ungültiger Model-Typ: {self.model_type}")
                 return False
             
+            # Zweitmodell für die Kaskade (lokal in config/models/ oder Download)
+            if self.cascade_model_path:
+                cascade_file = Path(self.cascade_model_path)
+                if not cascade_file.exists() and (project_root / "config" / "models" / cascade_file.name).exists():
+                    cascade_file = project_root / "config" / "models" / cascade_file.name
+                logger.info(f"Lade Kaskaden-Model (Stufe 2): {cascade_file}...")
+                self.cascade = YOLO(str(cascade_file), task="detect")
+            
             # Test-Inferenz für Model-Initialisierung
             dummy = np.zeros((self.height, self.width, 3), dtype=np.uint8)
-            _ = self.model(dummy, verbose=False)
+            _ = self.model(dummy, verbose=False, imgsz=self.screen_imgsz if self.cascade else self.imgsz)
+            if self.cascade:
+                _ = self.cascade(dummy, verbose=False, imgsz=self.imgsz)
+            
+            # ONNX/OpenVINO ignorieren torch-Threads - Session mit Profil-Threads neu anlegen
+            if threads and not apply_backend_threads(self.model, int(threads)):
+                logger.warning(f"Backend übernimmt die Profil-Threads ({threads}) nicht")
             
             self.model_loaded = True
             logger.info("✅ AI-Model erfolgreich geladen")
@@ -181,25 +408,67 @@ class StreamProcessor:
     
     def connect(self) -> bool:
         """
-        Verbindet mit Preview-Stream.
+        Verbindet mit Preview-Stream und startet den Stall-Watchdog.
         
         Returns:
             True wenn erfolgreich, sonst False
         """
+        self.closed.clear()
+        with self.lock:
+            connected = self._open()
+        if connected:
+            self._start_watchdog()
+        return connected
+    
+    def _open(self) -> bool:
+        """
+        Öffnet den Stream (PyAV oder OpenCV-Backends). Wird auch vom Watchdog
+        für Reconnects genutzt und lässt das closed-Flag daher unberührt.
+        Aufrufer hält self.lock.
+        """
+        if self.cap:
+            self._close()
+        
         try:
             logger.info(f"Verbinde mit Stream: {self.stream_url}...")
             logger.info(f"   Timeout: {self.timeout}s")
             
+            # PyAV-Decoder mit Bewegungsvektor-Export
+            if self.decoder == "pyav":
+                logger.info("   Verwende PyAV-Decoder (H.264-Bewegungsvektoren)...")
+                self.cap = MotionVectorCapture(
+                    self.stream_url, roi=self.motion_roi, timeout=self.timeout,
+                    output_size=self.output_size, pixel_format=self.pixel_format,
+                    decode_threads=self.decode_threads
+                )
+                ret, frame = self.cap.read()
+                if not ret or frame is None:
+                    logger.error("❌ Kein Frame vom PyAV-Decoder empfangen")
+                    self.cap.release()
+                    return False
+                self.capture_backend = "PyAV"
+                self.pipeline = self.stream_url
+                logger.info(f"✅ Stream-Verbindung erfolgreich (Backend: PyAV)")
+                logger.info(f"   Frame-Size: {frame.shape[1]}x{frame.shape[0]}")
+                self.connected = True
+                self.last_frame_time = time.time()
+                self.waiting_since = None
+                if not self.model_loaded and not self._load_model():
+                    logger.warning("Model konnte nicht geladen werden, verwende Fallback")
+                if self.idle_keyframes:
+                    logger.info("   Leerlauf: dekodiere nur Keyframes")
+                    self.cap.set_keyframe_only(True)
+                return True
+            
             # GStreamer-Pipeline für TCP-Stream
-            gst_pipeline = (
-                f"tcpclientsrc host={self.host} port={self.port} timeout={self.timeout * 1000000} ! "
-                "h264parse ! "
-                "avdec_h264 ! "
-                "videoconvert ! "
-                "appsink drop=1 sync=0"
+            gst_pipeline = build_gstreamer_pipeline(
+                self.host, self.port, self.timeout,
+                width=self.output_size[0], height=self.output_size[1],
+                pixel_format=self.pixel_format,
+                decode_threads=self.decode_threads
             )
             
-            # Versuche verschiedene Backends
+            # Versuche verschiedene Backends (FFMPEG als Fallback, skaliert in read_frame)
             backends = [
                 (cv2.CAP_GSTREAMER, gst_pipeline),
                 (cv2.CAP_FFMPEG, self.stream_url),
@@ -208,7 +477,21 @@ class StreamProcessor:
             logger.info("   Versuche Backend: GStreamer...")
             for backend, source in backends:
                 try:
-                    self.cap = cv2.VideoCapture(source, backend)
+                    params = []
+                    if backend == cv2.CAP_FFMPEG and hasattr(cv2, "CAP_PROP_READ_TIMEOUT_MSEC"):
+                        # Hängende Reads brechen nach timeout ab statt den Lock ewig zu halten
+                        params += [
+                            cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, self.timeout * 1000,
+                            cv2.CAP_PROP_READ_TIMEOUT_MSEC, self.timeout * 1000
+                        ]
+                    if backend == cv2.CAP_FFMPEG and self.decode_threads > 0 and hasattr(cv2, "CAP_PROP_N_THREADS"):
+                        params += [cv2.CAP_PROP_N_THREADS, self.decode_threads]
+                    if params:
+                        self.cap = cv2.VideoCapture(source, backend, params)
+                    else:
+                        self.cap = cv2.VideoCapture(source, backend)
+                    if backend == cv2.CAP_FFMPEG:
+                        self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
                     
                     # Warte kurz auf Verbindung
                     import time
@@ -219,9 +502,15 @@ class StreamProcessor:
                         # Test-Frame lesen mit Timeout
                         ret, frame = self.cap.read()
                         if ret and frame is not None:
-                            logger.info(f"✅ Stream-Verbindung erfolgreich (Backend: {backend})")
+                            self.capture_backend = "GStreamer" if backend == cv2.CAP_GSTREAMER else "FFMPEG"
+                            self.pipeline = source
+                            logger.info(f"✅ Stream-Verbindung erfolgreich (Backend: {self.capture_backend})")
                             logger.info(f"   Frame-Size: {frame.shape[1]}x{frame.shape[0]}")
+                            if self.debug:
+                                logger.debug(f"   Pipeline: {self.pipeline}")
                             self.connected = True
+                            self.last_frame_time = time.time()
+                            self.waiting_since = None
                             
                             # AI-Model laden
                             if not self.model_loaded:
@@ -249,21 +538,43 @@ class StreamProcessor:
     
     def disconnect(self):
         """
-        Trennt Stream-Verbindung.
+        Trennt Stream-Verbindung bewusst (z.B. für die HD-Aufnahme). Der
+        Watchdog endet und verbindet erst nach dem nächsten connect() wieder.
         """
-        self.stop_event.set()
+        self.closed.set()
         
+        # Laufenden Reconnect/Remote-Neustart abwarten - danach greift der Watchdog nicht mehr ein
+        watchdog = self.watchdog_thread
+        if watchdog and watchdog.is_alive() and watchdog is not threading.current_thread():
+            watchdog.join(WATCHDOG_STOP_TIMEOUT)
+            if watchdog.is_alive():
+                logger.warning(f"Watchdog nach {WATCHDOG_STOP_TIMEOUT:.0f}s noch aktiv")
+        
+        with self.lock:
+            self._close()
+        logger.info("Stream-Verbindung getrennt")
+    
+    def _close(self):
+        """Gibt die Capture frei (Aufrufer hält self.lock)."""
         if self.cap:
+            # Decoder-Zähler über Verbindungen hinweg aufsummieren
+            if hasattr(self.cap, "get_decoder_statistics"):
+                for mode, values in self.cap.get_decoder_statistics().items():
+                    for key, value in values.items():
+                        self.decoder_totals[mode][key] += value
             self.cap.release()
             self.cap = None
         
         self.connected = False
-        logger.info("Stream-Verbindung getrennt")
     
     def read_frame(self) -> Tuple[bool, Optional[np.ndarray]]:
         """
         Liest einen Frame vom Stream.
         
+        Mit pixel_format GRAY8 bleibt das Frame einkanalig; Tracker und
+        Leerlauf-Vergleich arbeiten direkt darauf, erst detect_objects
+        erweitert es für YOLO auf drei Kanäle.
+        
         Returns:
             (success, frame) Tuple
         """
@@ -271,24 +582,115 @@ class StreamProcessor:
             return False, None
         
         try:
-            ret, frame = self.cap.read()
+            start_time = time.time()
+            # Stall-Zeit zählt nur, solange tatsächlich gelesen wird (nicht z.B. im Cooldown)
+            if self.waiting_since is None or start_time - self.last_read_end >= self.stall_timeout:
+                self.waiting_since = start_time
+            self.read_started = start_time
+            try:
+                ret, frame = self.cap.read()
+            finally:
+                self.read_started = None
+                self.last_read_end = time.time()
             
             if not ret or frame is None:
                 logger.warning("Konnte Frame nicht lesen")
                 return False, None
             
+            # FFMPEG-Fallback liefert volle Größe/Farbe - in Python nachziehen
+            if self.capture_backend == "FFMPEG":
+                if (frame.shape[1], frame.shape[0]) != self.output_size:
+                    frame = cv2.resize(frame, self.output_size, interpolation=cv2.INTER_AREA)
+                if self.pixel_format == "GRAY8" and frame.ndim == 3:
+                    frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            
+            self.last_frame_time = time.time()
+            self.waiting_since = None
+            
+            # Kosten pro Frame (Decode + Konvertierung) als gleitender Mittelwert
+            read_time = time.time() - start_time
+            self.avg_read_time = read_time if self.avg_read_time == 0 else 0.9 * self.avg_read_time + 0.1 * read_time
+            
             return True, frame
             
         except Exception as e:
             logger.error(f"Fehler beim Lesen des Frames: {e}")
             return False, None
     
+    def _predict(self, model: Any, frame: np.ndarray, conf: float, imgsz: int) -> list:
+        """
+        Führt eine Inferenz durch und gibt die Vogel-Detektionen zurück.
+        
+        Returns:
+            Liste von Detection-Dictionaries (class_id, class_name, confidence, bbox)
+        """
+        results = model(
+            frame,
+            verbose=False,
+            conf=conf,
+            iou=self.iou,
+            max_det=self.max_det,  # Limitiere Detektionen für Performance
+            imgsz=imgsz            # CPU-Optimierung: Auflösung aus Inferenz-Profil
+        )
+        self.inference_calls += 1
+        
+        detections = []
+        for result in results:
+            for box in result.boxes:
+                cls_id = int(box.cls[0])
+                
+                # Prüfe ob Vogel (bird-species/yolov8: nur class 14)
+                if self.model_type in ("bird-species", "yolov8") and cls_id != self.bird_class_id:
+                    continue
+                
+                # Bounding Box
+                x1, y1, x2, y2 = box.xyxy[0].tolist()
+                
+                detections.append({
+                    "class_id": cls_id,
+                    "class_name": result.names[cls_id],
+                    "confidence": float(box.conf[0]),
+                    "bbox": [int(x1), int(y1), int(x2), int(y2)]
+                })
+        
+        return detections
+    
+    def _detect_cascade(self, frame: np.ndarray) -> Tuple[list, str]:
+        """
+        Zwei-Stufen-Kaskade: Screening mit dem Hauptmodell bei screen_imgsz,
+        Zweitmodell nur im unsicheren Konfidenz-Band.
+        
+        Returns:
+            (detections, stage) - stage: screen_positive, screen_negative oder stage2
+        """
+        stats = self.cascade_stats
+        
+        start_time = time.time()
+        screen = self._predict(self.model, frame, self.cascade_low, self.screen_imgsz)
+        stats["screen_time"] += time.time() - start_time
+        
+        best = max((d["confidence"] for d in screen), default=0.0)
+        if best >= self.cascade_high:
+            stats["screen_positive"] += 1
+            return screen, "screen_positive"
+        if best < self.cascade_low:
+            stats["screen_negative"] += 1
+            return [], "screen_negative"
+        
+        stats["ambiguous"] += 1
+        start_time = time.time()
+        detections = self._predict(self.cascade, frame, self.threshold, self.imgsz)
+        stats["stage2_time"] += time.time() - start_time
+        if detections:
+            stats["stage2_positive"] += 1
+        return detections, "stage2"
+    
     def detect_objects(self, frame: np.ndarray) -> Tuple[bool, Dict[str, Any]]:
         """
-        Führt Objekterkennung auf Frame durch.
+        Führt Objekterkennung auf Frame durch (einstufig oder als Kaskade).
         
         Args:
-            frame: Input-Frame (BGR-Format)
+            frame: Input-Frame (BGR oder Graustufen)
             
         Returns:
             (bird_detected, detection_info) Tuple
@@ -298,16 +700,15 @@ class StreamProcessor:
         
         start_time = time.time()
         
+        # YOLO erwartet 3 Kanäle - GRAY8 erst hier und nur für Inferenz-Frames erweitern
+        if frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        
         try:
-            # YOLOv8-Inferenz mit CPU-Optimierung
-            results = self.model(
-                frame,
-                verbose=False,
-                conf=self.threshold,
-                iou=0.45,
-                max_det=5,  # Limitiere Detektionen für Performance
-                imgsz=640   # CPU-Optimierung: Kleinere Inferenz-Auflösung (statt 640)
-            )
+            if self.cascade:
+                detections, stage = self._detect_cascade(frame)
+            else:
+                detections, stage = self._predict(self.model, frame, self.threshold, self.imgsz), "single"
             
             inference_time = time.time() - start_time
             
@@ -317,42 +718,14 @@ class StreamProcessor:
             else:
                 self.avg_inference_time = 0.9 * self.avg_inference_time + 0.1 * inference_time
             
-            # Parse Ergebnisse
-            bird_detected = False
-            detections = []
-            
-            for result in results:
-                boxes = result.boxes
-                
-                for box in boxes:
-                    cls_id = int(box.cls[0])
-                    conf = float(box.conf[0])
-                    
-                    # Prüfe ob Vogel (bird-species: nur class 14)
-                    if self.model_type == "bird-species" and cls_id != self.bird_class_id:
-                        continue
-                    
-                    # Bei YOLOv8: auch nur Vögel
-                    if self.model_type == "yolov8" and cls_id != self.bird_class_id:
-                        continue
-                    
-                    bird_detected = True
-                    
-                    # Bounding Box
-                    x1, y1, x2, y2 = box.xyxy[0].tolist()
-                    
-                    detections.append({
-                        "class_id": cls_id,
-                        "class_name": result.names[cls_id],
-                        "confidence": conf,
-                        "bbox": [int(x1), int(y1), int(x2), int(y2)]
-                    })
+            bird_detected = len(detections) > 0
             
             detection_info = {
                 "bird_detected": bird_detected,
                 "num_detections": len(detections),
                 "detections": detections,
                 "inference_time": inference_time,
+                "stage": stage,
                 "timestamp": time.time()
             }
             
@@ -366,6 +739,206 @@ class StreamProcessor:
             logger.error(f"Fehler bei Objekterkennung: {e}")
             return False, {}
     
+    def detect_or_track(self, frame: np.ndarray) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Detect-then-Track: Verfolgt die letzten Boxen zwischen den Inferenzen
+        und erkennt nur jedes detect_interval-te Frame oder bei verlorenem Track neu.
+        
+        Args:
+            frame: Input-Frame (BGR oder Graustufen)
+            
+        Returns:
+            (bird_detected, detection_info) Tuple wie detect_objects
+        """
+        bird_detected, info = self._detect_or_track(frame)
+        self.last_bird_detected = bird_detected
+        return bird_detected, info
+    
+    def _motion_skip(self) -> bool:
+        """
+        Prüft ob YOLO für dieses Frame übersprungen werden kann: nur im Leerlauf
+        (kein Vogel im letzten Frame) und wenn die Bewegungsvektoren keine
+        Aktivität in der ROI zeigen. I-Frames (Score None) werden immer erkannt.
+        """
+        if self.motion_gate is None or self.last_bird_detected:
+            return False
+        
+        score = getattr(self.cap, "motion_score", None)
+        if score is None or score >= self.motion_gate or self.motion_skip_run >= self.motion_max_skip:
+            self.motion_skip_run = 0
+            return False
+        
+        self.motion_skip_run += 1
+        self.motion_skipped += 1
+        return True
+    
+    def _detect_or_track(self, frame: np.ndarray) -> Tuple[bool, Dict[str, Any]]:
+        if self._motion_skip():
+            return False, {
+                "bird_detected": False,
+                "num_detections": 0,
+                "detections": [],
+                "inference_time": 0.0,
+                "stage": "motion_skip",
+                "motion_score": self.cap.motion_score,
+                "timestamp": time.time()
+            }
+        
+        if self.tracker is None:
+            return self.detect_objects(frame)
+        
+        if self.tracker.active and self.frames_since_detection < self.detect_interval - 1:
+            tracked, detections = self.tracker.update(frame)
+            if tracked:
+                self.frames_since_detection += 1
+                self.tracked_frames += 1
+                self.birds_detected += 1
+                self.last_detection_time = time.time()
+                return True, {
+                    "bird_detected": True,
+                    "num_detections": len(detections),
+                    "detections": detections,
+                    "inference_time": 0.0,
+                    "tracked": True,
+                    "timestamp": time.time()
+                }
+            if self.debug:
+                logger.debug("🔎 Tracking verloren, erkenne neu")
+        
+        bird_detected, info = self.detect_objects(frame)
+        self.frames_since_detection = 0
+        
+        if bird_detected:
+            self.tracker.start(frame, info["detections"])
+        else:
+            self.tracker.reset()
+        
+        return bird_detected, info
+    
+    def _start_watchdog(self):
+        """Startet den Watchdog-Thread (einmal pro Verbindungsphase)."""
+        if self.watchdog_thread and self.watchdog_thread.is_alive():
+            return
+        self.watchdog_thread = threading.Thread(target=self._watchdog_loop, name="stream-watchdog", daemon=True)
+        self.watchdog_thread.start()
+    
+    def _watchdog_loop(self):
+        """
+        Prüft unabhängig vom Lese-Thread, ob ein Lesevorgang auf Frames wartet -
+        ein in cap.read() hängender Stream liefert sonst nie ein Ergebnis.
+        Endet nach bewusstem disconnect().
+        """
+        interval = min(1.0, self.stall_timeout / 2)
+        while not self.closed.wait(interval):
+            try:
+                self._watchdog()
+            except Exception as e:
+                logger.error(f"Watchdog-Fehler: {e}")
+    
+    def _stalled(self, now: float) -> bool:
+        """
+        True wenn der Lese-Thread seit stall_timeout vergeblich auf ein Frame
+        wartet: ein cap.read() hängt oder die Lesevorgänge schlagen laufend
+        fehl. Liest niemand (Cooldown, Aufnahme), gilt der Stream nicht als hängend.
+        """
+        if self.waiting_since is None:
+            return False
+        reading = self.read_started is not None or now - self.last_read_end < self.stall_timeout
+        return reading and now - self.waiting_since >= self.stall_timeout
+    
+    def _watchdog(self):
+        """
+        Stall-Watchdog: Reconnect wenn ein Lesevorgang seit stall_timeout kein
+        gültiges Frame liefert, mit exponentiellem Backoff (±50% Jitter). Nach
+        restart_after Fehlversuchen wird der Stream über restart_callback neu
+        gestartet. Nach bewusstem disconnect() ist der Watchdog inaktiv.
+        """
+        now = time.time()
+        if self.closed.is_set():
+            return
+        # Nach einem fehlgeschlagenen Reconnect liest niemand mehr - weiter mit Backoff
+        if self.stall_started is None and not self._stalled(now):
+            return
+        if now < self.next_reconnect_time:
+            return
+        
+        if self.stall_started is None:
+            self.stall_started = self.waiting_since
+            self.stalls += 1
+            logger.warning(f"⚠️  Stream hängt seit {now - self.waiting_since:.1f}s - starte Reconnect")
+        
+        self.reconnect_attempts += 1
+        # process_frame() liest nicht weiter, bis der Reconnect durch ist
+        self.reconnect_pending.set()
+        try:
+            # Neustart auf dem Pi dauert ~10s - ohne Lock, Lese-Thread bleibt frei.
+            # disconnect() wartet auf den Watchdog, eine laufende HD-Aufnahme wird nie getroffen
+            if self.closed.is_set():
+                return
+            if self.restart_callback and self.reconnect_attempts % self.restart_after == 0:
+                logger.warning("🔄 Starte Stream auf dem Raspberry Pi neu...")
+                try:
+                    self.restart_callback()
+                    self.remote_restarts += 1
+                except Exception as e:
+                    logger.error(f"Remote-Neustart fehlgeschlagen: {e}")
+            
+            # Wartet höchstens timeout Sekunden auf einen hängenden Read
+            with self.lock:
+                if self.closed.is_set():
+                    return
+                self._close()
+                reconnected = self._open()
+        finally:
+            self.reconnect_pending.clear()
+        
+        if reconnected:
+            recovery_time = time.time() - self.stall_started
+            self.recovery_times.append(recovery_time)
+            logger.info(f"✅ Stream wiederhergestellt nach {recovery_time:.1f}s ({self.reconnect_attempts} Versuche)")
+            self.stall_started = None
+            self.reconnect_attempts = 0
+            self.next_reconnect_time = 0.0
+            return
+        
+        delay = min(self.reconnect_max_delay, 2 ** (self.reconnect_attempts - 1))
+        delay *= random.uniform(0.5, 1.5)
+        self.next_reconnect_time = time.time() + delay
+        logger.warning(f"   Reconnect fehlgeschlagen (Versuch {self.reconnect_attempts}), nächster in {delay:.1f}s")
+    
+    def _update_decode_mode(self, frame: np.ndarray, bird_detected: bool, now: float):
+        """
+        Wechselt zwischen Keyframe-Decode (Leerlauf) und vollem Decode.
+        
+        Im Keyframe-Modus gilt ein Vogel oder eine deutliche Änderung gegenüber
+        dem letzten Keyframe als Aktivität, im vollen Modus ein Vogel oder
+        Bewegungsvektoren über activity_threshold.
+        """
+        if not self.idle_keyframes or not self.cap:
+            return
+        
+        if self.cap.keyframe_only:
+            gray = frame if frame.ndim == 2 else cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            small = cv2.resize(gray, (80, 60), interpolation=cv2.INTER_AREA)
+            changed = 0.0
+            if self._idle_reference is not None:
+                changed = float(np.mean(cv2.absdiff(small, self._idle_reference) > 25))
+            self._idle_reference = small
+            
+            if bird_detected or changed >= self.activity_threshold:
+                logger.info(f"🔓 Aktivität erkannt ({changed * 100:.1f}% Änderung) - voller Decode")
+                self.cap.set_keyframe_only(False)
+                self.last_activity_time = now
+            return
+        
+        motion = self.cap.motion_score
+        if bird_detected or (motion is not None and motion >= self.activity_threshold):
+            self.last_activity_time = now
+        elif now - self.last_activity_time >= self.idle_timeout:
+            logger.info(f"💤 {self.idle_timeout:.0f}s ohne Aktivität - nur noch Keyframes")
+            self._idle_reference = None
+            self.cap.set_keyframe_only(True)
+    
     def process_frame(self) -> bool:
         """
         Verarbeitet einen Frame: Lesen + Objekterkennung.
@@ -374,8 +947,13 @@ class StreamProcessor:
         Returns:
             True wenn Vogel konsistent erkannt (Trigger-Bedingung erfüllt), sonst False
         """
+        # Während der Watchdog neu verbindet nicht um den Lock konkurrieren
+        if self.reconnect_pending.is_set() or not self.connected:
+            time.sleep(0.1)
+            return False
+        
         with self.lock:
-            # Frame lesen
+            # Frame lesen (Stall-Erkennung läuft im Watchdog-Thread)
             ret, frame = self.read_frame()
             
             if not ret or frame is None:
@@ -384,11 +962,14 @@ class StreamProcessor:
             self.frames_processed += 1
             current_time = time.time()
             
-            # Objekterkennung
-            bird_detected, info = self.detect_objects(frame)
+            # Objekterkennung (oder Tracking zwischen den Inferenzen)
+            bird_detected, info = self.detect_or_track(frame)
+            self._update_decode_mode(frame, bird_detected, current_time)
             
             # Aktualisiere Detection-History
             self.detection_history.append((current_time, bird_detected))
+            if bird_detected and not info.get("tracked"):
+                self.trigger_detections.append(info.get("detections", []))
             
             # Bereinige alte Einträge (älter als trigger_duration)
             self.detection_history = [
@@ -419,9 +1000,11 @@ class StreamProcessor:
                             if self.debug:
                                 logger.debug(f"✅ TRIGGER! Vogel konsistent erkannt ({detection_duration:.1f}s, {detection_rate*100:.0f}% Rate)")
                             
-                            # Reset für nächsten Trigger
+                            # Zusammenfassung für Archiv-Index, dann Reset für nächsten Trigger
+                            self.last_trigger = self._summarize_trigger(detection_duration, detection_rate)
                             self.first_detection_time = None
                             self.detection_history.clear()
+                            self.trigger_detections = []
                             return True
                     
                     return False
@@ -436,9 +1019,34 @@ class StreamProcessor:
                     if self.debug:
                         logger.debug(f"❌ Vogel-Erkennung verloren (war {current_time - self.first_detection_time:.1f}s)")
                     self.first_detection_time = None
+                    self.trigger_detections = []
                 
                 return False
     
+    def _summarize_trigger(self, duration: float, rate: float) -> Dict[str, Any]:
+        """
+        Fasst die Erkennungen bis zum Trigger zusammen (Konfidenz, Klassen).
+        
+        Returns:
+            Dictionary mit confidence (max), mean_confidence, detection_frames,
+            classes (Name -> Anzahl), duration_s, detection_rate
+        """
+        confidences = []
+        classes: Dict[str, int] = {}
+        for detections in self.trigger_detections:
+            for detection in detections:
+                confidences.append(detection["confidence"])
+                name = detection.get("class_name", "bird")
+                classes[name] = classes.get(name, 0) + 1
+        return {
+            "confidence": max(confidences) if confidences else None,
+            "mean_confidence": sum(confidences) / len(confidences) if confidences else None,
+            "detection_frames": len(self.trigger_detections),
+            "classes": classes,
+            "duration_s": duration,
+            "detection_rate": rate
+        }
+    
     def get_statistics(self) -> Dict[str, Any]:
         """
         Gibt Statistiken zurück.
@@ -450,14 +1058,74 @@ class StreamProcessor:
         
         return {
             "connected": self.connected,
+            "capture_backend": self.capture_backend,
+            "pipeline": self.pipeline,
+            "output_size": self.output_size,
+            "avg_read_time": self.avg_read_time,
+            "stalls": self.stalls,
+            "remote_restarts": self.remote_restarts,
+            "stalled": self.stall_started is not None,
+            "last_time_to_recover": self.recovery_times[-1] if self.recovery_times else None,
+            "avg_time_to_recover": sum(self.recovery_times) / len(self.recovery_times) if self.recovery_times else None,
+            "max_time_to_recover": max(self.recovery_times) if self.recovery_times else None,
             "model_loaded": self.model_loaded,
             "frames_processed": self.frames_processed,
             "birds_detected": self.birds_detected,
             "avg_inference_time": self.avg_inference_time,
+            "inference_calls": self.inference_calls,
+            "tracked_frames": self.tracked_frames,
+            "cascade": self.get_cascade_statistics(),
+            "motion_skipped": self.motion_skipped,
+            "decoder": self.get_decoder_statistics(),
+            "inference_profile": f"{self.profile['backend']}/{self.profile['threads'] or 'auto'}T/{self.imgsz}px",
             "last_detection": self.last_detection_time,
             "uptime": uptime
         }
     
+    def get_decoder_statistics(self) -> Optional[Dict[str, Any]]:
+        """
+        Gibt die Decoder-CPU-Zeit getrennt nach vollem Decode und Keyframe-Decode zurück.
+        
+        Returns:
+            Dictionary {full|keyframe: ...} oder None beim OpenCV-Decoder
+        """
+        if self.decoder != "pyav":
+            return None
+        
+        totals = {mode: dict(values) for mode, values in self.decoder_totals.items()}
+        if hasattr(self.cap, "get_decoder_statistics"):
+            for mode, values in self.cap.get_decoder_statistics().items():
+                for key, value in values.items():
+                    totals[mode][key] += value
+        return summarize_decoder_statistics(totals)
+    
+    def get_cascade_statistics(self) -> Optional[Dict[str, Any]]:
+        """
+        Gibt Trefferquoten pro Kaskaden-Stufe und mittlere Kosten pro Frame zurück.
+        
+        Returns:
+            Dictionary mit Statistiken oder None wenn keine Kaskade aktiv ist
+        """
+        if not self.cascade_model_path:
+            return None
+        
+        stats = self.cascade_stats
+        screened = stats["screen_positive"] + stats["screen_negative"] + stats["ambiguous"]
+        if screened == 0:
+            return dict(stats, screened=0, mean_cost_ms=0.0)
+        
+        return dict(
+            stats,
+            screened=screened,
+            screen_positive_rate=stats["screen_positive"] / screened,
+            screen_negative_rate=stats["screen_negative"] / screened,
+            ambiguous_rate=stats["ambiguous"] / screened,
+            stage2_positive_rate=stats["stage2_positive"] / stats["ambiguous"] if stats["ambiguous"] else 0.0,
+            mean_screen_ms=stats["screen_time"] / screened * 1000,
+            mean_stage2_ms=stats["stage2_time"] / stats["ambiguous"] * 1000 if stats["ambiguous"] else 0.0,
+            mean_cost_ms=(stats["screen_time"] + stats["stage2_time"]) / screened * 1000
+        )
+    
     def __enter__(self):
         """Context manager entry."""
         self.connect()
@@ -498,6 +1166,15 @@ if __name__ == "__main__":
     parser.add_argument("--model", default="bird-species", help="AI Model Type")
     parser.add_argument("--threshold", type=float, default=0.55, help="Detection Threshold")
     parser.add_argument("--duration", type=int, default=60, help="Test Duration (seconds)")
+    parser.add_argument("--detect-interval", type=int, default=1, help="Inference every N frames while tracking")
+    parser.add_argument("--tracker", default="template", help="Tracker Type (template, kcf, csrt, mil)")
+    parser.add_argument("--cascade-model", help="Second-stage model for the ambiguous band (e.g. yolov8s.pt)")
+    parser.add_argument("--decoder", default="opencv", choices=["opencv", "pyav"], help="Stream Decoder")
+    parser.add_argument("--motion-gate", type=float, help="Skip YOLO below this moving ROI fraction (pyav only)")
+    parser.add_argument("--idle-keyframes", action="store_true", help="Decode keyframes only while idle (pyav)")
+    parser.add_argument("--pixel-format", default="BGR", choices=["BGR", "GRAY8"], help="Pipeline Output Format")
+    parser.add_argument("--decode-threads", type=int, default=0, help="H.264 Decoder Threads (0 = auto)")
+    parser.add_argument("--no-scale", action="store_true", help="Keep stream size instead of scaling to imgsz")
     parser.add_argument("--debug", action="store_true", help="Debug Mode")
     
     args = parser.parse_args()
@@ -517,7 +1194,16 @@ if __name__ == "__main__":
         port=args.port,
         model_type=args.model,
         threshold=args.threshold,
-        debug=args.debug
+        debug=args.debug,
+        detect_interval=args.detect_interval,
+        tracker_type=args.tracker,
+        cascade_model=args.cascade_model,
+        decoder=args.decoder,
+        motion_gate=args.motion_gate,
+        idle_keyframes=args.idle_keyframes,
+        scale_to_imgsz=not args.no_scale,
+        pixel_format=args.pixel_format,
+        decode_threads=args.decode_threads
     )
     
     if processor.connect():
@@ -547,6 +1233,25 @@ if __name__ == "__main__":
             stats = processor.get_statistics()
             print(f"Frames verarbeitet: {stats['frames_processed']}")
             print(f"Vögel erkannt: {stats['birds_detected']}")
+            print(f"Inferenzen: {stats['inference_calls']} (getrackt: {stats['tracked_frames']})")
+            if stats['motion_skipped'] > 0:
+                print(f"Übersprungen (keine Bewegung): {stats['motion_skipped']}")
+            if stats['decoder']:
+                for mode, dec in stats['decoder'].items():
+                    if dec['frames'] > 0:
+                        print(f"Decoder {mode}: {dec['frames']} Frames, {dec['cpu_ms_per_frame']:.1f}ms Prozess-CPU/Frame, "
+                              f"{dec['cpu_load'] * 100:.1f}% Prozess-CPU")
+            cascade = stats['cascade']
+            if cascade and cascade['screened'] > 0:
+                print(f"Kaskade: {cascade['screen_positive_rate']*100:.0f}% sicher positiv, "
+                      f"{cascade['screen_negative_rate']*100:.0f}% sicher negativ, "
+                      f"{cascade['ambiguous_rate']*100:.0f}% Stufe 2 ({cascade['stage2_positive_rate']*100:.0f}% positiv)")
+                print(f"Ø Kosten/Frame: {cascade['mean_cost_ms']:.1f}ms "
+                      f"(Screen {cascade['mean_screen_ms']:.1f}ms, Stufe 2 {cascade['mean_stage2_ms']:.1f}ms)")
+            if stats['stalls'] > 0:
+                print(f"Stream-Ausfälle: {stats['stalls']} (Ø Wiederherstellung {stats['avg_time_to_recover'] or 0:.1f}s)")
+            if stats['avg_read_time'] > 0:
+                print(f"Durchschn. Frame-Kosten ({stats['capture_backend']}): {stats['avg_read_time']*1000:.1f}ms")
             if stats['avg_inference_time'] > 0:
                 print(f"Durchschn. Inferenz-Zeit: {stats['avg_inference_time']*1000:.1f}ms")
             print("=" * 70)
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Netzwerk-Messungen zwischen Client und Raspberry Pi
+===================================================
+
+Einzelne Messfunktionen für Latenz und Durchsatz. Werden vom
+Netzwerkqualitäts-Test (test-network-quality.py) und vom Transfer-Scheduler
+(python-skripte/transfer_scheduler.py) verwendet.
+
+Verwendung:
+    from network_probes import ping_latency, scp_throughput
+
+    latency = ping_latency("raspberrypi.local", count=5)
+    print(latency["avg"])  # ms
+"""
+
+import os
+import time
+import tempfile
+import subprocess
+from typing import Any, Dict, List, Optional
+
+
+def ping_latency(hostname: str, count: int = 20, interval: float = 0.2,
+                 timeout: float = 10) -> Optional[Dict[str, Any]]:
+    """
+    Latenz per ping.
+
+    Returns:
+        {min, avg, max} in ms, transmitted/received und die Zusammenfassungs-Zeile;
+        None, wenn ping fehlschlägt
+    """
+    result = subprocess.run(["ping", "-c", str(count), "-i", str(interval), hostname],
+                            capture_output=True, text=True, timeout=timeout)
+    if result.returncode != 0:
+        return None
+
+    latency: Dict[str, Any] = {}
+    for line in result.stdout.split('\n'):
+        if 'packets transmitted' in line:
+            latency['summary'] = line.strip()
+            parts = line.split(',')
+            latency['transmitted'] = int(parts[0].split()[0])
+            latency['received'] = int(parts[1].split()[0])
+        elif 'rtt min/avg/max/mdev' in line or 'min/avg/max' in line:
+            parts = line.split('=')
+            if len(parts) > 1:
+                times = parts[1].strip().split()[0]
+                min_t, avg_t, max_t = times.split('/')[:3]
+                latency.update(min=float(min_t), avg=float(avg_t), max=float(max_t))
+    return latency if 'avg' in latency else None
+
+
+def ssh_connect_times(remote_host: Dict[str, Any], attempts: int = 5) -> List[float]:
+    """Dauer des SSH-Verbindungsaufbaus in ms (pro Versuch)."""
+    import paramiko
+
+    times = []
+    for _ in range(attempts):
+        start = time.time()
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect(
+            remote_host['hostname'],
+            username=remote_host['username'],
+            key_filename=remote_host['key_filename'],
+            timeout=10
+        )
+        ssh.close()
+        times.append((time.time() - start) * 1000)
+    return times
+
+
+def scp_throughput(ssh, size_mb: float = 10, upload: bool = True) -> Dict[str, float]:
+    """
+    Durchsatz per SCP über eine bestehende SSH-Verbindung.
+
+    Ohne Upload wird die Testdatei auf dem Pi erzeugt (nur Download wird gemessen).
+
+    Returns:
+        download_s, download_mb_s und ggf. upload_s, upload_mb_s
+    """
+    from scp import SCPClient
+
+    size_bytes = int(size_mb * 1024 * 1024)
+    remote_test_file = f"/tmp/network_test_{int(time.time())}.dat"
+    result: Dict[str, float] = {}
+
+    with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
+        tmp_path = tmp_file.name
+        if upload:
+            tmp_file.write(os.urandom(size_bytes))
+    download_path = tmp_path + ".download"
+
+    scp = SCPClient(ssh.get_transport())
+    try:
+        if upload:
+            start = time.time()
+            scp.put(tmp_path, remote_test_file)
+            result['upload_s'] = time.time() - start
+            result['upload_mb_s'] = size_mb / result['upload_s'] if result['upload_s'] > 0 else 0
+        else:
+            _, stdout, _ = ssh.exec_command(
+                f"head -c {size_bytes} /dev/urandom > {remote_test_file}")
+            stdout.channel.recv_exit_status()
+
+        start = time.time()
+        scp.get(remote_test_file, download_path)
+        result['download_s'] = time.time() - start
+        result['download_mb_s'] = size_mb / result['download_s'] if result['download_s'] > 0 else 0
+    finally:
+        scp.close()
+        ssh.exec_command(f"rm -f {remote_test_file}")
+        for path in (tmp_path, download_path):
+            if os.path.exists(path):
+                os.remove(path)
+    return result
+
+
+def command_latency(ssh, runs: int = 5) -> List[float]:
+    """Dauer eines einfachen Remote-Befehls in ms (pro Lauf)."""
+    times = []
+    for _ in range(runs):
+        start = time.time()
+        stdin, stdout, stderr = ssh.exec_command("echo 'test'")
+        stdout.read()
+        times.append((time.time() - start) * 1000)
+    return times
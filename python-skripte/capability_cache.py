@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Lokaler Cache für Remote-Fähigkeiten
+====================================
+
+Speichert pro Host, was die Aufnahme-Skripte sonst bei jedem Lauf per SSH
+neu ermitteln: USB-Audio-Gerät, verfügbare AI-Modelle, vorhandene Skripte
+und Modell-Dateien. Jeder Eintrag hat einen Zeitstempel und läuft nach der
+TTL ab; einzelne Einträge oder der ganze Host können explizit verworfen
+werden (z.B. nach einer fehlgeschlagenen Audio-Aufnahme).
+
+Speicherort: ~/.cache/vogel-kamera/capabilities.json
+
+Verwendung:
+    from capability_cache import CapabilityCache
+
+    cache = CapabilityCache(remote_host['hostname'])
+    audio_device = cache.fetch("audio_device", get_usb_audio_device_remote)
+
+    # Kommandozeile
+    python capability_cache.py --show
+    python capability_cache.py --invalidate
+"""
+
+import os
+import json
+import time
+import argparse
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+DEFAULT_CACHE_PATH = Path.home() / ".cache" / "vogel-kamera" / "capabilities.json"
+DEFAULT_TTL = 24 * 3600  # 24 Stunden
+
+
+class CapabilityCache:
+    """
+    Fähigkeiten eines Remote-Hosts mit TTL pro Eintrag.
+    """
+
+    def __init__(self, hostname: str, path: Optional[Path] = None, ttl: float = DEFAULT_TTL):
+        """
+        Args:
+            hostname: Remote-Host (Schlüssel im Cache)
+            path: Cache-Datei (default: ~/.cache/vogel-kamera/capabilities.json)
+            ttl: Gültigkeit eines Eintrags in Sekunden
+        """
+        self.hostname = hostname
+        self.path = Path(path) if path else DEFAULT_CACHE_PATH
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: dict):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Gibt einen gültigen Eintrag zurück, sonst default."""
+        entry = self._load().get(self.hostname, {}).get(key)
+        if entry is None or time.time() - entry["time"] > self.ttl:
+            return default
+        return entry["value"]
+
+    def set(self, key: str, value: Any):
+        data = self._load()
+        data.setdefault(self.hostname, {})[key] = {"value": value, "time": time.time()}
+        self._save(data)
+
+    def fetch(self, key: str, loader: Callable[[], Any], cache_negative: bool = True) -> Any:
+        """
+        Gibt den gecachten Wert zurück oder ermittelt ihn über loader().
+
+        None-Ergebnisse (z.B. kein Audio-Gerät) werden ebenfalls gecacht.
+        Mit cache_negative=False werden leere Ergebnisse (False/None) nicht
+        gespeichert - z.B. für Datei-Prüfungen, damit eine nachträglich
+        angelegte Datei nicht bis zum Ablauf der TTL als fehlend gilt.
+        """
+        entry = self._load().get(self.hostname, {}).get(key)
+        if entry is not None and time.time() - entry["time"] <= self.ttl:
+            self.hits += 1
+            return entry["value"]
+
+        self.misses += 1
+        value = loader()
+        if value or cache_negative:
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key: Optional[str] = None):
+        """Verwirft einen Eintrag oder (ohne key) alle Einträge des Hosts."""
+        data = self._load()
+        if key is None:
+            data.pop(self.hostname, None)
+        else:
+            data.get(self.hostname, {}).pop(key, None)
+        self._save(data)
+
+    def entries(self) -> dict:
+        """Alle Einträge des Hosts mit Alter in Sekunden."""
+        now = time.time()
+        return {
+            key: {"value": entry["value"], "age": now - entry["time"], "valid": now - entry["time"] <= self.ttl}
+            for key, entry in self._load().get(self.hostname, {}).items()
+        }
+
+
+def main():
+    from config import config
+
+    parser = argparse.ArgumentParser(description="Cache für Remote-Fähigkeiten (Audio-Gerät, AI-Modelle, Skripte)")
+    parser.add_argument("--host", default=config.hostname, help="Remote-Host (default: aus .env)")
+    parser.add_argument("--show", action="store_true", help="Einträge anzeigen")
+    parser.add_argument("--invalidate", nargs="?", const="", metavar="KEY",
+                        help="Eintrag (oder ohne KEY alle) des Hosts verwerfen")
+    args = parser.parse_args()
+
+    cache = CapabilityCache(args.host)
+
+    if args.invalidate is not None:
+        cache.invalidate(args.invalidate or None)
+        print(f"🗑️  Cache verworfen: {args.host} {args.invalidate or '(alle Einträge)'}")
+        return
+
+    entries = cache.entries()
+    if not entries:
+        print(f"ℹ️  Keine Einträge für {args.host} ({cache.path})")
+        return
+
+    print(f"📦 Fähigkeiten von {args.host}:")
+    for key, entry in sorted(entries.items()):
+        status = "🟢" if entry["valid"] else "⏰"
+        print(f"   {status} {key}: {entry['value']} (vor {entry['age'] / 3600:.1f}h)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Prüfsummen-Manifest pro Aufnahme-Verzeichnis
+============================================
+
+Beim Kopieren vom Pi wird die SHA-256-Prüfsumme auf beiden Seiten berechnet,
+während die Bytes fließen: auf dem Pi per sha256sum (gleichzeitig zur
+Übertragung gestartet), lokal in der Schreibschleife. Stimmen beide überein,
+landet die Prüfsumme in SHA256SUMS neben den Dateien - ohne zweiten
+Lesedurchlauf über mehrere GB. Erst danach darf die Datei auf dem Pi
+gelöscht werden.
+
+Das Format entspricht sha256sum, die Prüfung geht also auch ohne Python:
+    cd ~/Videos/Vogelhaus/AI-HAD/2025/38/<Zeitstempel> && sha256sum -c SHA256SUMS
+
+SHA256SUMS enthält nur Dateien, die lokal liegen bleiben. Zwischendateien
+(video.h264, audio.wav, Segmente), die nach dem Muxen gelöscht werden,
+stehen stattdessen in SHA256SUMS.pi: die Liste der geprüft übertragenen
+Dateien des Pi-Verzeichnisses, nach der die Recorder dort löschen.
+
+Verwendung:
+    manifest = ChecksumManifest(local_path)
+    manifest.add("video.h264", digest)
+    manifest.add_remote("video.h264", digest)   # auf dem Pi löschbar
+    manifest.remove("video.h264")              # lokal nach dem Muxen gelöscht
+    manifest.verify()                     # explizite Nachprüfung (liest die Dateien)
+
+    python checksum_manifest.py <Verzeichnis> [...]
+"""
+
+import os
+import hashlib
+import argparse
+import threading
+from typing import Dict, Optional
+
+MANIFEST_NAME = "SHA256SUMS"
+REMOTE_MANIFEST_NAME = "SHA256SUMS.pi"
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    """SHA-256 einer lokalen Datei (blockweise)."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(chunk_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ChecksumManifest:
+    """
+    sha256sum-kompatible Prüfsummen-Datei eines Verzeichnisses.
+    """
+
+    # Parallele Transfers tragen in dasselbe Verzeichnis ein
+    _lock = threading.Lock()
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.path = os.path.join(directory, MANIFEST_NAME)
+        self.remote_path = os.path.join(directory, REMOTE_MANIFEST_NAME)
+
+    @staticmethod
+    def _read(path: str) -> Dict[str, str]:
+        entries = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    digest, _, name = line.rstrip("\n").partition("  ")
+                    if name:
+                        entries[name.lstrip("*")] = digest
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _update(self, path: str, filename: str, digest: Optional[str]):
+        """Setzt (digest) oder entfernt (None) einen Eintrag; leere Manifeste werden gelöscht."""
+        with self._lock:
+            entries = self._read(path)
+            if digest is None:
+                if entries.pop(filename, None) is None:
+                    return
+            else:
+                entries[filename] = digest
+            if not entries:
+                os.remove(path)
+                return
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                for name in sorted(entries):
+                    f.write(f"{entries[name]}  {name}\n")
+            os.replace(tmp_path, path)
+
+    def entries(self) -> Dict[str, str]:
+        """Dateiname → SHA-256 (hex) der lokal vorhandenen Dateien."""
+        return self._read(self.path)
+
+    def remote_entries(self) -> Dict[str, str]:
+        """Dateiname im Pi-Verzeichnis → SHA-256 (hex) der geprüft übertragenen Dateien."""
+        return self._read(self.remote_path)
+
+    def get(self, filename: str) -> Optional[str]:
+        return self.entries().get(filename)
+
+    def add(self, filename: str, digest: str):
+        """Trägt eine geprüfte lokale Datei ein (ersetzt einen älteren Eintrag)."""
+        self._update(self.path, filename, digest)
+
+    def add_remote(self, filename: str, digest: str):
+        """Merkt eine geprüft übertragene Datei des Pi-Verzeichnisses zum Löschen vor."""
+        self._update(self.remote_path, filename, digest)
+
+    def remove(self, filename: str):
+        """Entfernt den Eintrag einer lokal gelöschten Datei (z.B. nach dem Muxen)."""
+        self._update(self.path, filename, None)
+
+    def verify(self) -> Dict[str, bool]:
+        """
+        Liest alle eingetragenen Dateien erneut und vergleicht die Prüfsummen.
+
+        Returns:
+            Dateiname → True (stimmt), False (abweichend oder fehlt)
+        """
+        results = {}
+        for name, digest in self.entries().items():
+            path = os.path.join(self.directory, name)
+            results[name] = os.path.exists(path) and sha256_file(path) == digest
+        return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Aufnahmen gegen ihr Prüfsummen-Manifest (SHA256SUMS) prüfen")
+    parser.add_argument("directories", nargs="+", help="Aufnahme-Verzeichnisse")
+    args = parser.parse_args()
+
+    failed = 0
+    for directory in args.directories:
+        results = ChecksumManifest(directory).verify()
+        if not results:
+            print(f"ℹ️  {directory}: kein {MANIFEST_NAME}")
+            continue
+        for name, ok in results.items():
+            print(f"{'✅' if ok else '❌'} {os.path.join(directory, name)}")
+            failed += not ok
+    if failed:
+        print(f"⚠️  {failed} Datei(en) stimmen nicht mit dem Manifest überein")
+    raise SystemExit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Live-Übertragung einer wachsenden Aufnahme-Datei
+================================================
+
+Liest video.h264 schon während der Aufnahme per SFTP vom Pi (ab der zuletzt
+gelesenen Position) und speist die Daten direkt in einen Mp4Muxer. Neue
+Bytes werden per stat() erkannt und mit readv() als parallele Leseanfragen
+geholt (wie prefetch() in sftp_fetch), statt als einzelne 32-KB-Roundtrips. Mit
+fragmentiertem MP4 ist der Clip so bereits während der Aufnahme lokal
+abspielbar; bricht die Verbindung ab, bleibt alles bis zum letzten Fragment
+erhalten und die vollständige Datei liegt weiterhin auf dem Pi.
+
+Nach Aufnahmeende wird die SHA-256-Prüfsumme der übertragenen Daten gegen
+den Pi-Agent geprüft.
+
+Verwendung:
+    transfer = LiveTransfer(agent, f"{remote_dir}/video.h264", muxer)
+    transfer.start()
+    ...                      # Aufnahme läuft
+    transfer.finish()        # Rest lesen und prüfen
+    muxer.close(audio_file="audio.wav")
+"""
+
+import time
+import hashlib
+import threading
+from typing import Any, Dict, Optional
+
+from mp4_muxer import CHUNK_SIZE
+
+# Höchstens so viele Blöcke pro readv()-Durchlauf, damit stop() zeitnah greift
+READV_CHUNKS = 8
+
+
+class LiveTransfer:
+    """
+    Überträgt eine Remote-Datei, während sie noch geschrieben wird.
+    """
+
+    def __init__(self, agent, remote_file: str, muxer, poll_interval: float = 0.5,
+                 chunk_size: int = CHUNK_SIZE):
+        """
+        Args:
+            agent: PiAgentClient (mit SSH-Verbindung für SFTP)
+            remote_file: Wachsende Datei auf dem Pi
+            muxer: Mp4Muxer, der die Daten erhält
+            poll_interval: Wartezeit in Sekunden, wenn keine neuen Daten da sind
+            chunk_size: Lesegröße pro SFTP-Anfrage
+        """
+        self.agent = agent
+        self.remote_file = remote_file
+        self.muxer = muxer
+        self.poll_interval = poll_interval
+        self.chunk_size = chunk_size
+
+        self.offset = 0
+        self.transfer_s = 0.0
+        self.verified = False
+        self.error: Optional[str] = None
+        self.capture_finished_at: Optional[float] = None
+
+        self._digest = hashlib.sha256()
+        self._stop_event = threading.Event()
+        self._capture_done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sftp = None
+
+    def start(self):
+        """Startet den Hintergrund-Thread."""
+        self._sftp = self.agent.ssh.open_sftp()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Bricht die Übertragung ab (ohne den Rest zu lesen)."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self._close_sftp()
+
+    def capture_done(self):
+        """Markiert die Aufnahme als beendet: die Datei wächst nicht mehr."""
+        if not self._capture_done.is_set():
+            self.capture_finished_at = time.time()
+            self._capture_done.set()
+
+    def finish(self, timeout: Optional[float] = None) -> bool:
+        """
+        Liest den Rest der Datei und prüft die Prüfsumme.
+
+        Returns:
+            True, wenn die Datei vollständig und unverändert übertragen wurde
+        """
+        self.capture_done()
+        if self._thread:
+            self._thread.join(timeout)
+        self._close_sftp()
+        if self.error:
+            return False
+
+        try:
+            self.verified = self.agent.file_checksum(self.remote_file) == self._digest.hexdigest()
+        except Exception as e:
+            self.error = f"Prüfsumme: {e}"
+            return False
+        if not self.verified:
+            self.error = "Prüfsumme stimmt nicht mit der Datei auf dem Pi überein"
+        return self.verified
+
+    def _close_sftp(self):
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            finally:
+                self._sftp = None
+
+    def _run(self):
+        remote = None
+        try:
+            while not self._stop_event.is_set():
+                # Nach Aufnahmeende bis zum Dateiende lesen, dann fertig
+                final = self._capture_done.is_set()
+                if remote is None:
+                    try:
+                        remote = self._sftp.open(self.remote_file, "rb")
+                    except IOError:
+                        if final:
+                            raise
+                        self._capture_done.wait(self.poll_interval)
+                        continue
+
+                start = time.time()
+                received = self._read_new(remote)
+                self.transfer_s += time.time() - start
+                if received:
+                    continue
+                if final:
+                    return
+                self._capture_done.wait(self.poll_interval)
+        except Exception as e:
+            self.error = f"{self.remote_file} bei Byte {self.offset}: {e}"
+            print(f"❌ Live-Übertragung abgebrochen: {self.error}")
+        finally:
+            if remote is not None:
+                try:
+                    remote.close()
+                except Exception:
+                    pass
+
+    def _read_new(self, remote) -> bool:
+        """
+        Liest die seit dem letzten Aufruf angehängten Bytes (pipelined per readv).
+
+        Returns:
+            True, wenn neue Daten gelesen wurden
+        """
+        size = remote.stat().st_size
+        if size <= self.offset:
+            return False
+
+        end = min(size, self.offset + self.chunk_size * READV_CHUNKS)
+        ranges = [(position, min(self.chunk_size, end - position))
+                  for position in range(self.offset, end, self.chunk_size)]
+        for data in remote.readv(ranges):
+            if not data:
+                break
+            self.offset += len(data)
+            self._digest.update(data)
+            self.muxer.feed(data)
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Übertragene Bytes, SHA-256, Transfer-Zeit, Prüfung und Fehler."""
+        return {
+            "bytes": self.offset,
+            "sha256": self._digest.hexdigest(),
+            "transfer_s": self.transfer_s,
+            "verified": self.verified,
+            "error": self.error
+        }
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MP4-Muxer im eigenen Prozess (PyAV)
+===================================
+
+Ersetzt die ffmpeg-Aufrufe nach dem Kopieren (``ffmpeg -fflags +genpts -r
+{fps} -i video.h264 -i audio.wav -c:v copy -c:a aac``): Die H.264-Pakete
+werden ohne Neukodierung in MP4 umverpackt, die Zeitstempel direkt aus der
+Framerate gesetzt, und das Audio wird genau einmal nach AAC kodiert - auch
+wenn mehrere Ausgaben geschrieben werden (Zeitlupe: eine MP4 pro
+Wiedergabe-Framerate aus einem einzigen Durchlauf über die .h264-Datei).
+
+Der Muxer nimmt die Eingabe stückweise über ``feed()`` an und kann so direkt
+an eine laufende Übertragung angehängt werden. Die benötigte Zeit wird pro
+Stufe gemessen (Warten auf Daten, Demux, Video-Mux, Audio-Kodierung,
+Audio-Mux, Abschluss).
+
+Mit ``fragmented=True`` entsteht fragmentiertes MP4 (ein moof/mdat-Paar pro
+GOP, Header ohne Sample-Tabellen am Anfang). Jedes Fragment wird sofort
+geschrieben - die Datei ist schon während der Übertragung abspielbar und
+bleibt es bis zum letzten vollständigen Fragment, auch wenn der Prozess
+oder die Verbindung abbricht.
+
+Installation:
+    pip install av
+
+Verwendung:
+    from mp4_muxer import Mp4Muxer, mux_file
+
+    stats = mux_file("video.h264", {"out.mp4": 15}, audio_file="audio.wav")
+
+    muxer = Mp4Muxer({"out.mp4": 15}, audio_rate=44100)
+    for chunk in chunks:
+        muxer.feed(chunk)
+    muxer.close(audio_file="audio.wav")
+    print(muxer.get_statistics())
+"""
+
+import time
+import threading
+from fractions import Fraction
+from typing import Any, Dict, List, Optional
+
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+CHUNK_SIZE = 1024 * 1024
+PROBE_SIZE = 64 * 1024
+
+# Fragment pro Keyframe, leerer moov-Header vorab, Fragmente ohne Bezug auf moov-Offsets;
+# Pakete sofort auf die Platte statt im AVIO-Puffer, Audio-Spur hält das Video nicht zurück
+FRAGMENTED_OPTIONS = {
+    "movflags": "frag_keyframe+empty_moov+default_base_moof",
+    "flush_packets": "1",
+    "max_interleave_delta": "1",
+}
+
+
+class _ChunkReader:
+    """
+    Datei-artiger Puffer zwischen feed() und dem Demuxer-Thread.
+
+    read() blockiert, bis Daten vorhanden sind oder die Eingabe beendet ist;
+    write() blockiert, wenn der Puffer voll ist (Gegendruck auf die Übertragung).
+    """
+
+    def __init__(self, max_buffer: int):
+        self.max_buffer = max_buffer
+        self.wait_s = 0.0
+        self._buffer = bytearray()
+        self._closed = False
+        self._aborted = False
+        self._cond = threading.Condition()
+
+    def write(self, chunk: bytes):
+        with self._cond:
+            while len(self._buffer) >= self.max_buffer and not self._aborted:
+                self._cond.wait()
+            if self._aborted:
+                raise RuntimeError("Muxer wurde abgebrochen")
+            self._buffer += chunk
+            self._cond.notify_all()
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def abort(self):
+        with self._cond:
+            self._aborted = self._closed = True
+            self._buffer.clear()
+            self._cond.notify_all()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._cond:
+            start = time.perf_counter()
+            while not self._buffer and not self._closed:
+                self._cond.wait()
+            self.wait_s += time.perf_counter() - start
+            if size < 0:
+                size = len(self._buffer)
+            data = bytes(self._buffer[:size])
+            del self._buffer[:size]
+            self._cond.notify_all()
+            return data
+
+
+class Mp4Muxer:
+    """
+    Verpackt einen H.264-Elementarstrom (Annex B) in eine oder mehrere MP4-Dateien.
+    """
+
+    def __init__(self, outputs: Dict[str, float], audio_rate: Optional[int] = None,
+                 audio_layout: str = "mono", fragmented: bool = False,
+                 max_buffer: int = 16 * CHUNK_SIZE):
+        """
+        Args:
+            outputs: {MP4-Datei: Wiedergabe-Framerate}
+            audio_rate: Abtastrate der Audio-Spur (None = ohne Audio); die Spur muss
+                        vor dem ersten Video-Paket angelegt werden
+            audio_layout: Kanal-Layout der Audio-Spur
+            fragmented: Fragmentiertes MP4 schreiben (abspielbar während des Schreibens)
+            max_buffer: Maximale Puffergröße zwischen feed() und Demuxer in Bytes
+        """
+        if not HAS_PYAV:
+            raise RuntimeError("PyAV nicht installiert. Installiere mit: pip install av")
+        if not outputs:
+            raise ValueError("Mindestens eine Ausgabe erforderlich")
+
+        self.outputs = dict(outputs)
+        self.audio_rate = audio_rate
+        self.audio_layout = audio_layout
+        self.fragmented = fragmented
+        self.frames = 0
+        self.bytes_in = 0
+        self.timings = {stage: 0.0 for stage in
+                        ("demux_s", "video_mux_s", "audio_encode_s", "audio_mux_s", "finalize_s")}
+        self.error: Optional[BaseException] = None
+
+        self._reader = _ChunkReader(max_buffer)
+        self._thread: Optional[threading.Thread] = None
+        self._containers: List[Any] = []
+        self._video_streams: List[Any] = []
+        self._audio_streams: List[Any] = []
+        self._started_at: Optional[float] = None
+        self._closed_at: Optional[float] = None
+
+    def feed(self, chunk: bytes):
+        """Übergibt das nächste Stück des H.264-Stroms."""
+        if self.error:
+            raise RuntimeError(f"Muxer fehlgeschlagen: {self.error}")
+        if self._thread is None:
+            self._started_at = time.perf_counter()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        self.bytes_in += len(chunk)
+        self._reader.write(chunk)
+
+    def _open_outputs(self, in_stream):
+        for path in self.outputs:
+            container = av.open(path, "w", format="mp4",
+                                options=dict(FRAGMENTED_OPTIONS) if self.fragmented else None)
+            # PyAV >= 14: add_stream_from_template, ältere Versionen: add_stream(template=...)
+            if hasattr(container, "add_stream_from_template"):
+                video_stream = container.add_stream_from_template(in_stream)
+            else:
+                video_stream = container.add_stream(template=in_stream)
+            self._containers.append(container)
+            self._video_streams.append(video_stream)
+            if self.audio_rate:
+                audio_stream = container.add_stream("aac", rate=self.audio_rate)
+                audio_stream.codec_context.layout = self.audio_layout
+                self._audio_streams.append(audio_stream)
+
+    def _run(self):
+        try:
+            start = time.perf_counter()
+            # Kleine Probe-Größe: SPS/PPS stehen am Anfang, die Ausgabe soll nicht erst nach MBytes starten
+            with av.open(self._reader, "r", format="h264", options={"probesize": str(PROBE_SIZE)}) as source:
+                in_stream = source.streams.video[0]
+                self._open_outputs(in_stream)
+                rates = [Fraction(fps).limit_denominator(1001) for fps in self.outputs.values()]
+
+                packets = source.demux(in_stream)
+                while True:
+                    packet = next(packets, None)
+                    if packet is None:
+                        break
+                    if packet.size == 0:  # Flush-Paket am Ende
+                        continue
+                    mux_start = time.perf_counter()
+                    self.timings["demux_s"] += mux_start - start
+                    # Rohes H.264 hat keine Zeitstempel: ein Frame pro Paket, Abstand aus der Framerate
+                    for container, stream, rate in zip(self._containers, self._video_streams, rates):
+                        packet.stream = stream
+                        packet.time_base = 1 / rate
+                        packet.pts = packet.dts = self.frames
+                        packet.duration = 1
+                        container.mux(packet)
+                    self.frames += 1
+                    start = time.perf_counter()
+                    self.timings["video_mux_s"] += start - mux_start
+                self.timings["demux_s"] += time.perf_counter() - start
+        except BaseException as e:
+            self.error = e
+            self._reader.abort()
+        finally:
+            # Lesezugriffe blockieren nur im Demuxer - Warten auf Daten nicht als Demux-Zeit zählen
+            self.timings["demux_s"] = max(0.0, self.timings["demux_s"] - self._reader.wait_s)
+
+    def _encode_audio(self, audio_file: str) -> List[Any]:
+        """Kodiert die WAV-Datei einmal nach AAC (Encoder der ersten Ausgabe)."""
+        encoder = self._audio_streams[0]
+        frame_size = encoder.codec_context.frame_size or 1024
+        resampler = av.AudioResampler(format=encoder.codec_context.format,
+                                      layout=self.audio_layout, rate=self.audio_rate)
+        fifo = av.AudioFifo()
+        encoded = []
+        samples = 0
+
+        def drain(final=False):
+            nonlocal samples
+            while fifo.samples >= frame_size or (final and fifo.samples):
+                frame = fifo.read(frame_size, partial=final)
+                frame.pts = samples
+                frame.time_base = Fraction(1, self.audio_rate)
+                samples += frame.samples
+                encoded.extend(encoder.encode(frame))
+
+        with av.open(audio_file) as source:
+            for frame in source.decode(source.streams.audio[0]):
+                frame.pts = None
+                for resampled in resampler.resample(frame):
+                    resampled.pts = None
+                    fifo.write(resampled)
+                drain()
+        for resampled in resampler.resample(None):
+            resampled.pts = None
+            fifo.write(resampled)
+        drain(final=True)
+        encoded.extend(encoder.encode(None))
+        return encoded
+
+    def close(self, audio_file: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Beendet die Eingabe, fügt optional die Audio-Spur hinzu und schließt die
+        MP4-Dateien.
+
+        Returns:
+            Statistik (siehe get_statistics)
+        """
+        self._reader.close()
+        if self._thread:
+            self._thread.join()
+        try:
+            if self.error:
+                raise RuntimeError(f"Muxer fehlgeschlagen: {self.error}") from self.error
+            if not self.frames:
+                raise RuntimeError("Keine Video-Daten empfangen")
+
+            if self._audio_streams and audio_file:
+                start = time.perf_counter()
+                encoded = self._encode_audio(audio_file)
+                self.timings["audio_encode_s"] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                for container, stream in zip(self._containers, self._audio_streams):
+                    for packet in encoded:
+                        packet.stream = stream
+                        container.mux(packet)
+                self.timings["audio_mux_s"] = time.perf_counter() - start
+        finally:
+            start = time.perf_counter()
+            for container in self._containers:
+                container.close()
+            self._containers = []
+            self.timings["finalize_s"] = time.perf_counter() - start
+            self._closed_at = time.perf_counter()
+        return self.get_statistics()
+
+    def abort(self):
+        """
+        Bricht ab, ohne auf weitere Daten zu warten. Bereits geschriebene
+        Fragmente bleiben abspielbar.
+        """
+        self._reader.abort()
+        if self._thread:
+            self._thread.join()
+        for container in self._containers:
+            try:
+                container.close()
+            except Exception:
+                pass
+        self._containers = []
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Frames, Eingabe-Bytes und Zeit pro Stufe in Sekunden."""
+        total = (self._closed_at or time.perf_counter()) - self._started_at if self._started_at else 0.0
+        return dict(self.timings, frames=self.frames, bytes=self.bytes_in,
+                    wait_s=self._reader.wait_s, total_s=total)
+
+
+def format_timings(stats: Dict[str, Any]) -> str:
+    """Kurzform der Stufen-Zeiten für die Ausgabe."""
+    return (f"Demux {stats['demux_s']:.2f}s, Video-Mux {stats['video_mux_s']:.2f}s, "
+            f"Audio {stats['audio_encode_s']:.2f}s + {stats['audio_mux_s']:.2f}s, "
+            f"Abschluss {stats['finalize_s']:.2f}s, Warten {stats['wait_s']:.2f}s")
+
+
+def mux_file(video_file: str, outputs: Dict[str, float], audio_file: Optional[str] = None,
+             audio_rate: int = 44100, chunk_size: int = CHUNK_SIZE) -> Dict[str, Any]:
+    """
+    Verpackt eine lokale .h264-Datei (optional mit WAV-Audio) in MP4.
+
+    Returns:
+        Statistik des Muxers
+    """
+    muxer = Mp4Muxer(outputs, audio_rate=audio_rate if audio_file else None)
+    try:
+        with open(video_file, "rb") as f:
+            for chunk in iter(lambda: f.read(chunk_size), b""):
+                muxer.feed(chunk)
+    except BaseException:
+        muxer.abort()
+        raise
+    return muxer.close(audio_file)
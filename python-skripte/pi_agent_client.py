@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Client für den Pi-Agent (raspberry-pi-scripts/pi_agent.py)
+==========================================================
+
+Startet den Agent einmal pro Sitzung über einen einzigen SSH-Kanal und
+ruft seine Methoden per zeilenweisem JSON-RPC auf. Der Agent wird bei
+Bedarf automatisch nach ~/.vogel-kamera/pi_agent.py hochgeladen.
+
+Der Agent bearbeitet eine Anfrage nach der anderen. Jeder Aufruf hat
+deshalb eine Frist (rpc_timeout), statt alle weiteren Aufrufer (z.B. den
+Stream-Watchdog) zu blockieren. Läuft sie ab, während Aufnahmen des Agents
+laufen, bleibt der Kanal bestehen - ein neuer Agent würde die Aufnahmen
+beenden - und die verspätete Antwort wird später anhand ihrer ID verworfen.
+Ohne laufende Aufnahmen wird der Kanal verworfen und beim nächsten Aufruf
+ein neuer Agent gestartet.
+
+Verwendung:
+    from pi_agent_client import PiAgentClient
+
+    with PiAgentClient.connect(config.get_remote_host_config()) as agent:
+        agent.kill_processes(["stream-wrapper.sh", "rpicam-vid"])
+        print(agent.telemetry())
+
+    # Lokal testen (Agent als Unterprozess)
+    with PiAgentClient.local() as agent:
+        print(agent.call("ping"))
+"""
+
+import sys
+import json
+import time
+import socket
+import itertools
+import threading
+import subprocess
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import paramiko
+
+AGENT_SOURCE = Path(__file__).resolve().parent.parent / "raspberry-pi-scripts" / "pi_agent.py"
+REMOTE_AGENT_DIR = ".vogel-kamera"
+REMOTE_AGENT_PATH = f"{REMOTE_AGENT_DIR}/pi_agent.py"
+
+DEFAULT_RPC_TIMEOUT = 30.0   # Sekunden pro Aufruf
+CHECKSUM_RPC_TIMEOUT = 600.0  # SHA-256 über mehrere GB auf der SD-Karte
+MAX_AGENT_WAIT = 10.0        # Obergrenze für capture.wait/-stop im Agent (siehe pi_agent.py)
+
+
+class PiAgentError(Exception):
+    """Fehler-Antwort des Agents oder abgebrochene Verbindung."""
+
+    def __init__(self, message: str, code: Optional[int] = None):
+        super().__init__(message)
+        self.code = code
+
+
+class PiAgentClient:
+    """
+    JSON-RPC-Client für den Pi-Agent über beliebige Datei-Streams.
+    """
+
+    def __init__(self, reader, writer, closer=None, channel=None, reopen=None,
+                 rpc_timeout: float = DEFAULT_RPC_TIMEOUT):
+        """
+        Args:
+            reader: Binärer Lese-Stream (stdout des Agents)
+            writer: Binärer Schreib-Stream (stdin des Agents)
+            closer: Optionale Funktion zum Schließen der Verbindung
+            channel: SSH-Kanal des Agents (für Fristen per settimeout)
+            reopen: Funktion, die einen neuen Agent-Kanal öffnet -> (channel, reader, writer)
+            rpc_timeout: Standard-Frist pro Aufruf in Sekunden (nur mit channel)
+        """
+        self._reader = reader
+        self._writer = writer
+        self._closer = closer
+        self._channel = channel
+        self._reopen = reopen
+        self.rpc_timeout = rpc_timeout
+        self._ids = itertools.count(1)
+        self._buffer = b""
+        # IDs abgelaufener Aufrufe, deren Antwort noch kommt
+        self._abandoned = set()
+        # Laufende Aufnahmen: enden mit dem Agent, daher Kanal nicht verwerfen
+        self._captures = set()
+        # Ein Kanal für mehrere Threads (z.B. Stream-Watchdog und Aufnahme)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def connect(cls, remote_host: Dict[str, str], python: str = "python3",
+                timeout: int = 10) -> "PiAgentClient":
+        """
+        Verbindet per SSH, lädt den Agent bei Bedarf hoch und startet ihn.
+
+        Args:
+            remote_host: Dictionary aus config.get_remote_host_config()
+            python: Python-Interpreter auf dem Pi
+            timeout: SSH-Verbindungs-Timeout in Sekunden
+        """
+        ssh = paramiko.SSHClient()
+        ssh.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+        ssh.connect(remote_host['hostname'], username=remote_host['username'],
+                    key_filename=remote_host['key_filename'], timeout=timeout)
+        try:
+            _deploy_agent(ssh)
+            channel, reader, writer = _open_agent_channel(ssh, python)
+        except Exception:
+            ssh.close()
+            raise
+
+        client = None
+
+        def close():
+            if client._channel is not None:
+                client._channel.shutdown_write()
+                client._channel.recv_exit_status()
+            ssh.close()
+
+        client = cls(reader, writer, close, channel=channel,
+                     reopen=lambda: _open_agent_channel(ssh, python))
+        client.ssh = ssh
+        return client
+
+    @classmethod
+    def local(cls, python: str = sys.executable) -> "PiAgentClient":
+        """Startet den Agent lokal als Unterprozess (Tests/Entwicklung)."""
+        proc = subprocess.Popen([python, "-u", str(AGENT_SOURCE)],
+                                stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+
+        def close():
+            proc.stdin.close()
+            proc.wait(timeout=10)
+
+        return cls(proc.stdout, proc.stdin, close)
+
+    def _discard_channel(self):
+        """Verwirft einen hängenden Kanal; der nächste Aufruf startet einen neuen Agent."""
+        try:
+            self._channel.close()
+        except Exception:
+            pass
+        self._channel = self._reader = self._writer = None
+        self._buffer = b""
+        self._abandoned.clear()
+
+    def _readline(self) -> bytes:
+        """
+        Liest eine Antwortzeile. Über SSH direkt vom Kanal mit eigenem Puffer,
+        damit bei einer Zeitüberschreitung keine angefangene Zeile verloren geht.
+        """
+        if self._channel is None:
+            return self._reader.readline()
+        while b"\n" not in self._buffer:
+            data = self._channel.recv(65536)
+            if not data:
+                line, self._buffer = self._buffer, b""
+                return line
+            self._buffer += data
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        return line + b"\n"
+
+    def call(self, method: str, rpc_timeout: Optional[float] = None, **params) -> Any:
+        """
+        Ruft eine Agent-Methode auf und wartet auf die Antwort.
+
+        Args:
+            method: Methodenname (z.B. "file.exists")
+            rpc_timeout: Frist in Sekunden (default: self.rpc_timeout, nur über SSH)
+            **params: Parameter der Methode
+
+        Raises:
+            PiAgentError: bei Fehler-Antwort, Zeitüberschreitung oder geschlossener Verbindung
+        """
+        with self._lock:
+            if self._reader is None:
+                if self._reopen is None:
+                    raise PiAgentError(f"Verbindung zum Agent beendet ({method})")
+                try:
+                    self._channel, self._reader, self._writer = self._reopen()
+                except Exception as e:
+                    raise PiAgentError(f"Agent konnte nicht neu gestartet werden ({method}): {e}")
+
+            request_id = next(self._ids)
+            request = {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+            if self._channel is not None:
+                self._channel.settimeout(rpc_timeout or self.rpc_timeout)
+            try:
+                self._writer.write((json.dumps(request) + "\n").encode())
+                self._writer.flush()
+                while True:
+                    line = self._readline()
+                    if not line:
+                        raise PiAgentError(f"Verbindung zum Agent beendet ({method})")
+                    response = json.loads(line)
+                    # Verspätete Antwort eines abgelaufenen Aufrufs überspringen
+                    if response.get("id") not in self._abandoned:
+                        break
+                    self._abandoned.discard(response.get("id"))
+            except socket.timeout:
+                message = f"Zeitüberschreitung nach {rpc_timeout or self.rpc_timeout:.0f}s ({method})"
+                if self._captures:
+                    # Ein neuer Agent würde die laufenden Aufnahmen beenden - Antwort später verwerfen
+                    self._abandoned.add(request_id)
+                    raise PiAgentError(f"{message}, Aufnahmen laufen weiter")
+                self._discard_channel()
+                raise PiAgentError(message)
+
+        if response.get("id") != request_id:
+            raise PiAgentError(f"Unerwartete Antwort-ID: {response.get('id')} (erwartet {request_id})")
+        if "error" in response:
+            raise PiAgentError(response["error"]["message"], response["error"].get("code"))
+        return response.get("result")
+
+    # ------------------------------------------------------------------
+    # Typisierte Methoden
+    # ------------------------------------------------------------------
+    def ping(self) -> Dict[str, Any]:
+        return self.call("ping")
+
+    def kill_processes(self, patterns: List[str], signal_name: str = "KILL") -> Dict[str, int]:
+        return self.call("process.kill", patterns=patterns, signal_name=signal_name)
+
+    def list_processes(self, pattern: str) -> List[int]:
+        return self.call("process.list", pattern=pattern)
+
+    def spawn(self, argv: List[str], log: Optional[str] = None, cwd: Optional[str] = None) -> int:
+        return self.call("process.spawn", argv=argv, log=log, cwd=cwd)
+
+    def file_exists(self, path: str) -> bool:
+        return self.call("file.exists", path=path)
+
+    def file_stat(self, path: str) -> Optional[Dict[str, Any]]:
+        return self.call("file.stat", path=path)
+
+    def glob(self, pattern: str) -> List[str]:
+        return self.call("file.glob", pattern=pattern)
+
+    def file_checksum(self, path: str, algorithm: str = "sha256",
+                      rpc_timeout: float = CHECKSUM_RPC_TIMEOUT) -> str:
+        return self.call("file.checksum", rpc_timeout=rpc_timeout, path=path, algorithm=algorithm)
+
+    def mkdir(self, path: str) -> bool:
+        return self.call("file.mkdir", path=path)
+
+    def write_file(self, path: str, content: str, sudo: bool = False) -> bool:
+        return self.call("file.write", path=path, content=content, sudo=sudo)
+
+    def remove_files(self, patterns: List[str]) -> int:
+        return self.call("file.remove", patterns=patterns)
+
+    def audio_devices(self) -> List[Dict[str, Any]]:
+        return self.call("audio.devices")
+
+    def telemetry(self) -> Dict[str, Any]:
+        return self.call("telemetry")
+
+    def start_capture(self, name: str, argv: List[str], cwd: Optional[str] = None,
+                      log: Optional[str] = None) -> int:
+        pid = self.call("capture.start", name=name, argv=argv, cwd=cwd, log=log)
+        self._captures.add(name)
+        return pid
+
+    def capture_status(self, name: str) -> Dict[str, Any]:
+        return self.call("capture.status", name=name)
+
+    def wait_capture(self, name: str, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Wartet auf das Ende einer Aufnahme (None = ohne Grenze) in Abschnitten
+        von höchstens MAX_AGENT_WAIT Sekunden - dazwischen kommen andere
+        Aufrufer an die Reihe.
+
+        Returns:
+            Exit-Code oder None bei Timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            remaining = MAX_AGENT_WAIT if deadline is None else max(0.0, deadline - time.monotonic())
+            wait = min(MAX_AGENT_WAIT, remaining)
+            returncode = self.call("capture.wait", rpc_timeout=wait + DEFAULT_RPC_TIMEOUT, name=name, timeout=wait)
+            if returncode is not None:
+                self._captures.discard(name)
+                return returncode
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+
+    def stop_capture(self, name: str, timeout: float = 5.0) -> Optional[int]:
+        timeout = min(timeout, MAX_AGENT_WAIT)
+        returncode = self.call("capture.stop", rpc_timeout=timeout + DEFAULT_RPC_TIMEOUT, name=name, timeout=timeout)
+        self._captures.discard(name)
+        return returncode
+
+    def video_activity(self, path: str, reset: bool = False) -> Dict[str, int]:
+        return self.call("video.activity", path=path, reset=reset)
+
+    def close(self):
+        if self._closer:
+            try:
+                self._closer()
+            finally:
+                self._closer = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+def _open_agent_channel(ssh: paramiko.SSHClient, python: str):
+    """Startet den Agent in einem neuen Kanal der bestehenden SSH-Verbindung."""
+    channel = ssh.get_transport().open_session()
+    channel.exec_command(f"{python} -u {REMOTE_AGENT_PATH}")
+    return channel, channel.makefile("rb"), channel.makefile_stdin("wb")
+
+
+def _deploy_agent(ssh: paramiko.SSHClient):
+    """Lädt den Agent hoch, wenn er auf dem Pi fehlt oder veraltet ist."""
+    source = AGENT_SOURCE.read_bytes()
+    sftp = ssh.open_sftp()
+    try:
+        try:
+            with sftp.open(REMOTE_AGENT_PATH, "rb") as f:
+                if f.read() == source:
+                    return
+        except IOError:
+            try:
+                sftp.mkdir(REMOTE_AGENT_DIR)
+            except IOError:
+                pass
+        with sftp.open(REMOTE_AGENT_PATH, "wb") as f:
+            f.write(source)
+    finally:
+        sftp.close()
+
+
+if __name__ == "__main__":
+    # Schnelltest: lokal oder gegen den konfigurierten Pi
+    if len(sys.argv) > 1 and sys.argv[1] == "--remote":
+        from config import config
+        agent = PiAgentClient.connect(config.get_remote_host_config())
+    else:
+        agent = PiAgentClient.local()
+
+    with agent:
+        print(f"🤖 Agent: {agent.ping()}")
+        print(f"📊 Telemetrie: {json.dumps(agent.telemetry(), indent=2)}")
+        print(f"🎤 Audio-Geräte: {agent.audio_devices()}")
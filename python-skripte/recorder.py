@@ -0,0 +1,1055 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Aufnahme-API für Video, Zeitlupe und Audio
+==========================================
+
+Importierbare Recorder-Klassen für die Aufnahme-Skripte. Die Skripte
+(ai-had-kamera-remote-param-*.py, ai-had-audio-remote-param-*.py) sind nur
+noch dünne CLI-Wrapper; der Auto-Trigger ruft die Recorder direkt im
+eigenen Prozess auf und nutzt dabei eine einzige Pi-Agent-Sitzung und den
+Fähigkeiten-Cache über alle Aufnahmen hinweg (kein neuer Interpreter, keine
+neuen SSH-Verbindungen pro Trigger).
+
+Verwendung:
+    from recorder import VideoRecorder
+
+    with VideoRecorder(width=1920, height=1080, ai_model="bird-species") as recorder:
+        recorder.show_system_status()
+        result = recorder.record(duration_s=120)
+        print(result["output_files"])
+
+    # Agent-Sitzung teilen (z.B. Auto-Trigger)
+    recorder = VideoRecorder(agent=agent)
+"""
+
+import os
+import time
+import threading
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from tqdm import tqdm
+
+from config import config
+from pi_agent_client import PiAgentClient
+from capability_cache import CapabilityCache
+from segment_pipeline import SegmentPipeline, SEGMENT_PATTERN, SEGMENT_GLOB
+from mp4_muxer import HAS_PYAV, Mp4Muxer, mux_file, format_timings
+from live_transfer import LiveTransfer
+from sync_daemon import SyncQueue, SyncQueueError
+from transfer_scheduler import TransferScheduler
+from sftp_fetch import SftpFetcher
+from checksum_manifest import ChecksumManifest, sha256_file
+from recording_index import RecordingIndex
+
+AI_MODEL_PATHS = {
+    'yolov8': '/usr/share/rpi-camera-assets/hailo_yolov8_inference.json',
+    'bird-species': '/usr/share/rpi-camera-assets/hailo_bird_species_inference.json'
+}
+
+# Vogel-optimierte Variante der YOLOv8 Post-Process-Datei (Klasse 14, niedrigere Schwelle)
+BIRD_SPECIES_CONFIG = """{
+    "rpicam-apps":
+    {
+        "lores":
+        {
+            "width": 640,
+            "height": 640,
+            "format": "rgb"
+        }
+    },
+
+    "hailo_yolo_inference":
+    {
+        "hef_file_8L": "/usr/share/hailo-models/yolov8s_h8l.hef",
+        "hef_file_8": "/usr/share/hailo-models/yolov8s_h8.hef",
+        "max_detections": 10,
+        "threshold": 0.3,
+        "class_filter": [14],
+
+        "temporal_filter":
+        {
+            "tolerance": 0.15,
+            "factor": 0.8,
+            "visible_frames": 8,
+            "hidden_frames": 2
+        }
+    },
+
+    "object_detect_draw_cv":
+    {
+        "line_thickness" : 3,
+        "font_thickness": 2
+    }
+}"""
+
+
+def format_bytes(num_bytes):
+    """Formatiert Bytes wie 'free -h' / 'df -h' (z.B. 7.9Gi)"""
+    for unit in ['B', 'Ki', 'Mi', 'Gi', 'Ti']:
+        if num_bytes < 1024 or unit == 'Ti':
+            return f"{num_bytes:.1f}{unit}"
+        num_bytes /= 1024
+
+
+class Recorder:
+    """
+    Basisklasse: Agent-Sitzung, System-Checks, Aufnahme-Ablauf und Transfer.
+
+    Unterklassen legen fest, welche Aufnahmen auf dem Pi laufen
+    (_captures), welche Dateien kopiert werden (_remote_files) und wie sie
+    lokal weiterverarbeitet werden (_postprocess).
+    """
+
+    label = "Aufnahme"
+    subdir = "AI-HAD"
+
+    # (gelb, rot) Schwellen für check_readiness
+    readiness_limits = {"cpu_temp": (60, 70), "load": (2.0, 3.0), "disk": (90, 95)}
+    # Auch gelbe Warnungen blockieren die Aufnahme
+    strict_readiness = False
+    # (Hinweis, Warnung) Schwellen der 1min-Load für show_system_status
+    load_notice = (1.0, 2.0)
+
+    def __init__(self, agent: Optional[PiAgentClient] = None,
+                 remote_host: Optional[Dict[str, str]] = None,
+                 capabilities: Optional[CapabilityCache] = None,
+                 sync_queue: Optional[SyncQueue] = None,
+                 scheduler: Optional[TransferScheduler] = None,
+                 delete_remote: bool = False,
+                 index: Optional[RecordingIndex] = None,
+                 show_progress: bool = True):
+        """
+        Args:
+            agent: Bestehende Agent-Sitzung (wird nicht von close() beendet)
+            remote_host: SSH-Konfiguration (default: aus .env)
+            capabilities: Fähigkeiten-Cache (default: pro Host)
+            sync_queue: Warteschlange für nicht kopierte Dateien (default: pro Host)
+            scheduler: Transfer-Scheduler für das Kopieren (default: ungedrosselt)
+            delete_remote: Geprüft kopierte Dateien (Eintrag in SHA256SUMS) auf dem Pi löschen
+            index: Archiv-Index, in den jede Aufnahme eingetragen wird (default: unter BASE_VIDEO_PATH)
+            show_progress: Fortschrittsbalken während der Aufnahme anzeigen
+        """
+        self.remote_host = remote_host or config.get_remote_host_config()
+        self.capabilities = capabilities or CapabilityCache(self.remote_host['hostname'])
+        self.sync_queue = sync_queue or SyncQueue(self.remote_host['hostname'])
+        self.scheduler = scheduler
+        self.delete_remote = delete_remote
+        self.index = index or RecordingIndex()
+        self.show_progress = show_progress
+        self.stop_event = threading.Event()
+
+        self._agent = agent
+        self._owns_agent = agent is None
+        self._active_captures: List[str] = []
+        self.remote_dir: Optional[str] = None
+        self.length_s = 0.0
+        # Remote-Dateien, die _postprocess() nicht übernehmen konnte (Clip unvollständig)
+        self.missing_files: List[str] = []
+
+    # ------------------------------------------------------------------
+    # Agent-Sitzung
+    # ------------------------------------------------------------------
+    @property
+    def agent(self) -> PiAgentClient:
+        """Agent-Sitzung; wird bei Bedarf (neu) aufgebaut."""
+        if self._agent is None:
+            self._agent = PiAgentClient.connect(self.remote_host, timeout=5)
+            self._owns_agent = True
+        return self._agent
+
+    def ensure_connected(self) -> PiAgentClient:
+        """
+        Prüft die Agent-Sitzung per ping und verbindet bei Bedarf neu
+        (z.B. nach Neustart des Pi während eines langen Auto-Trigger-Laufs).
+        """
+        if self._agent is not None:
+            try:
+                self._agent.ping()
+                return self._agent
+            except Exception:
+                try:
+                    self._agent.close()
+                except Exception:
+                    pass
+                self._agent = None
+        return self.agent
+
+    def close(self):
+        """Beendet die Agent-Sitzung, falls sie von diesem Recorder stammt."""
+        if self._agent is not None and self._owns_agent:
+            self._agent.close()
+            self._agent = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def stop(self):
+        """Bricht eine laufende Aufnahme ab (z.B. aus einem Signal-Handler)."""
+        self.stop_event.set()
+
+    @property
+    def recording(self) -> bool:
+        """True, solange Aufnahmen auf dem Pi laufen."""
+        return bool(self._active_captures)
+
+    # ------------------------------------------------------------------
+    # System-Status
+    # ------------------------------------------------------------------
+    def show_system_status(self) -> Optional[Dict[str, Any]]:
+        """Zeige System-Status vom Remote-Host mit Load-Berücksichtigung"""
+        try:
+            telemetry = self.agent.telemetry()
+
+            # CPU-Temperatur
+            temp_val = telemetry['cpu_temp'] or 0
+            temp_status = "🟢" if temp_val < 50 else "🟡" if temp_val < 60 else "🔴"
+
+            # Festplattenbelegung (nur Root-Partition)
+            disk = telemetry['disk']
+            used_percent = disk['percent']
+            disk_status = "🟢" if used_percent < 80 else "🟡" if used_percent < 90 else "🔴"
+            disk_info = f"{format_bytes(disk['used'])} / {format_bytes(disk['total'])} ({used_percent:.0f}% belegt) {disk_status}"
+
+            # Memory
+            mem = telemetry['memory']
+            if mem['total'] and mem['available'] is not None:
+                mem_info = f"{format_bytes(mem['total'] - mem['available'])} / {format_bytes(mem['total'])} verwendet"
+            else:
+                mem_info = "Nicht verfügbar"
+
+            # CPU Load
+            load_1min = telemetry['load'][0]
+            load_status = "🟢" if load_1min < 1.0 else "🟡" if load_1min < 2.0 else "🔴"
+            load_info = f"{load_1min:.2f} (1min) {load_status}"
+
+            print(f"🖥️ Remote-Host Status ({self.remote_host['hostname']}):")
+            print(f"   🌡️ CPU-Temperatur: {temp_val:.1f}°C {temp_status}")
+            print(f"   💾 Festplatte: {disk_info}")
+            print(f"   💭 Arbeitsspeicher: {mem_info}")
+            print(f"   ⚡ CPU-Last: {load_info}")
+
+            # Warnung bei hoher Load während der Aufnahme
+            notice, warning = self.load_notice
+            if load_1min > warning:
+                print(f"   ⚠️  WARNUNG: Hohe CPU-Last ({load_1min:.2f}) - {self.label}-Qualität könnte beeinträchtigt werden!")
+            elif load_1min > notice:
+                print(f"   💡 Moderate CPU-Last ({load_1min:.2f}) - System unter Last")
+
+            return telemetry
+
+        except Exception as e:
+            print(f"⚠️ Fehler beim Abrufen des System-Status: {e}")
+            return None
+
+    def check_readiness(self) -> bool:
+        """Prüfe ob System bereit für die Aufnahme ist"""
+        try:
+            telemetry = self.agent.telemetry()
+        except Exception as e:
+            print(f"⚠️ Fehler bei System-Bereitschaftsprüfung: {e}")
+            return True  # Im Zweifel erlauben
+
+        values = {
+            "cpu_temp": (telemetry['cpu_temp'] or 0, "CPU-Temperatur", "{:.1f}°C"),
+            "load": (telemetry['load'][0], "CPU-Last", "{:.2f}"),
+            "disk": (telemetry['disk']['percent'], "Festplatte", "{:.0f}% belegt")
+        }
+
+        issues = []
+        for key, (value, name, fmt) in values.items():
+            yellow, red = self.readiness_limits[key]
+            if value > red:
+                issues.append(f"🔴 {name} kritisch: {fmt.format(value)}")
+            elif value > yellow:
+                issues.append(f"🟡 {name} hoch: {fmt.format(value)}")
+
+        if not issues:
+            print(f"✅ System bereit für {self.label}")
+            return True
+
+        print(f"⚠️  System-Warnungen vor {self.label}:")
+        for issue in issues:
+            print(f"   {issue}")
+
+        if self.strict_readiness or any("🔴" in issue for issue in issues):
+            print(f"❌ KRITISCH: {self.label} nicht empfohlen!")
+            return False
+        print(f"⚡ {self.label} möglich, aber mit Vorsicht")
+        return True
+
+    # ------------------------------------------------------------------
+    # Fähigkeiten
+    # ------------------------------------------------------------------
+    def get_audio_device(self) -> Optional[str]:
+        """Ermittelt das USB-Audio-Gerät (gecacht, ein fehlendes Gerät wird nicht gemerkt)."""
+        def discover():
+            devices = self.agent.audio_devices()
+            print("Debug: Aufnahmegeräte auf dem Remote-Host:")
+            for device in devices:
+                print(f"   {device['name']}")
+            # Suche nach einem Gerät mit "USB" im Namen (Standard-Subgerät 0)
+            for device in devices:
+                if device['usb']:
+                    return f"hw:{device['card']},0"
+            return None
+
+        try:
+            audio_device = self.capabilities.fetch("audio_device", discover)
+        except Exception as e:
+            print(f"Fehler beim Ermitteln des USB-Audio-Geräts auf dem Remote-Host: {e}")
+            audio_device = None
+        if not audio_device:
+            self.capabilities.invalidate("audio_device")
+        return audio_device
+
+    def kill_camera_processes(self):
+        """Beendet Preview-Stream und Kamera-Prozesse für exklusiven Kamera-Zugriff"""
+        try:
+            # WICHTIG: Stoppe stream-wrapper.sh ZUERST (verhindert Auto-Restart von rpicam-vid)
+            self.agent.kill_processes(["stream-wrapper.sh", "rpicam-vid"])
+            self.agent.kill_processes(["libcamera-vid", "ffmpeg"], signal_name="TERM")
+            # Lösche PID-Files für sauberen Neustart
+            self.agent.remove_files(["/tmp/rtsp-stream.pid", "/tmp/*.pid"])
+            print("✅ Alle relevanten Prozesse auf dem Remote-Host wurden beendet.")
+            print("   (inkl. Preview-Stream für exklusiven Kamera-Zugriff)")
+        except Exception as e:
+            print(f"Fehler beim Beenden der Prozesse auf dem Remote-Host: {e}")
+
+    def restart_preview_stream(self, extra_args: Optional[List[str]] = None) -> bool:
+        """Startet den Preview-Stream auf dem Pi neu (falls das Skript vorhanden ist)."""
+        script = "~/start-rtsp-stream.sh"
+        try:
+            if not self.capabilities.fetch(f"file:{script}", lambda: self.agent.file_exists(script),
+                                           cache_negative=False):
+                return False
+            self.agent.spawn([script] + (extra_args or []), log="/tmp/stream-restart.log")
+            return True
+        except Exception:
+            self.capabilities.invalidate(f"file:{script}")
+            raise
+
+    # ------------------------------------------------------------------
+    # Aufnahme
+    # ------------------------------------------------------------------
+    def prepare(self):
+        """Vorbereitung vor dem Start der Aufnahmen (Hook)."""
+
+    def _remote_path(self, year: int, timestamp: str) -> str:
+        return config.get_remote_video_path(year, timestamp)
+
+    def _captures(self, duration_s: int, timestamp: str) -> List[Tuple[str, List[str]]]:
+        """Liste (Name, argv) der Aufnahmen auf dem Pi."""
+        raise NotImplementedError
+
+    def _remote_files(self, timestamp: str) -> List[Tuple[str, bool]]:
+        """Liste (Dateiname, Pflicht) der zu kopierenden Dateien."""
+        raise NotImplementedError
+
+    def _postprocess(self, local_path: str, timestamp: str, files: List[str]) -> List[str]:
+        """Verarbeitet die kopierten Dateien und gibt die Ausgabedateien zurück."""
+        return files
+
+    def _captures_started(self, remote_path: str, local_path: str, timestamp: str):
+        """Wird nach dem Start der Aufnahmen aufgerufen (Hook, z.B. für Transfers während der Aufnahme)."""
+
+    def _abort(self):
+        """Aufräumen nach Abbruch durch Exception (Hook)."""
+
+    def record(self, duration_s: int) -> Dict[str, Any]:
+        """
+        Führt eine komplette Aufnahme durch: Vorbereitung, Aufnahme auf dem
+        Pi, Kopieren und lokale Nachbearbeitung.
+
+        Args:
+            duration_s: Aufnahmedauer in Sekunden
+
+        Returns:
+            Dictionary mit success, timestamp, local_path, remote_path, output_files, length_s
+        """
+        return self.collect(self.capture(duration_s))
+
+    def capture(self, duration_s: int) -> Dict[str, Any]:
+        """
+        Aufnahme auf dem Pi ohne Kopieren (Transfers während der Aufnahme laufen
+        trotzdem). collect() holt die Dateien später, z.B. im Hintergrund,
+        nachdem der Preview-Stream wieder läuft.
+
+        Returns:
+            Ergebnis-Dictionary für collect()
+        """
+        now = datetime.now()
+        timestamp = now.strftime("%A__%Y-%m-%d__%H-%M-%S")
+        year = now.year
+        week_number = now.isocalendar()[1]
+
+        local_path = config.get_video_path(year, week_number, timestamp, self.subdir)
+        os.makedirs(local_path, exist_ok=True)
+        remote_path = self._remote_path(year, timestamp)
+        result = {"success": False, "timestamp": timestamp, "local_path": local_path, "remote_path": remote_path,
+                  "output_files": [], "length_s": 0.0}
+
+        self.stop_event.clear()
+        self.ensure_connected()
+        self.prepare()
+
+        try:
+            # Aufnahmen über den Agent starten (parallel)
+            self.remote_dir = remote_path
+            for name, argv in self._captures(duration_s, timestamp):
+                self.agent.start_capture(name, argv, cwd=remote_path, log=f"{remote_path}/{name}.log")
+                self._active_captures.append(name)
+            self._captures_started(remote_path, local_path, timestamp)
+
+            ended_early = self._wait(duration_s)
+            self._finish_captures(stopped=self.stop_event.is_set() or ended_early)
+            result["length_s"] = self.length_s
+        except BaseException:
+            self._abort()
+            raise
+        finally:
+            # Abbruch durch Exception (z.B. SystemExit im Signal-Handler): Aufnahmen nicht weiterlaufen lassen
+            for name in self._active_captures:
+                try:
+                    self.agent.stop_capture(name)
+                except Exception:
+                    pass
+            self._active_captures = []
+        return result
+
+    def collect(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Kopiert die Dateien einer Aufnahme aus capture(), verarbeitet sie lokal
+        und trägt sie in den Archiv-Index ein (mit result["trigger"], falls gesetzt).
+        """
+        local_path, timestamp = result["local_path"], result["timestamp"]
+        files = self._copy_files(result["remote_path"], local_path, timestamp)
+        if files is None:
+            return result
+
+        self.missing_files = []
+        result["output_files"] = self._postprocess(local_path, timestamp, files)
+        # Lückenhafte Clips nicht als Erfolg melden, indexieren oder auf dem Pi löschen
+        result["missing_files"] = list(self.missing_files)
+        result["success"] = bool(result["output_files"]) and not self.missing_files
+        if result["success"]:
+            # Endgültige Dateien statt der gelöschten Zwischendateien im Manifest
+            for output_file in result["output_files"]:
+                ChecksumManifest(os.path.dirname(output_file)).add(os.path.basename(output_file),
+                                                                    sha256_file(output_file))
+            try:
+                self.index.add(result["output_files"], trigger=result.get("trigger"))
+            except Exception as e:
+                print(f"⚠️  Archiv-Index nicht aktualisiert: {e}")
+        if result["success"] and self.delete_remote:
+            self._delete_verified(result["remote_path"], local_path)
+        return result
+
+    def _delete_verified(self, remote_path: str, local_path: str):
+        """
+        Löscht auf dem Pi nur Dateien, deren Prüfsumme beim Kopieren übereinstimmte
+        (SHA256SUMS.pi: direkt kopierte Dateien, Segmente und Live-Übertragung).
+        """
+        verified = ChecksumManifest(local_path).remote_entries()
+        if not verified:
+            return
+        try:
+            removed = self.agent.remove_files([f"{remote_path}/{name}" for name in verified])
+            print(f"🗑️  {removed} geprüfte Datei(en) auf {self.remote_host['hostname']} gelöscht")
+        except Exception as e:
+            print(f"⚠️  Konnte Dateien auf {self.remote_host['hostname']} nicht löschen: {e}")
+
+    @staticmethod
+    def _remove_intermediate(path: str):
+        """Löscht eine lokale Zwischendatei samt ihrem Eintrag in SHA256SUMS."""
+        os.remove(path)
+        ChecksumManifest(os.path.dirname(path)).remove(os.path.basename(path))
+
+    def _wait(self, duration_s: int) -> bool:
+        """
+        Wartet die Aufnahmedauer ab (mit Fortschrittsanzeige).
+
+        Returns:
+            True, wenn die Aufnahmen vorzeitig beendet werden sollen
+        """
+        start = time.time()
+        progress = tqdm(total=duration_s, desc="Fortschritt", unit="s") if self.show_progress else None
+        try:
+            for _ in range(duration_s):
+                if self.stop_event.is_set():
+                    break
+                time.sleep(1)
+                if progress:
+                    progress.update(1)
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            if progress:
+                progress.close()
+            self.length_s = time.time() - start
+        return False
+
+    def _finish_captures(self, stopped: bool = False):
+        """Abbruch: Aufnahmen sauber beenden, sonst auf reguläres Ende warten"""
+        for name in self._active_captures:
+            if stopped or self.agent.wait_capture(name, timeout=30) is None:
+                self.agent.stop_capture(name)
+            status = self.agent.capture_status(name)
+            if status['returncode'] and not stopped:
+                print(f"⚠️  {name}-Aufnahme beendet mit Exit Code {status['returncode']}")
+                # Gerät abgesteckt/umnummeriert oder Modell-Datei fehlt - beim nächsten Lauf neu ermitteln
+                self.capabilities.invalidate("audio_device" if name == "audio" else None)
+        self._active_captures = []
+
+    def _copy_files(self, remote_path: str, local_path: str, timestamp: str) -> Optional[List[str]]:
+        """
+        Kopiert die Aufnahme-Dateien parallel per SFTP über die SSH-Verbindung
+        des Agents (ein Kanal pro Datei, pipelined) und prüft sie per SHA-256
+        (Manifest SHA256SUMS im lokalen Verzeichnis).
+        """
+        copied = []
+        try:
+            # Mit Scheduler: gedrosselt, pausiert während Vogel-Erkennung/Aufnahme
+            fetcher = SftpFetcher(self.agent.ssh, scheduler=self.scheduler)
+            entries = [(f"{remote_path}/{filename}", os.path.join(local_path, filename), required)
+                       for filename, required in self._remote_files(timestamp)]
+            print(f"📥 Kopiere {', '.join(os.path.basename(remote) for remote, _, _ in entries)} aus {remote_path}...")
+            try:
+                results = fetcher.fetch_all(entries)
+            finally:
+                # Auch bei Fehler: was vollständig angekommen ist, nicht erneut eintragen
+                copied = [local for _, local, _ in entries if os.path.exists(local)]
+            for (remote_file, _, _), fetched in zip(entries, results):
+                if fetched is None:
+                    print(f"ℹ️  Keine Datei {os.path.basename(remote_file)} gefunden")
+            stats = fetcher.get_statistics()
+            print(f"✅ Dateien vom Remote-Host {self.remote_host['hostname']} erfolgreich kopiert "
+                  f"({stats['bytes'] / 1024 / 1024:.1f} MB in {stats['wall_s']:.1f}s, {stats['mb_s']:.1f} MB/s).")
+            return copied
+        except Exception as e:
+            print(f"❌ Fehler beim Kopieren der Dateien von {self.remote_host['hostname']}: {e}")
+            # Bleiben auf dem Pi liegen - der Sync-Dienst holt sie nach
+            self.enqueue_result({"remote_path": remote_path, "local_path": local_path, "timestamp": timestamp},
+                                skip=copied)
+            return None
+
+    def enqueue_result(self, result: Dict[str, Any], skip: List[str] = ()):
+        """Trägt alle (nicht schon kopierten) Dateien einer Aufnahme für den Sync-Dienst ein."""
+        for filename, _ in self._remote_files(result["timestamp"]):
+            local_file = os.path.join(result["local_path"], filename)
+            if local_file not in skip:
+                self.enqueue_sync(f"{result['remote_path']}/{filename}", local_file)
+
+    def enqueue_sync(self, remote_file: str, local_file: str):
+        """Trägt eine Datei für den Sync-Dienst (sync_daemon.py) ein."""
+        try:
+            if self.sync_queue.add(remote_file, local_file):
+                print(f"📋 {os.path.basename(remote_file)} wird vom Sync-Dienst nachgeholt (python sync_daemon.py)")
+        except (OSError, SyncQueueError) as e:
+            print(f"❌ Sync-Warteschlange nicht beschreibbar, {remote_file} bleibt nur auf dem Pi: {e}")
+
+
+class VideoRecorder(Recorder):
+    """
+    HD-Videoaufnahme mit optionalem Hailo-AI-Modul und paralleler Audio-Aufnahme.
+    """
+
+    label = "Videoaufnahme"
+    subdir = "AI-HAD"
+
+    def __init__(self, width: int = 4096, height: int = 2160, codec: str = "h264",
+                 autofocus_mode: str = "continuous", autofocus_range: str = "macro",
+                 hdr: str = "off", roi: Optional[str] = None, rotation: int = 180,
+                 fps: int = 15, cam: int = 0, ai_model: Optional[str] = None,
+                 ai_model_path: Optional[str] = None, audio: bool = True,
+                 event_mode: bool = False, min_length: int = 15, post_roll: int = 5,
+                 activity_factor: float = 1.5, segment_length: Optional[int] = None,
+                 fragmented: bool = False, **kwargs):
+        """
+        Args:
+            width, height, codec, autofocus_mode, autofocus_range, hdr, roi,
+            rotation, fps, cam: rpicam-vid Parameter
+            ai_model: None (ohne KI), 'yolov8', 'bird-species' oder 'custom'
+            ai_model_path: Post-Process-Datei für ai_model='custom'
+            audio: Audio parallel aufnehmen (falls USB-Gerät vorhanden)
+            event_mode: Aufnahme beenden, sobald keine Aktivität mehr im Bild ist
+                        (die Dauer von record() ist dann die Maximallänge)
+            min_length: Mindestlänge im Ereignis-Modus in Sekunden
+            post_roll: Nachlauf nach der letzten Aktivität in Sekunden
+            activity_factor: Aktivität, wenn die mittlere P-Frame-Größe diesen
+                             Faktor über dem Leerlauf-Niveau liegt
+            segment_length: Segment-Länge in Sekunden; Segmente werden schon
+                            während der Aufnahme übertragen und remuxt
+            fragmented: Fragmentiertes MP4 schon während der Aufnahme schreiben
+                        (benötigt PyAV); der Clip ist sofort abspielbar und
+                        bleibt es bei einem Abbruch bis zum letzten Fragment
+            **kwargs: siehe Recorder
+        """
+        super().__init__(**kwargs)
+        self.width = width
+        self.height = height
+        self.codec = codec
+        self.autofocus_mode = autofocus_mode
+        self.autofocus_range = autofocus_range
+        self.hdr = hdr
+        self.roi = roi
+        self.rotation = rotation
+        self.fps = fps
+        self.cam = cam
+        self.ai_model = ai_model
+        self.ai_model_path = ai_model_path
+        self.audio = audio
+        self.audio_device: Optional[str] = None
+        self.event_mode = event_mode
+        self.min_length = min_length
+        self.post_roll = post_roll
+        self.activity_factor = activity_factor
+        self.segment_length = segment_length
+        self.pipeline: Optional[SegmentPipeline] = None
+        if fragmented and not HAS_PYAV:
+            print("⚠️  PyAV nicht installiert - fragmentiertes MP4 nicht verfügbar (pip install av)")
+        self.fragmented = fragmented and HAS_PYAV
+        self.live: Optional[LiveTransfer] = None
+
+    def prepare(self):
+        # Audio-Gerät ermitteln (optional)
+        if self.audio:
+            self.audio_device = self.get_audio_device()
+            if not self.audio_device:
+                print("⚠️  Kein USB-Audio-Gerät auf dem Remote-Host gefunden.")
+                print("ℹ️  Aufnahme wird OHNE Audio fortgesetzt (nur Video).")
+            else:
+                print(f"Verwendetes Audio-Gerät auf dem Remote-Host: {self.audio_device}")
+
+        # WICHTIG: Beende alle laufenden Kamera-Prozesse (inkl. Preview-Stream)
+        # für exklusiven Kamera-Zugriff bei HD-Aufnahme
+        print("🔧 Bereite Kamera vor (stoppe laufende Prozesse)...")
+        self.kill_camera_processes()
+        time.sleep(2)  # Warte bis Prozesse sicher beendet sind
+
+    def check_ai_model_availability(self) -> List[str]:
+        """Prüfe verfügbare AI-Modelle auf dem Remote-Host"""
+        try:
+            available_models = self.capabilities.fetch(
+                "ai_models", lambda: self.agent.glob("/usr/share/rpi-camera-assets/hailo_*_inference.json"))
+            return [model.split('/')[-1].replace('hailo_', '').replace('_inference.json', '') for model in available_models if model]
+        except Exception as e:
+            print(f"⚠️ Fehler beim Prüfen der Modell-Verfügbarkeit: {e}")
+            return ['yolov8']  # Fallback
+
+    def get_ai_model_path(self) -> str:
+        """Bestimme den Pfad zum AI-Modell (Post-Process-Datei) mit Verfügbarkeits-Check"""
+        if not self.ai_model:
+            return ""
+
+        if self.ai_model == 'custom':
+            if not self.ai_model_path:
+                print("⚠️ Für --ai-model custom muss --ai-model-path angegeben werden!")
+                return ""
+            return self.ai_model_path
+
+        model_path = AI_MODEL_PATHS.get(self.ai_model, "")
+
+        # Spezielle Behandlung für bird-species
+        if self.ai_model == 'bird-species':
+            try:
+                if not self.capabilities.fetch(f"file:{model_path}", lambda: self.agent.file_exists(model_path),
+                                               cache_negative=False):
+                    print("⚠️ bird-species Modell nicht gefunden! Erstelle temporäres Modell...")
+                    if self.create_bird_species_model():
+                        self.capabilities.set(f"file:{model_path}", True)
+                        self.capabilities.invalidate("ai_models")
+            except Exception as e:
+                print(f"⚠️ Fehler beim Prüfen des bird-species Modells: {e}")
+                print("🔄 Fallback zu YOLOv8...")
+                model_path = AI_MODEL_PATHS['yolov8']
+
+        return model_path
+
+    def create_bird_species_model(self) -> bool:
+        """Erstelle ein bird-species Modell basierend auf YOLOv8 mit Vogel-fokussierten Einstellungen"""
+        try:
+            # Erstelle die Datei auf dem Remote-Host (Systemverzeichnis, daher sudo)
+            self.agent.write_file(AI_MODEL_PATHS['bird-species'], BIRD_SPECIES_CONFIG, sudo=True)
+            print("✅ bird-species Modell erfolgreich erstellt!")
+            print("🐦 Optimiert für Vogelerkennung: niedrigere Schwelle, Fokus auf Klasse 14 (bird)")
+            return True
+        except Exception as e:
+            print(f"❌ Fehler beim Erstellen des bird-species Modells: {e}")
+            print("🔄 Verwende Standard YOLOv8...")
+            return False
+
+    def get_video_command(self, duration_s: int) -> List[str]:
+        """Argumente für rpicam-vid (Start im Aufnahmeverzeichnis über den Agent)"""
+        command = [
+            "rpicam-vid", "--camera", str(self.cam), "--hdr", self.hdr,
+            "--width", str(self.width), "--height", str(self.height), "--codec", self.codec,
+            "--rotation", str(self.rotation), "--framerate", str(self.fps),
+            "--autofocus-mode", self.autofocus_mode, "--autofocus-range", self.autofocus_range
+        ]
+        ai_model_path = self.get_ai_model_path()
+        if ai_model_path:
+            command += ["--post-process-file", ai_model_path]
+        if self.roi:
+            command += ["--roi", self.roi]
+        if self.segment_length:
+            # Segmente beginnen mit einem Keyframe: GOP von einer Sekunde hält die Länge genau,
+            # --inline wiederholt SPS/PPS, damit jedes Segment für sich dekodierbar ist
+            return command + ["--segment", str(self.segment_length * 1000), "--intra", str(self.fps), "--inline",
+                              "-o", SEGMENT_PATTERN, "-t", str(duration_s * 1000)]
+        if self.fragmented:
+            # Ein Fragment pro GOP: Keyframe jede Sekunde, SPS/PPS vor jedem Keyframe
+            command += ["--intra", str(self.fps), "--inline"]
+        return command + ["-o", "video.h264", "-t", str(duration_s * 1000)]
+
+    def get_audio_command(self, duration_s: int) -> Optional[List[str]]:
+        """Audio-Aufnahme parallel zum Video (nur wenn Audio-Gerät verfügbar)"""
+        if not self.audio_device:
+            return None
+        # Audio-Aufnahme mit arecord (Mono, S16_LE Format)
+        return ["arecord", "-D", self.audio_device, "-f", "S16_LE", "-r", "44100", "-c", "1",
+                "-t", "wav", "-d", str(duration_s), "audio.wav"]
+
+    def _captures(self, duration_s, timestamp):
+        captures = [("video", self.get_video_command(duration_s))]
+        audio_command = self.get_audio_command(duration_s)
+        if audio_command:
+            print("🎤 Starte parallele Audio-Aufnahme...")
+            captures.append(("audio", audio_command))
+        elif self.audio:
+            print("ℹ️  Keine Audio-Aufnahme (Gerät nicht verfügbar)")
+        return captures
+
+    def _remote_files(self, timestamp):
+        if self.segment_length or self.fragmented:
+            # Video kommt segmentweise über die Pipeline bzw. live während der Aufnahme
+            return [("audio.wav", False)]
+        return [("video.h264", True), ("audio.wav", False)]
+
+    def _mp4_file(self, local_path: str, timestamp: str) -> str:
+        return os.path.join(local_path, f"{timestamp}__{self.width}x{self.height}.mp4")
+
+    def _captures_started(self, remote_path, local_path, timestamp):
+        audio_rate = 44100 if self.audio_device else None
+        if self.segment_length:
+            self.pipeline = SegmentPipeline(self.agent, remote_path, local_path, self.fps,
+                                            audio_rate=audio_rate, fragmented=self.fragmented,
+                                            output_file=self._mp4_file(local_path, timestamp))
+            self.pipeline.start()
+        elif self.fragmented:
+            muxer = Mp4Muxer({self._mp4_file(local_path, timestamp): self.fps},
+                             audio_rate=audio_rate, fragmented=True)
+            self.live = LiveTransfer(self.agent, f"{remote_path}/video.h264", muxer)
+            self.live.start()
+            print(f"📺 Live-MP4: {self._mp4_file(local_path, timestamp)}")
+
+    def _finish_captures(self, stopped=False):
+        super()._finish_captures(stopped)
+        if self.pipeline:
+            self.pipeline.capture_done()
+        if self.live:
+            self.live.capture_done()
+
+    def _abort(self):
+        if self.pipeline:
+            self.pipeline.stop()
+            self.pipeline = None
+        if self.live:
+            # Bereits geschriebene Fragmente bleiben abspielbar
+            self.live.stop()
+            self.live.muxer.abort()
+            self.live = None
+
+    def _activity_path(self) -> Optional[str]:
+        """Datei, in die rpicam-vid gerade schreibt."""
+        if self.pipeline:
+            return self.pipeline.latest_remote
+        return f"{self.remote_dir}/video.h264"
+    def _wait(self, duration_s):
+        if not self.event_mode:
+            return super()._wait(duration_s)
+        return self._wait_for_event_end(duration_s)
+
+    def _wait_for_event_end(self, max_length: int) -> bool:
+        """
+        Ereignis-Modus: misst während der Aufnahme die Aktivität im Bild und
+        beendet die Aufnahme nach min_length, sobald post_roll Sekunden lang
+        keine Aktivität mehr war (spätestens nach max_length).
+
+        Aktivität wird auf dem Pi aus der wachsenden H.264-Datei bestimmt:
+        die mittlere P-Frame-Größe steigt mit der Bewegung im Bild. Das
+        Leerlauf-Niveau (leeres Vogelhaus) wird pro Auflösung im
+        Fähigkeiten-Cache gelernt; ohne bekanntes Niveau läuft die erste
+        Aufnahme bis max_length.
+
+        Returns:
+            True, wenn die Aufnahme wegen Inaktivität vorzeitig endet
+        """
+        idle_key = f"idle_p_frame:{self.width}x{self.height}@{self.fps}"
+        idle_level = self.capabilities.get(idle_key)
+        min_level = max_level = None
+
+        start = time.time()
+        last_active = start
+        elapsed = 0.0
+        ended_early = False
+        progress = tqdm(total=max_length, desc="Ereignis", unit="s") if self.show_progress else None
+        try:
+            while not self.stop_event.is_set() and elapsed < max_length:
+                time.sleep(1)
+                elapsed = time.time() - start
+                if progress:
+                    progress.update(min(int(elapsed), max_length) - progress.n)
+
+                # Bei Segmenten wechselt die Datei; der Agent führt die Lese-Position pro Datei
+                video_file = self._activity_path()
+                if not video_file:
+                    continue
+                stats = self.agent.video_activity(video_file)
+                p_frames = stats['frames'] - stats['idr_frames']
+                if p_frames <= 0:
+                    continue
+                level = stats['p_bytes'] / p_frames
+                min_level = level if min_level is None else min(min_level, level)
+                max_level = level if max_level is None else max(max_level, level)
+
+                if idle_level is None or level > idle_level * self.activity_factor:
+                    last_active = time.time()
+                elif elapsed >= self.min_length and time.time() - last_active >= self.post_roll:
+                    ended_early = True
+                    break
+        except KeyboardInterrupt:
+            self.stop()
+        finally:
+            if progress:
+                progress.close()
+            self.length_s = time.time() - start
+
+        # Leerlauf-Niveau nachführen (langsamer Anstieg bei Lichtwechsel/Rauschen), aber nur
+        # wenn die Aufnahme Aktivität und Ruhe enthielt - sonst ist das Minimum evtl. der Vogel selbst
+        if min_level is not None and max_level > min_level * self.activity_factor:
+            self.capabilities.set(idle_key, min_level if idle_level is None else min(min_level, idle_level * 1.1))
+
+        if ended_early:
+            print(f"⏹️  Keine Aktivität mehr - Aufnahme nach {self.length_s:.0f}s beendet "
+                  f"(Nachlauf {self.post_roll}s, max. {max_length}s)")
+        return ended_early
+
+    def _postprocess(self, local_path, timestamp, files):
+        # Konvertiere die .h264-Datei (mit oder ohne Audio) in eine .mp4-Datei
+        video_file = os.path.join(local_path, "video.h264")
+        audio_file = os.path.join(local_path, "audio.wav")
+        mp4_file = self._mp4_file(local_path, timestamp)
+
+        if self.pipeline:
+            return self._finish_segments(mp4_file, audio_file if audio_file in files else None)
+        if self.live:
+            return self._finish_live(mp4_file, audio_file if audio_file in files else None)
+
+        # Überprüfen, ob die Video-Datei existiert
+        if not os.path.exists(video_file):
+            print(f"❌ Fehler: Die Video-Datei {video_file} wurde nicht gefunden.")
+            return []
+
+        if not (audio_file in files and os.path.exists(audio_file)):
+            audio_file = None
+
+        if HAS_PYAV:
+            print(f"🎬 Konvertiere Video{' mit' if audio_file else ' ohne'} Audio...")
+            return self._mux(video_file, {mp4_file: self.fps}, audio_file)
+
+        # FFmpeg-Befehl mit oder ohne Audio
+        if audio_file:
+            print(f"🎬 Konvertiere Video mit Audio...")
+            ffmpeg_command = ["ffmpeg", "-fflags", "+genpts", "-r", str(self.fps), "-i", video_file,
+                              "-i", audio_file, "-c:v", "copy", "-c:a", "aac", mp4_file]
+        else:
+            print(f"🎬 Konvertiere Video ohne Audio...")
+            ffmpeg_command = ["ffmpeg", "-fflags", "+genpts", "-r", str(self.fps), "-i", video_file,
+                              "-c:v", "copy", mp4_file]
+
+        process = subprocess.run(ffmpeg_command, capture_output=True)
+        if process.returncode != 0:
+            print(f"Fehler beim Ausführen von ffmpeg: {process.stderr.decode()}")
+            return []
+
+        print(f"ffmpeg erfolgreich ausgeführt. Video wurde in {mp4_file} konvertiert.")
+        # Lösche die ursprünglichen Dateien
+        self._remove_intermediate(video_file)
+        if audio_file:
+            self._remove_intermediate(audio_file)
+        return [mp4_file]
+
+    def _mux(self, video_file: str, outputs: Dict[str, float], audio_file: Optional[str] = None) -> List[str]:
+        """
+        Verpackt die .h264-Datei im eigenen Prozess (PyAV) in eine oder mehrere
+        MP4-Dateien; Audio wird dabei nur einmal kodiert.
+        """
+        try:
+            stats = mux_file(video_file, outputs, audio_file=audio_file)
+        except Exception as e:
+            print(f"Fehler beim Muxen von {video_file}: {e}")
+            return []
+
+        for mp4_file in outputs:
+            print(f"Video wurde in {mp4_file} konvertiert.")
+        print(f"⏱️  {stats['frames']} Frames in {stats['total_s']:.1f}s ({format_timings(stats)})")
+        # Lösche die ursprünglichen Dateien
+        self._remove_intermediate(video_file)
+        if audio_file:
+            self._remove_intermediate(audio_file)
+        return list(outputs)
+
+    def _finish_segments(self, mp4_file: str, audio_file: Optional[str]) -> List[str]:
+        """Holt die letzten Segmente und fügt alle verlustfrei zusammen."""
+        pipeline, self.pipeline = self.pipeline, None
+        pipeline.finish()
+        stats = pipeline.get_statistics()
+        for error in stats['errors']:
+            print(f"⚠️  {error}")
+
+        if stats['failed'] or stats['errors']:
+            # Fehlende Segmente holt der Sync-Dienst nach, der Clip bekommt eine Lücke
+            self.missing_files = stats['failed'] or [f"{pipeline.remote_dir}/{SEGMENT_GLOB}"]
+            for remote_file in stats['failed']:
+                self.enqueue_sync(remote_file, os.path.join(pipeline.local_dir, os.path.basename(remote_file)))
+            base, ext = os.path.splitext(mp4_file)
+            mp4_file = f"{base}__unvollstaendig{ext}"
+            print(f"⚠️  {len(self.missing_files)} Segment(e) fehlen - Clip unvollständig: {mp4_file}")
+
+        print(f"🎬 Füge {stats['segments']} Segmente zusammen{' (mit Audio)' if audio_file else ''}...")
+        if not pipeline.concat(mp4_file, audio_file):
+            return []
+        if audio_file and os.path.exists(audio_file):
+            self._remove_intermediate(audio_file)
+
+        print(f"✅ Video in {mp4_file} - {time.time() - pipeline.capture_finished_at:.1f}s nach Aufnahmeende "
+              f"(Transfer {stats['transfer_s']:.1f}s, Remux {stats['remux_s']:.1f}s gesamt)")
+        if stats['mux']:
+            print(f"⏱️  {format_timings(stats['mux'])}")
+        return [mp4_file]
+
+    def _finish_live(self, mp4_file: str, audio_file: Optional[str]) -> List[str]:
+        """Liest den Rest der Live-Übertragung, prüft ihn und schließt das fragmentierte MP4."""
+        live, self.live = self.live, None
+        complete = live.finish()
+        try:
+            mux_stats = live.muxer.close(audio_file)
+        except Exception as e:
+            print(f"Fehler beim Abschließen von {mp4_file}: {e}")
+            return [mp4_file] if os.path.exists(mp4_file) else []
+        if audio_file:
+            self._remove_intermediate(audio_file)
+
+        stats = live.get_statistics()
+        if not complete:
+            # MP4 ist bis zum letzten Fragment abspielbar, die vollständige Datei bleibt auf dem Pi
+            print(f"⚠️  Live-Übertragung unvollständig ({stats['error']}) - "
+                  f"{mux_stats['frames']} Frames in {mp4_file}, Original bleibt in {live.remote_file}")
+            self.enqueue_sync(live.remote_file, os.path.join(os.path.dirname(mp4_file), "video.h264"))
+            return [mp4_file]
+
+        # Geprüfte Live-Datei darf auf dem Pi gelöscht werden
+        ChecksumManifest(os.path.dirname(mp4_file)).add_remote(os.path.basename(live.remote_file), stats['sha256'])
+        print(f"✅ Video in {mp4_file} - {time.time() - live.capture_finished_at:.1f}s nach Aufnahmeende "
+              f"({stats['bytes'] / 1024 / 1024:.1f} MB live übertragen, Transfer {stats['transfer_s']:.1f}s)")
+        print(f"⏱️  {format_timings(mux_stats)}")
+        return [mp4_file]
+
+
+class SlowMotionRecorder(VideoRecorder):
+    """
+    Zeitlupen-Aufnahme (hohe Framerate, nur Video) mit MP4-Varianten in
+    mehreren Wiedergabe-Frameraten.
+    """
+
+    label = "Zeitlupe-Aufnahme"
+    subdir = "Zeitlupe"
+
+    # Strengere Kriterien für Zeitlupe
+    readiness_limits = {"cpu_temp": (55, 65), "load": (1.0, 2.0), "disk": (90, 95)}
+    load_notice = (0.8, 1.5)
+
+    # Liste der Ziel-Frameraten
+    playback_fps_list = [5, 10, 20, 30, 120]
+
+    def __init__(self, width: int = 1536, height: int = 864, fps: int = 120,
+                 autofocus_range: str = "full", **kwargs):
+        kwargs.setdefault("audio", False)
+        # Die Wiedergabe-Varianten brauchen die komplette .h264-Datei
+        kwargs["segment_length"] = None
+        kwargs["fragmented"] = False
+        super().__init__(width=width, height=height, fps=fps, autofocus_range=autofocus_range, **kwargs)
+
+    def _remote_files(self, timestamp):
+        return [("video.h264", True)]
+
+    def _postprocess(self, local_path, timestamp, files):
+        # Konvertierung der Videodatei in MP4 mit mehreren Frameraten
+        video_file = os.path.join(local_path, "video.h264")
+        if not os.path.exists(video_file):
+            print(f"❌ Fehler: Die Video-Datei {video_file} wurde nicht gefunden.")
+            return []
+
+        # MP4-Dateiname mit Framerate im Namen
+        targets = {
+            os.path.join(local_path, f"{timestamp}__{self.width}x{self.height}__{playback_fps}fps.mp4"): playback_fps
+            for playback_fps in self.playback_fps_list
+        }
+        if HAS_PYAV:
+            # Ein Durchlauf über die .h264-Datei für alle Wiedergabe-Frameraten
+            print(f"🎬 Konvertiere Video in {len(targets)} Wiedergabe-Frameraten...")
+            return self._mux(video_file, targets)
+
+        outputs = []
+        for mp4_file, playback_fps in targets.items():
+
+            # ffmpeg-Befehl zur Konvertierung mit Framerate-Anpassung
+            process = subprocess.run(["ffmpeg", "-fflags", "+genpts", "-r", str(playback_fps), "-i", video_file,
+                                      "-c:v", "copy", mp4_file], capture_output=True)
+            if process.returncode == 0:
+                print(f"ffmpeg erfolgreich ausgeführt. Video wurde in {mp4_file} konvertiert.")
+                outputs.append(mp4_file)
+            else:
+                print(f"Fehler beim Ausführen von ffmpeg für {playback_fps} FPS: {process.stderr.decode()}")
+
+        # Lösche die ursprüngliche .h264-Datei nach der Konvertierung
+        self._remove_intermediate(video_file)
+        return outputs
+
+
+class AudioRecorder(Recorder):
+    """
+    Reine Audio-Aufnahme über das USB-Mikrofon des Pi.
+    """
+
+    label = "Audio-Aufnahme"
+    subdir = "Audio"
+
+    readiness_limits = {"cpu_temp": (60, 70), "load": (1.0, 2.0), "disk": (80, 90)}
+    strict_readiness = True
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.audio_device: Optional[str] = None
+
+    def prepare(self):
+        self.audio_device = self.get_audio_device()
+        if not self.audio_device:
+            raise RuntimeError("Kein USB-Audio-Gerät auf dem Remote-Host gefunden")
+        print(f"Verwendetes Audio-Gerät auf dem Remote-Host: {self.audio_device}")
+
+    def _remote_path(self, year, timestamp):
+        return config.get_remote_audio_path(year, timestamp)
+
+    def _captures(self, duration_s, timestamp):
+        return [("audio", ["arecord", "-D", self.audio_device, "-f", "S16_LE", "-r", "44100", "-c", "1",
+                           "-t", "wav", "-d", str(duration_s), f"audio_{timestamp}.wav"])]
+
+    def _remote_files(self, timestamp):
+        return [(f"audio_{timestamp}.wav", True)]
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Archiv-Index der Aufnahmen (SQLite)
+===================================
+
+Aufnahmen liegen unter BASE_VIDEO_PATH/<Art>/<Jahr>/<Woche>/<Zeitstempel>/,
+Zeitpunkt, Auflösung und Framerate stehen nur im Dateinamen. Für Fragen wie
+"wie viele Clips mit Vögeln letzte Woche, wie groß, längster Besuch" müsste
+jedes Mal der ganze Baum durchlaufen werden.
+
+Der Index speichert pro Aufnahme-Datei (MP4/WAV) Zeitpunkt, Größe, Dauer,
+Codec, Auflösung, Framerate sowie Trigger-Konfidenz und Erkennungs-
+Zusammenfassung des Auto-Triggers. Die Recorder tragen jede Aufnahme nach
+dem Kopieren ein; update() gleicht den Baum inkrementell ab (nur neue oder
+geänderte Dateien werden geöffnet, Trigger-Daten bleiben erhalten).
+
+Abfragen zählen Aufnahmen, nicht Dateien: alle Dateien eines Aufnahme-
+Verzeichnisses (z.B. die fünf Wiedergabe-Varianten einer Zeitlupe) bilden
+eine Aufnahme. Größe ist der Speicherbedarf aller Dateien, Dauer die der
+Variante mit der höchsten Framerate (am nächsten an Echtzeit).
+
+Metadaten kommen aus PyAV (nur Container-Header, kein Dekodieren), sonst aus
+ffprobe, für WAV aus dem wave-Modul.
+
+Index: BASE_VIDEO_PATH/.recording_index.sqlite
+
+Verwendung:
+    python recording_index.py --last-week --birds          # Anzahl, Größe, längster Besuch
+    python recording_index.py --days 30 --by week          # pro Woche
+    python recording_index.py --since 2025-09-01 --list    # Pfade
+    python recording_index.py --update                     # Baum abgleichen
+"""
+
+import os
+import re
+import json
+import time
+import wave
+import shutil
+import sqlite3
+import argparse
+import subprocess
+from contextlib import contextmanager
+from datetime import date, timedelta
+from typing import Any, Dict, Iterator, List, Optional
+
+try:
+    import av
+    HAS_PYAV = True
+except ImportError:
+    HAS_PYAV = False
+
+DEFAULT_INDEX_NAME = ".recording_index.sqlite"
+MEDIA_EXTENSIONS = {".mp4", ".wav"}
+
+# Montag__2025-09-23__14-30-15
+TIMESTAMP_PATTERN = re.compile(r"(\d{4}-\d{2}-\d{2})__(\d{2})-(\d{2})-(\d{2})")
+# ...__4096x2160 bzw. ...__1536x864__30fps
+SIZE_PATTERN = re.compile(r"__(\d+)x(\d+)(?:__(\d+(?:\.\d+)?)fps)?")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    path        TEXT PRIMARY KEY,
+    category    TEXT NOT NULL,
+    recorded_at TEXT,
+    week        TEXT,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    duration_s  REAL,
+    codec       TEXT,
+    width       INTEGER,
+    height      INTEGER,
+    fps         REAL,
+    trigger_confidence REAL,
+    detection_frames   INTEGER,
+    detections  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_time ON recordings (recorded_at);
+CREATE INDEX IF NOT EXISTS idx_recordings_category ON recordings (category, recorded_at);
+"""
+
+
+def recording_key(path: str) -> str:
+    """Aufnahme einer Datei: ihr Zeitstempel-Verzeichnis, sonst die Datei selbst."""
+    directory = os.path.dirname(path)
+    return directory if TIMESTAMP_PATTERN.search(os.path.basename(directory)) else path
+
+
+def parse_recording_name(path: str) -> Dict[str, Any]:
+    """Zeitpunkt, Auflösung und Framerate aus Datei-/Verzeichnisnamen."""
+    info: Dict[str, Any] = {"recorded_at": None, "week": None, "width": None, "height": None, "fps": None}
+    name = os.path.basename(path)
+    match = TIMESTAMP_PATTERN.search(name) or TIMESTAMP_PATTERN.search(os.path.basename(os.path.dirname(path)))
+    if match:
+        info["recorded_at"] = f"{match.group(1)}T{match.group(2)}:{match.group(3)}:{match.group(4)}"
+        # ISO-Kalenderwoche wie im Verzeichnisbaum
+        year, week, _ = date.fromisoformat(match.group(1)).isocalendar()
+        info["week"] = f"{year}-W{week:02d}"
+    match = SIZE_PATTERN.search(name)
+    if match:
+        info["width"], info["height"] = int(match.group(1)), int(match.group(2))
+        if match.group(3):
+            info["fps"] = float(match.group(3))
+    return info
+
+
+def probe_media(path: str) -> Dict[str, Any]:
+    """
+    Dauer, Codec, Auflösung und Framerate einer Aufnahme-Datei.
+
+    Returns:
+        Dictionary mit duration_s, codec, width, height, fps (fehlende Werte None)
+    """
+    info: Dict[str, Any] = {"duration_s": None, "codec": None, "width": None, "height": None, "fps": None}
+    if path.lower().endswith(".wav"):
+        with wave.open(path, "rb") as f:
+            info["duration_s"] = f.getnframes() / f.getframerate()
+            info["codec"] = f"pcm_s{f.getsampwidth() * 8}"
+        return info
+
+    if HAS_PYAV:
+        with av.open(path) as container:
+            if container.duration is not None:
+                info["duration_s"] = container.duration / av.time_base
+            if container.streams.video:
+                stream = container.streams.video[0]
+                info["codec"] = stream.codec_context.name
+                info["width"], info["height"] = stream.codec_context.width, stream.codec_context.height
+                rate = stream.average_rate or stream.guessed_rate
+                info["fps"] = float(rate) if rate else None
+                if info["duration_s"] is None and stream.duration is not None:
+                    info["duration_s"] = float(stream.duration * stream.time_base)
+        return info
+
+    if shutil.which("ffprobe"):
+        process = subprocess.run(["ffprobe", "-v", "error", "-print_format", "json", "-show_format",
+                                  "-show_streams", "-select_streams", "v:0", path],
+                                 capture_output=True, text=True)
+        if process.returncode == 0:
+            probe = json.loads(process.stdout)
+            duration = probe.get("format", {}).get("duration")
+            info["duration_s"] = float(duration) if duration else None
+            for stream in probe.get("streams", []):
+                info["codec"] = stream.get("codec_name")
+                info["width"], info["height"] = stream.get("width"), stream.get("height")
+                num, _, den = stream.get("avg_frame_rate", "0/0").partition("/")
+                info["fps"] = float(num) / float(den) if den and float(den) else None
+    return info
+
+
+class RecordingIndex:
+    """
+    Persistenter, inkrementell aktualisierter Index aller Aufnahmen.
+
+    Jede Operation öffnet eine eigene Verbindung (WAL-Modus), damit Recorder
+    (auch aus Hintergrund-Threads), Sync-Dienst und Abfragen parallel
+    zugreifen können.
+    """
+
+    def __init__(self, root: Optional[str] = None, index_path: Optional[str] = None):
+        """
+        Args:
+            root: Basisverzeichnis der Aufnahmen (default: BASE_VIDEO_PATH)
+            index_path: SQLite-Datei (default: <root>/.recording_index.sqlite)
+        """
+        if root is None:
+            from config import config
+            root = config.base_video_path
+        self.root = os.path.abspath(os.path.expanduser(root))
+        self.index_path = index_path or os.path.join(self.root, DEFAULT_INDEX_NAME)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        os.makedirs(os.path.dirname(os.path.abspath(self.index_path)), exist_ok=True)
+        conn = sqlite3.connect(self.index_path, timeout=10)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(SCHEMA)
+            conn.create_function("recording_key", 1, recording_key, deterministic=True)
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _category(self, path: str) -> str:
+        """Aufnahme-Art (AI-HAD, Zeitlupe, Audio) aus dem Pfad unterhalb von root."""
+        relative = os.path.relpath(path, self.root)
+        return relative.split(os.sep)[0] if not relative.startswith("..") and os.sep in relative else ""
+
+    def _file_row(self, path: str, st: os.stat_result) -> Dict[str, Any]:
+        row = dict(parse_recording_name(path), duration_s=None, codec=None)
+        try:
+            probed = probe_media(path)
+        except Exception as e:
+            print(f"⚠️  Metadaten von {path} nicht lesbar: {e}")
+            probed = {}
+        # Header-Werte vor Dateinamen (die Framerate im Namen ist die Wiedergabe-Rate)
+        row.update({key: value for key, value in probed.items() if value is not None})
+        row.update(path=path, category=self._category(path), size=st.st_size, mtime_ns=st.st_mtime_ns)
+        return row
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, row: Dict[str, Any]):
+        # Trigger-Spalten bleiben bei Änderungen der Datei erhalten
+        conn.execute(
+            "INSERT INTO recordings "
+            "(path, category, recorded_at, week, size, mtime_ns, duration_s, codec, width, height, fps) "
+            "VALUES (:path, :category, :recorded_at, :week, :size, :mtime_ns, :duration_s, :codec, :width, :height, :fps) "
+            "ON CONFLICT(path) DO UPDATE SET category = excluded.category, recorded_at = excluded.recorded_at, "
+            "week = excluded.week, size = excluded.size, mtime_ns = excluded.mtime_ns, duration_s = excluded.duration_s, "
+            "codec = excluded.codec, width = excluded.width, height = excluded.height, fps = excluded.fps",
+            row
+        )
+
+    def add(self, paths: List[str], trigger: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Trägt Aufnahme-Dateien ein (z.B. nach dem Kopieren).
+
+        Args:
+            paths: Ausgabe-Dateien einer Aufnahme
+            trigger: Zusammenfassung des Auto-Triggers (StreamProcessor.last_trigger)
+
+        Returns:
+            Anzahl eingetragener Dateien
+        """
+        rows = []
+        for path in paths:
+            path = os.path.abspath(path)
+            if os.path.splitext(path)[1].lower() in MEDIA_EXTENSIONS and os.path.exists(path):
+                rows.append(self._file_row(path, os.stat(path)))
+        with self._connect() as conn:
+            for row in rows:
+                self._upsert(conn, row)
+                if trigger:
+                    conn.execute(
+                        "UPDATE recordings SET trigger_confidence = ?, detection_frames = ?, detections = ? "
+                        "WHERE path = ?",
+                        (trigger.get("confidence"), trigger.get("detection_frames"),
+                         json.dumps(trigger.get("classes") or {}, ensure_ascii=False), row["path"])
+                    )
+        return len(rows)
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        """stat() aller Aufnahme-Dateien unter root, ohne sie zu öffnen."""
+        files = {}
+        for directory, dirnames, filenames in os.walk(self.root):
+            dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+            for filename in filenames:
+                if os.path.splitext(filename)[1].lower() in MEDIA_EXTENSIONS and not filename.startswith("."):
+                    path = os.path.join(directory, filename)
+                    files[path] = os.stat(path)
+        return files
+
+    def update(self) -> Dict[str, int]:
+        """
+        Gleicht den Index mit dem Verzeichnisbaum ab. Nur neue oder
+        geänderte Dateien (Größe/mtime) werden geöffnet.
+
+        Returns:
+            Dict mit Anzahl added/changed/removed
+        """
+        stats = {"added": 0, "changed": 0, "removed": 0}
+        current = self._scan()
+        with self._connect() as conn:
+            known = {row[0]: tuple(row[1:]) for row in conn.execute("SELECT path, size, mtime_ns FROM recordings")}
+            for path in known.keys() - current.keys():
+                conn.execute("DELETE FROM recordings WHERE path = ?", (path,))
+                stats["removed"] += 1
+            for path, st in current.items():
+                previous = known.get(path)
+                if previous == (st.st_size, st.st_mtime_ns):
+                    continue
+                self._upsert(conn, self._file_row(path, st))
+                stats["added" if previous is None else "changed"] += 1
+        return stats
+
+    @staticmethod
+    def _recordings(where: str) -> str:
+        """
+        Fasst die gefilterten Dateien zu Aufnahmen zusammen (eine Zeile pro
+        Aufnahme-Verzeichnis) mit recorded_at, week, files, size, duration_s
+        und trigger_confidence.
+        """
+        return (
+            "SELECT recording, MIN(recorded_at) AS recorded_at, MIN(week) AS week, COUNT(*) AS files, "
+            "SUM(size) AS size, MAX(CASE WHEN variant = 1 THEN duration_s END) AS duration_s, "
+            "MAX(trigger_confidence) AS trigger_confidence FROM ("
+            "SELECT *, recording_key(path) AS recording, ROW_NUMBER() OVER ("
+            "PARTITION BY recording_key(path) ORDER BY fps IS NULL, fps DESC, duration_s DESC) AS variant "
+            f"FROM recordings{where}) GROUP BY recording"
+        )
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None,
+              category: Optional[str] = None, birds: bool = False,
+              min_confidence: Optional[float] = None, with_paths: bool = False) -> Dict[str, Any]:
+        """
+        Zusammenfassung und Dateien für einen Zeitraum.
+
+        Args:
+            since/until: ISO-Datum bzw. -Zeitpunkt (until exklusiv)
+            category: Aufnahme-Art (AI-HAD, Zeitlupe, Audio)
+            birds: Nur vom Auto-Trigger mit Vogel-Erkennung ausgelöste Aufnahmen
+            min_confidence: Mindest-Trigger-Konfidenz
+            with_paths: Auch alle Pfade zurückgeben
+
+        Returns:
+            count (Aufnahmen), files, size, duration_s, longest (Aufnahme, duration_s),
+            max_confidence und paths (Dateien, neueste zuerst, leer ohne with_paths)
+        """
+        where, params = self._filter(since, until, category, birds, min_confidence)
+        recordings = self._recordings(where)
+        with self._connect() as conn:
+            count, files, size, duration, max_confidence = conn.execute(
+                f"SELECT COUNT(*), COALESCE(SUM(files), 0), COALESCE(SUM(size), 0), COALESCE(SUM(duration_s), 0), "
+                f"MAX(trigger_confidence) FROM ({recordings})", params).fetchone()
+            longest = conn.execute(
+                f"SELECT recording, duration_s FROM ({recordings}) "
+                f"WHERE duration_s IS NOT NULL ORDER BY duration_s DESC LIMIT 1",
+                params).fetchone()
+            paths = [row[0] for row in conn.execute(
+                f"SELECT path FROM recordings{where} ORDER BY recorded_at DESC", params)] if with_paths else []
+        return {"count": count, "files": files, "size": size, "duration_s": duration, "max_confidence": max_confidence,
+                "longest": longest, "paths": paths}
+
+    def group(self, by: str = "week", **filters) -> List[Dict[str, Any]]:
+        """
+        Anzahl Aufnahmen, Größe und Dauer pro Tag, Woche oder Monat.
+
+        Args:
+            by: "day", "week" oder "month"
+            **filters: wie query()
+        """
+        key = {"day": "date(recorded_at)", "week": "week",
+               "month": "strftime('%Y-%m', recorded_at)"}[by]
+        where, params = self._filter(**filters)
+        with self._connect() as conn:
+            return [{"period": period, "count": count, "size": size, "duration_s": duration}
+                    for period, count, size, duration in conn.execute(
+                        f"SELECT {key}, COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(duration_s), 0) "
+                        f"FROM ({self._recordings(where)}) GROUP BY 1 ORDER BY 1", params)]
+
+    @staticmethod
+    def _filter(since: Optional[str] = None, until: Optional[str] = None, category: Optional[str] = None,
+                birds: bool = False, min_confidence: Optional[float] = None):
+        clauses, params = [], []
+        if since:
+            clauses.append("recorded_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("recorded_at < ?")
+            params.append(until)
+        if category:
+            clauses.append("category = ?")
+            params.append(category)
+        if birds:
+            clauses.append("detection_frames > 0")
+        if min_confidence is not None:
+            clauses.append("trigger_confidence >= ?")
+            params.append(min_confidence)
+        return (" WHERE " + " AND ".join(clauses) if clauses else ""), params
+
+
+def _format_size(size: int) -> str:
+    return f"{size / 1024 ** 3:.2f} GB" if size >= 1024 ** 3 else f"{size / 1024 ** 2:.1f} MB"
+
+
+def _format_duration(seconds: float) -> str:
+    minutes, seconds = divmod(int(round(seconds)), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}min" if hours else f"{minutes}min {seconds:02d}s"
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Archiv-Index der Aufnahmen abfragen",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Beispiele:
+  # Letzte Kalenderwoche, nur Aufnahmen mit Vogel-Erkennung
+  python recording_index.py --last-week --birds
+
+  # Letzte 30 Tage pro Woche, Zeitlupe
+  python recording_index.py --days 30 --by week --category Zeitlupe
+
+  # Pfade ab einem Datum (neueste zuerst)
+  python recording_index.py --since 2025-09-01 --list
+
+  # Index mit dem Verzeichnisbaum abgleichen (z.B. nach manuellem Löschen)
+  python recording_index.py --update
+        """
+    )
+    parser.add_argument("--root", help="Basisverzeichnis der Aufnahmen (default: BASE_VIDEO_PATH aus .env)")
+    parser.add_argument("--index", help=f"Index-Datei (default: <root>/{DEFAULT_INDEX_NAME})")
+    parser.add_argument("--update", action="store_true", help="Index vorher inkrementell mit dem Baum abgleichen")
+    parser.add_argument("--since", help="Ab Datum (YYYY-MM-DD)")
+    parser.add_argument("--until", help="Bis Datum, exklusiv (YYYY-MM-DD)")
+    parser.add_argument("--days", type=int, help="Die letzten N Tage")
+    parser.add_argument("--last-week", action="store_true", help="Letzte Kalenderwoche (Montag bis Sonntag)")
+    parser.add_argument("--category", choices=["AI-HAD", "Zeitlupe", "Audio"], help="Nur diese Aufnahme-Art")
+    parser.add_argument("--birds", action="store_true", help="Nur vom Auto-Trigger mit Vogel-Erkennung ausgelöste Aufnahmen")
+    parser.add_argument("--min-confidence", type=float, help="Mindest-Trigger-Konfidenz")
+    parser.add_argument("--by", choices=["day", "week", "month"], help="Nach Zeitraum gruppieren")
+    parser.add_argument("--list", action="store_true", help="Pfade ausgeben")
+    args = parser.parse_args()
+
+    since, until = args.since, args.until
+    if args.days:
+        since = (date.today() - timedelta(days=args.days)).isoformat()
+    if args.last_week:
+        monday = date.today() - timedelta(days=date.today().weekday() + 7)
+        since, until = monday.isoformat(), (monday + timedelta(days=7)).isoformat()
+
+    index = RecordingIndex(args.root, args.index)
+    if args.update:
+        start = time.time()
+        changes = index.update()
+        print(f"🗂️  Index aktualisiert in {(time.time() - start) * 1000:.0f}ms: +{changes['added']} neu, "
+              f"{changes['changed']} geändert, -{changes['removed']} entfernt")
+
+    filters = {"since": since, "until": until, "category": args.category, "birds": args.birds,
+               "min_confidence": args.min_confidence}
+    start = time.time()
+    if args.by:
+        rows = index.group(args.by, **filters)
+        elapsed = time.time() - start
+        for row in rows:
+            print(f"   {row['period']:<10} {row['count']:5d} Clips  {_format_size(row['size']):>10}  "
+                  f"{_format_duration(row['duration_s'])}")
+        print(f"⏱️  {len(rows)} Zeiträume in {elapsed * 1000:.1f}ms")
+        return 0
+
+    result = index.query(**filters, with_paths=args.list)
+    elapsed = time.time() - start
+    period = f"{since or 'Anfang'} bis {until or 'heute'}"
+    print(f"📊 Aufnahmen ({period}{', nur mit Vogel' if args.birds else ''}):")
+    print(f"   Clips: {result['count']} ({result['files']} Dateien)")
+    print(f"   Größe: {_format_size(result['size'])}")
+    print(f"   Gesamtdauer: {_format_duration(result['duration_s'])}")
+    if result["longest"]:
+        print(f"   Längster Besuch: {_format_duration(result['longest'][1])} ({result['longest'][0]})")
+    if result["max_confidence"] is not None:
+        print(f"   Höchste Trigger-Konfidenz: {result['max_confidence']:.2f}")
+    if args.list:
+        for path in result["paths"]:
+            print(f"   📁 {path}")
+    print(f"⏱️  Abfrage in {elapsed * 1000:.1f}ms")
+    return 0
+
+
+if __name__ == "__main__":
+    exit(main())
@@ -0,0 +1,266 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Segment-Pipeline für segmentierte HD-Aufnahmen
+==============================================
+
+rpicam-vid schreibt mit ``--segment`` feste Abschnitte (video_0000.h264,
+video_0001.h264, ...). Diese Pipeline holt jeden fertigen Abschnitt schon
+während der Aufnahme vom Pi, prüft die SHA-256-Prüfsumme (lokal während
+der Übertragung berechnet, auf dem Pi gleichzeitig per sha256sum), remuxt
+ihn verlustfrei in MP4 und fügt am Ende alle Abschnitte per ffmpeg-concat
+(ohne Neukodierung) zusammen. Nach Aufnahmeende fehlt so nur
+noch der letzte Abschnitt - die Zeit bis zum abspielbaren MP4 entspricht
+etwa einer Segment-Länge statt der ganzen Aufnahme.
+
+Mit PyAV (siehe mp4_muxer.py) entfällt der Umweg über Einzel-MP4s: jeder
+geprüfte Abschnitt wird direkt in einen laufenden Muxer gespeist, am Ende
+kommt nur noch die Audio-Spur dazu.
+
+Ein Abschnitt gilt als fertig, sobald der nächste existiert oder die
+Aufnahme beendet ist.
+
+Verwendung:
+    pipeline = SegmentPipeline(agent, remote_dir, local_dir, fps=15)
+    pipeline.start()
+    ...                      # Aufnahme läuft
+    pipeline.finish()        # letzte Abschnitte holen
+    pipeline.concat("out.mp4", audio_file="audio.wav")
+"""
+
+import os
+import time
+import threading
+import subprocess
+from typing import Any, Dict, List, Optional
+
+from mp4_muxer import Mp4Muxer, HAS_PYAV, CHUNK_SIZE
+from sftp_fetch import RemoteChecksum, ChecksumError, fetch_file
+from checksum_manifest import ChecksumManifest
+
+SEGMENT_PATTERN = "video_%04d.h264"
+SEGMENT_GLOB = "video_*.h264"
+
+
+class SegmentPipeline:
+    """
+    Transfer-, Prüf- und Remux-Pipeline für Aufnahme-Segmente.
+    """
+
+    def __init__(self, agent, remote_dir: str, local_dir: str, fps: int,
+                 poll_interval: float = 1.0, retries: int = 2, audio_rate: Optional[int] = None,
+                 output_file: Optional[str] = None, fragmented: bool = False):
+        """
+        Args:
+            agent: PiAgentClient (mit SSH-Verbindung für SFTP)
+            remote_dir: Aufnahmeverzeichnis auf dem Pi
+            local_dir: Lokales Zielverzeichnis
+            fps: Framerate für genpts beim Remux
+            poll_interval: Sekunden zwischen zwei Verzeichnis-Abfragen
+            retries: Wiederholungen bei Prüfsummen-Fehler
+            audio_rate: Abtastrate der späteren Audio-Spur (nur mit PyAV nötig,
+                        None = ohne Audio)
+            output_file: MP4-Datei des laufenden Muxers (nur mit PyAV,
+                         default: segments.mp4 im Zielverzeichnis)
+            fragmented: Fragmentiertes MP4 schreiben (abspielbar während der Aufnahme)
+        """
+        self.agent = agent
+        self.remote_dir = remote_dir
+        self.local_dir = local_dir
+        self.fps = fps
+        self.poll_interval = poll_interval
+        self.retries = retries
+        self.audio_rate = audio_rate
+        self.fragmented = fragmented
+
+        self.segments: List[Dict[str, Any]] = []  # verarbeitete Segmente in Reihenfolge
+        self.latest_remote: Optional[str] = None  # zuletzt gesehenes (ggf. noch offenes) Segment
+        self.errors: List[str] = []
+        self.failed: List[str] = []  # Remote-Pfade nicht übernommener Segmente
+        self.capture_finished_at: Optional[float] = None
+
+        self._done = set()
+        self._stop_event = threading.Event()
+        self._capture_done = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._sftp = None
+        self.muxer: Optional[Mp4Muxer] = None
+        self.muxed_file = output_file or os.path.join(local_dir, "segments.mp4")
+        self.mux_stats: Dict[str, Any] = {}
+
+    def start(self):
+        """Startet den Hintergrund-Thread."""
+        if HAS_PYAV:
+            self.muxer = Mp4Muxer({self.muxed_file: self.fps}, audio_rate=self.audio_rate,
+                                  fragmented=self.fragmented)
+        self._sftp = self.agent.ssh.open_sftp()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Bricht die Pipeline ab (ohne restliche Segmente zu holen)."""
+        self._stop_event.set()
+        if self._thread:
+            self._thread.join()
+        self._close_sftp()
+        if self.muxer:
+            self.muxer.abort()
+            self.muxer = None
+
+    def capture_done(self):
+        """Markiert die Aufnahme als beendet: das letzte Segment ist jetzt vollständig."""
+        if not self._capture_done.is_set():
+            self.capture_finished_at = time.time()
+            self._capture_done.set()
+
+    def finish(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wartet, bis alle Segmente übertragen und remuxt sind.
+
+        Returns:
+            True, wenn alle Segmente fehlerfrei verarbeitet wurden
+        """
+        self.capture_done()
+        if self._thread:
+            self._thread.join(timeout)
+        self._close_sftp()
+        if self.errors:
+            # Abgebrochene Schleife: nicht mehr erreichte Segmente ebenfalls als fehlend melden
+            try:
+                remote = self.agent.glob(f"{self.remote_dir}/{SEGMENT_GLOB}")
+                self.failed.extend(f for f in remote if f not in self._done and f not in self.failed)
+            except Exception as e:
+                print(f"⚠️  Segment-Liste nach Aufnahmeende nicht lesbar: {e}")
+        return not self.errors and bool(self.segments)
+
+    def _close_sftp(self):
+        if self._sftp is not None:
+            try:
+                self._sftp.close()
+            finally:
+                self._sftp = None
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            # Nach Aufnahmeende noch einmal vollständig abfragen
+            final = self._capture_done.is_set()
+            try:
+                remote = self.agent.glob(f"{self.remote_dir}/{SEGMENT_GLOB}")
+            except Exception as e:
+                self.errors.append(f"Segment-Liste: {e}")
+                return
+            if remote:
+                self.latest_remote = remote[-1]
+
+            # Das neueste Segment wird noch geschrieben, solange die Aufnahme läuft
+            ready = remote if final else remote[:-1]
+            for remote_file in ready:
+                if self._stop_event.is_set():
+                    return
+                if remote_file not in self._done:
+                    self._process(remote_file)
+                    self._done.add(remote_file)
+
+            if final:
+                return
+            self._capture_done.wait(self.poll_interval)
+
+    def _process(self, remote_file: str):
+        """Überträgt, prüft und remuxt ein Segment."""
+        name = os.path.basename(remote_file)
+        local_h264 = os.path.join(self.local_dir, name)
+        local_mp4 = os.path.splitext(local_h264)[0] + ".mp4"
+        segment = {"name": name, "size": 0, "transfer_s": 0.0, "remux_s": 0.0, "mp4": local_mp4}
+
+        try:
+            # sha256sum auf dem Pi läuft parallel zur ersten Übertragung
+            remote_sum = RemoteChecksum(self.agent.ssh, remote_file)
+            for attempt in range(self.retries + 1):
+                start = time.time()
+                try:
+                    fetched = fetch_file(self._sftp, remote_file, local_h264, checksum=remote_sum)
+                    break
+                except ChecksumError:
+                    print(f"⚠️  Prüfsumme von {name} stimmt nicht (Versuch {attempt + 1})")
+                finally:
+                    segment["transfer_s"] += time.time() - start
+            else:
+                raise IOError(f"Prüfsumme von {name} stimmt nach {self.retries + 1} Versuchen nicht")
+            segment["size"] = os.path.getsize(local_h264)
+            # Geprüftes Segment darf auf dem Pi gelöscht werden (lokal bleibt nur das MP4)
+            ChecksumManifest(self.local_dir).add_remote(name, fetched["sha256"])
+
+            # Verlustfreier Remux des Segments (Zeitstempel aus der Framerate)
+            start = time.time()
+            if self.muxer:
+                with open(local_h264, "rb") as f:
+                    for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                        self.muxer.feed(chunk)
+                segment["mp4"] = None
+            else:
+                process = subprocess.run(["ffmpeg", "-y", "-loglevel", "error", "-fflags", "+genpts",
+                                          "-r", str(self.fps), "-i", local_h264, "-c:v", "copy", local_mp4],
+                                         capture_output=True)
+                if process.returncode != 0:
+                    raise RuntimeError(f"Remux von {name} fehlgeschlagen: {process.stderr.decode().strip()}")
+            segment["remux_s"] = time.time() - start
+            os.remove(local_h264)
+
+            self.segments.append(segment)
+            print(f"   📦 Segment {name}: {segment['size'] / 1024 / 1024:.1f} MB in {segment['transfer_s']:.1f}s übertragen, "
+                  f"Remux {segment['remux_s']:.1f}s")
+        except Exception as e:
+            self.errors.append(f"{name}: {e}")
+            self.failed.append(remote_file)
+            print(f"❌ Fehler bei Segment {name}: {e}")
+
+    def concat(self, output_file: str, audio_file: Optional[str] = None) -> bool:
+        """
+        Fügt die remuxten Segmente verlustfrei zu einer MP4 zusammen
+        (optional mit Audio) und entfernt die Segment-Dateien.
+        """
+        if not self.segments:
+            return False
+
+        if self.muxer:
+            muxer, self.muxer = self.muxer, None
+            try:
+                self.mux_stats = muxer.close(audio_file if audio_file and os.path.exists(audio_file) else None)
+            except Exception as e:
+                print(f"Fehler beim Zusammenfügen der Segmente: {e}")
+                return False
+            if os.path.abspath(output_file) != os.path.abspath(self.muxed_file):
+                os.replace(self.muxed_file, output_file)
+            return True
+
+        list_file = os.path.join(self.local_dir, "segments.txt")
+        with open(list_file, "w", encoding="utf-8") as f:
+            for segment in self.segments:
+                f.write(f"file '{segment['mp4']}'\n")
+
+        command = ["ffmpeg", "-y", "-loglevel", "error", "-f", "concat", "-safe", "0", "-i", list_file]
+        if audio_file and os.path.exists(audio_file):
+            command += ["-i", audio_file, "-c:v", "copy", "-c:a", "aac"]
+        else:
+            command += ["-c", "copy"]
+        process = subprocess.run(command + [output_file], capture_output=True)
+        if process.returncode != 0:
+            print(f"Fehler beim Zusammenfügen der Segmente: {process.stderr.decode()}")
+            return False
+
+        os.remove(list_file)
+        for segment in self.segments:
+            os.remove(segment["mp4"])
+        return True
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Segment-Anzahl, Datenmenge, Transfer-/Remux-Zeiten, Fehler, fehlende Segmente und Muxer-Stufen (PyAV)."""
+        return {
+            "segments": len(self.segments),
+            "bytes": sum(s["size"] for s in self.segments),
+            "transfer_s": sum(s["transfer_s"] for s in self.segments),
+            "remux_s": sum(s["remux_s"] for s in self.segments),
+            "errors": list(self.errors),
+            "failed": list(self.failed),
+            "mux": dict(self.mux_stats)
+        }
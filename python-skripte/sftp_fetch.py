@@ -0,0 +1,353 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Paralleles SFTP-Kopieren der Aufnahme-Dateien
+=============================================
+
+Bisher holte der Recorder video.h264 und audio.wav nacheinander per SCP mit
+den Standard-Fenstergrößen von paramiko (2 MB Fenster, 32 KB Pakete) und
+prüfte vor audio.wav zusätzlich per eigenem Befehl, ob die Datei existiert.
+Über WLAN mit einigen Millisekunden Latenz wartet SCP so immer wieder auf
+Fenster-Updates.
+
+SftpFetcher
+- öffnet pro Datei einen eigenen SFTP-Kanal mit größerem Fenster und
+  größerer Paketgröße,
+- liest mit prefetch() (viele Leseanfragen gleichzeitig unterwegs),
+- holt alle Dateien eines Aufnahme-Verzeichnisses parallel,
+- erkennt fehlende optionale Dateien am stat() des Kanals (kein extra Befehl),
+- schreibt in eine .part-Datei (der Sync-Dienst setzt dort nach Abbruch fort),
+- berechnet SHA-256 auf beiden Seiten, während die Bytes fließen (auf dem Pi
+  per sha256sum parallel zur Übertragung, lokal in der Schreibschleife) und
+  trägt geprüfte Dateien in das Manifest SHA256SUMS ein,
+- drosselt optional über den Transfer-Scheduler.
+
+Verwendung:
+    fetcher = SftpFetcher(agent.ssh, scheduler=scheduler)
+    results = fetcher.fetch_all([
+        (f"{remote_path}/video.h264", f"{local_path}/video.h264", True),
+        (f"{remote_path}/audio.wav", f"{local_path}/audio.wav", False),
+    ])
+
+    # Vergleich mit dem SCP-Pfad auf derselben Strecke
+    python sftp_fetch.py --benchmark --size-mb 50
+"""
+
+import os
+import time
+import shlex
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import paramiko
+
+from sync_daemon import PART_SUFFIX
+from checksum_manifest import ChecksumManifest
+
+WINDOW_SIZE = 8 * 1024 * 1024      # paramiko-Standard: 2 MB
+MAX_PACKET_SIZE = 256 * 1024       # paramiko-Standard: 32 KB
+CHUNK_SIZE = 1024 * 1024
+
+
+class ChecksumError(IOError):
+    """Die übertragenen Daten stimmen nicht mit der Datei auf dem Pi überein."""
+
+
+class RemoteChecksum:
+    """
+    SHA-256 einer Datei auf dem Pi per sha256sum. Läuft auf einem eigenen
+    SSH-Kanal gleichzeitig zur Übertragung (blockiert die Agent-Sitzung nicht).
+    """
+
+    def __init__(self, ssh, remote_file: str):
+        self.remote_file = remote_file
+        _, self._stdout, self._stderr = ssh.exec_command(f"sha256sum {shlex.quote(remote_file)}")
+        self._digest: Optional[str] = None
+
+    def result(self) -> str:
+        """Wartet auf sha256sum und gibt die Prüfsumme (hex) zurück."""
+        if self._digest is None:
+            output = self._stdout.read().decode().strip()
+            if self._stdout.channel.recv_exit_status() != 0 or not output:
+                raise IOError(f"sha256sum {self.remote_file}: {self._stderr.read().decode().strip()}")
+            self._digest = output.split()[0]
+        return self._digest
+
+
+def fetch_file(sftp, remote_file: str, local_file: str, size: Optional[int] = None,
+               checksum: Optional[RemoteChecksum] = None, prefetch: bool = True,
+               chunk_size: int = CHUNK_SIZE, transfer=None) -> Dict[str, Any]:
+    """
+    Liest eine Remote-Datei über einen SFTP-Kanal in eine .part-Datei und
+    benennt sie erst nach vollständigem Lesen (und ggf. Prüfung) um. Die
+    SHA-256 wird in der Schreibschleife mitberechnet.
+
+    Args:
+        sftp: paramiko.SFTPClient
+        size: Dateigröße (default: per stat)
+        checksum: Prüfsumme auf dem Pi zum Vergleich (None = ohne Prüfung)
+        prefetch: Leseanfragen vorab stellen (pipelined)
+        transfer: Transfer des TransferSchedulers (advance() pro Block)
+
+    Returns:
+        {bytes, sha256, verified}
+
+    Raises:
+        ChecksumError: Prüfsumme stimmt nicht (die .part-Datei wird gelöscht)
+    """
+    if size is None:
+        size = sftp.stat(remote_file).st_size
+    part_file = local_file + PART_SUFFIX
+    os.makedirs(os.path.dirname(local_file) or ".", exist_ok=True)
+    digest = hashlib.sha256()
+    done = 0
+    with sftp.open(remote_file, "rb") as remote, open(part_file, "wb") as local:
+        if prefetch:
+            remote.prefetch(size)
+        while done < size:
+            data = remote.read(min(chunk_size, size - done))
+            if not data:
+                break
+            local.write(data)
+            digest.update(data)
+            done += len(data)
+            if transfer:
+                transfer.advance(len(data))
+    if done != size:
+        raise IOError(f"{remote_file}: nur {done} von {size} Bytes gelesen")
+
+    if checksum is not None and checksum.result() != digest.hexdigest():
+        os.remove(part_file)
+        raise ChecksumError(f"{remote_file}: Prüfsumme stimmt nicht mit der Datei auf dem Pi überein")
+    os.replace(part_file, local_file)
+    return {"bytes": done, "sha256": digest.hexdigest(), "verified": checksum is not None}
+
+
+class SftpFetcher:
+    """
+    Holt Remote-Dateien über SFTP-Kanäle einer bestehenden SSH-Verbindung.
+    """
+
+    def __init__(self, ssh, window_size: int = WINDOW_SIZE, max_packet_size: int = MAX_PACKET_SIZE,
+                 prefetch: bool = True, parallel: bool = True, verify: bool = True,
+                 scheduler=None, chunk_size: int = CHUNK_SIZE):
+        """
+        Args:
+            ssh: paramiko.SSHClient (z.B. agent.ssh)
+            window_size: SSH-Fenstergröße pro Kanal in Bytes
+            max_packet_size: Maximale SSH-Paketgröße in Bytes
+            prefetch: Leseanfragen vorab stellen (pipelined)
+            parallel: Alle Dateien gleichzeitig holen (ein Kanal pro Datei)
+            verify: SHA-256 auf beiden Seiten vergleichen und ins Manifest eintragen
+            scheduler: TransferScheduler für Drosselung/Pausen (None = ungedrosselt)
+            chunk_size: Blockgröße beim Schreiben
+        """
+        self.ssh = ssh
+        self.window_size = window_size
+        self.max_packet_size = max_packet_size
+        self.prefetch = prefetch
+        self.parallel = parallel
+        self.verify = verify
+        self.scheduler = scheduler
+        self.chunk_size = chunk_size
+
+        self._lock = threading.Lock()
+        self.stats = {"files": 0, "bytes": 0, "transfer_s": 0.0, "wall_s": 0.0}
+
+    def open_sftp(self) -> paramiko.SFTPClient:
+        """Neuer SFTP-Kanal mit den eingestellten Fenster-/Paketgrößen."""
+        return paramiko.SFTPClient.from_transport(self.ssh.get_transport(), window_size=self.window_size,
+                                                  max_packet_size=self.max_packet_size)
+
+    def fetch(self, remote_file: str, local_file: str, required: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Kopiert eine Datei (siehe fetch_file), bei verify=True geprüft und
+        im Manifest des lokalen Verzeichnisses eingetragen (lokal und als
+        auf dem Pi löschbar).
+
+        Returns:
+            {remote, local, bytes, seconds, mb_s, sha256, verified} oder None,
+            wenn eine optionale Datei auf dem Pi fehlt
+        """
+        sftp = self.open_sftp()
+        try:
+            try:
+                size = sftp.stat(remote_file).st_size
+            except FileNotFoundError:
+                if required:
+                    raise
+                return None
+
+            start = time.time()
+            checksum = RemoteChecksum(self.ssh, remote_file) if self.verify else None
+            transfer = self.scheduler.transfer(size) if self.scheduler else None
+            try:
+                fetched = fetch_file(sftp, remote_file, local_file, size, checksum,
+                                     self.prefetch, self.chunk_size, transfer)
+            finally:
+                if transfer:
+                    transfer.close()
+        finally:
+            sftp.close()
+
+        if self.verify:
+            manifest = ChecksumManifest(os.path.dirname(local_file) or ".")
+            manifest.add(os.path.basename(local_file), fetched["sha256"])
+            manifest.add_remote(os.path.basename(remote_file), fetched["sha256"])
+        seconds = time.time() - start
+        with self._lock:
+            self.stats["files"] += 1
+            self.stats["bytes"] += fetched["bytes"]
+            self.stats["transfer_s"] += seconds
+        return dict(fetched, remote=remote_file, local=local_file, seconds=seconds,
+                    mb_s=fetched["bytes"] / 1024 / 1024 / seconds if seconds > 0 else 0.0)
+
+    def fetch_all(self, files: List[Tuple[str, str, bool]]) -> List[Optional[Dict[str, Any]]]:
+        """
+        Kopiert mehrere Dateien, bei parallel=True gleichzeitig.
+
+        Args:
+            files: Liste (remote_file, local_file, required)
+
+        Returns:
+            Ergebnis von fetch() pro Datei (gleiche Reihenfolge)
+
+        Raises:
+            Den ersten Fehler, nachdem alle Dateien abgeschlossen sind
+        """
+        start = time.time()
+        try:
+            if not self.parallel or len(files) < 2:
+                return [self.fetch(*entry) for entry in files]
+            with ThreadPoolExecutor(max_workers=len(files)) as executor:
+                futures = [executor.submit(self.fetch, *entry) for entry in files]
+                errors = [f.exception() for f in futures if f.exception() is not None]
+                if errors:
+                    raise errors[0]
+                return [f.result() for f in futures]
+        finally:
+            self.stats["wall_s"] += time.time() - start
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Dateien, Bytes, Summe der Transferzeiten, Gesamtdauer und MB/s."""
+        stats = dict(self.stats)
+        stats["mb_s"] = stats["bytes"] / 1024 / 1024 / stats["wall_s"] if stats["wall_s"] > 0 else 0.0
+        return stats
+
+
+def _scp_fetch(ssh, files: List[Tuple[str, str, bool]]):
+    """Bisheriger Pfad: nacheinander per SCP (mit test -f für optionale Dateien)."""
+    from scp import SCPClient
+
+    scp = SCPClient(ssh.get_transport())
+    try:
+        for remote_file, local_file, required in files:
+            if not required:
+                _, stdout, _ = ssh.exec_command(f"test -f {remote_file}")
+                if stdout.channel.recv_exit_status() != 0:
+                    continue
+            scp.get(remote_file, local_file)
+    finally:
+        scp.close()
+
+
+def benchmark(ssh, size_mb: float = 50, files: int = 2, window_size: int = WINDOW_SIZE,
+              max_packet_size: int = MAX_PACKET_SIZE, runs: int = 1) -> Dict[str, float]:
+    """
+    Vergleicht SCP mit SFTP (Standard, prefetch, parallel, parallel mit Prüfsummen)
+    auf derselben Strecke.
+
+    Auf dem Pi werden `files` Testdateien mit size_mb erzeugt (die erste in
+    voller Größe wie video.h264, die weiteren mit einem Zehntel wie audio.wav).
+
+    Returns:
+        MB/s pro Variante (Mittel über runs)
+    """
+    import tempfile
+
+    remote_dir = f"/tmp/sftp_benchmark_{int(time.time())}"
+    sizes = [int(size_mb * 1024 * 1024)] + [int(size_mb * 1024 * 1024 / 10)] * (files - 1)
+    commands = [f"mkdir -p {remote_dir}"] + [
+        f"head -c {size} /dev/urandom > {remote_dir}/file{i}.dat" for i, size in enumerate(sizes)]
+    _, stdout, _ = ssh.exec_command(" && ".join(commands))
+    stdout.channel.recv_exit_status()
+    total_mb = sum(sizes) / 1024 / 1024
+
+    variants = {
+        "SCP (bisher)": lambda entries: _scp_fetch(ssh, entries),
+        "SFTP Standard": lambda entries: SftpFetcher(ssh, window_size=None, max_packet_size=None, prefetch=False,
+                                                     parallel=False, verify=False).fetch_all(entries),
+        "SFTP prefetch": lambda entries: SftpFetcher(ssh, window_size, max_packet_size, parallel=False,
+                                                     verify=False).fetch_all(entries),
+        "SFTP parallel": lambda entries: SftpFetcher(ssh, window_size, max_packet_size,
+                                                     verify=False).fetch_all(entries),
+        "+ Prüfsummen": lambda entries: SftpFetcher(ssh, window_size, max_packet_size).fetch_all(entries),
+    }
+    results: Dict[str, float] = {}
+    with tempfile.TemporaryDirectory() as local_dir:
+        try:
+            for name, fetch in variants.items():
+                seconds = 0.0
+                for _ in range(runs):
+                    entries = [(f"{remote_dir}/file{i}.dat", os.path.join(local_dir, f"file{i}.dat"), True)
+                               for i in range(len(sizes))]
+                    start = time.time()
+                    fetch(entries)
+                    seconds += time.time() - start
+                    for _, local_file, _ in entries:
+                        os.remove(local_file)
+                results[name] = total_mb * runs / seconds if seconds > 0 else 0.0
+        finally:
+            ssh.exec_command(f"rm -rf {remote_dir}")
+    return results
+
+
+def main():
+    from config import config
+    from pi_agent_client import PiAgentClient
+
+    parser = argparse.ArgumentParser(description="Aufnahme-Dateien per SFTP parallel vom Raspberry Pi holen")
+    parser.add_argument("remote_files", nargs="*", help="Remote-Dateien (ohne --benchmark)")
+    parser.add_argument("--dest", default=".", help="Lokales Zielverzeichnis (default: aktuelles Verzeichnis)")
+    parser.add_argument("--host", default=config.hostname, help="Remote-Host (default: aus .env)")
+    parser.add_argument("--benchmark", action="store_true", help="SCP und SFTP-Varianten auf dieser Strecke vergleichen")
+    parser.add_argument("--size-mb", type=float, default=50, help="Größe der Benchmark-Datei in MB (default: 50)")
+    parser.add_argument("--files", type=int, default=2, help="Anzahl Benchmark-Dateien (default: 2, wie Video + Audio)")
+    parser.add_argument("--runs", type=int, default=1, help="Wiederholungen pro Variante (default: 1)")
+    parser.add_argument("--window-mb", type=float, default=WINDOW_SIZE / 1024 / 1024,
+                        help=f"SSH-Fenstergröße in MB (default: {WINDOW_SIZE // 1024 // 1024})")
+    parser.add_argument("--packet-kb", type=int, default=MAX_PACKET_SIZE // 1024,
+                        help=f"Maximale SSH-Paketgröße in KB (default: {MAX_PACKET_SIZE // 1024})")
+    args = parser.parse_args()
+
+    if not args.benchmark and not args.remote_files:
+        parser.error("Remote-Dateien oder --benchmark angeben")
+
+    window_size = int(args.window_mb * 1024 * 1024)
+    max_packet_size = args.packet_kb * 1024
+    remote_host = dict(config.get_remote_host_config(), hostname=args.host)
+    with PiAgentClient.connect(remote_host, timeout=5) as agent:
+        if args.benchmark:
+            print(f"⏱️  Benchmark: {args.files} Datei(en), {args.size_mb:.0f} MB + {args.files - 1} x "
+                  f"{args.size_mb / 10:.0f} MB, Fenster {args.window_mb:.0f} MB, Pakete {args.packet_kb} KB")
+            results = benchmark(agent.ssh, args.size_mb, args.files, window_size, max_packet_size, args.runs)
+            baseline = results["SCP (bisher)"]
+            for name, mb_s in results.items():
+                factor = f"  ({mb_s / baseline:.2f}x)" if baseline > 0 else ""
+                print(f"   {name:<15} {mb_s:7.1f} MB/s{factor}")
+            return
+
+        fetcher = SftpFetcher(agent.ssh, window_size, max_packet_size)
+        entries = [(remote_file, os.path.join(args.dest, os.path.basename(remote_file)), True)
+                   for remote_file in args.remote_files]
+        for result in fetcher.fetch_all(entries):
+            print(f"✅ {result['local']} ({result['bytes'] / 1024 / 1024:.1f} MB, {result['mb_s']:.1f} MB/s)")
+        stats = fetcher.get_statistics()
+        print(f"📊 {stats['bytes'] / 1024 / 1024:.1f} MB in {stats['wall_s']:.1f}s ({stats['mb_s']:.1f} MB/s)")
+
+
+if __name__ == "__main__":
+    main()
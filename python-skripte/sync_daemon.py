@@ -0,0 +1,422 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Store-and-Forward-Sync für Aufnahmen
+====================================
+
+Ist der Client offline oder bricht das Kopieren nach einer Aufnahme ab,
+bleiben die Dateien unter remote_video_path/<Jahr>/<Zeitstempel> auf dem Pi
+liegen. Die Recorder tragen solche Dateien in eine persistente Warteschlange
+ein; dieser Dienst arbeitet sie ab, sobald der Pi erreichbar ist:
+
+- Fortsetzen abgebrochener Übertragungen (SFTP-Lesen ab Offset in eine
+  .part-Datei)
+- Prüfung per SHA-256, blockweise während der Übertragung berechnet und
+  im Manifest SHA256SUMS neben der Datei eingetragen
+- Löschen der Datei auf dem Pi erst nach erfolgreicher Prüfung
+- Bandbreiten-Limit über den Transfer-Scheduler (fest oder gemessen),
+  damit der Preview-Stream nicht verhungert
+
+Warteschlange: ~/.cache/vogel-kamera/sync-queue.json
+
+Verwendung:
+    # Dienst (prüft alle 60s)
+    python sync_daemon.py --bwlimit 20
+
+    # Einmal abarbeiten / Warteschlange anzeigen
+    python sync_daemon.py --once
+    python sync_daemon.py --show
+
+    # Alle Aufnahmen auf dem Pi einsammeln (nicht nur eingetragene)
+    python sync_daemon.py --scan --once
+"""
+
+import os
+import json
+import time
+import fcntl
+import signal
+import hashlib
+import argparse
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from transfer_scheduler import TransferScheduler
+from checksum_manifest import ChecksumManifest
+
+DEFAULT_QUEUE_PATH = Path.home() / ".cache" / "vogel-kamera" / "sync-queue.json"
+CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = ".part"
+
+# Aufnahme-Dateien, die --scan auf dem Pi einsammelt
+SCAN_PATTERNS = ["*.h264", "*.wav", "*.mp4"]
+
+
+class SyncQueueError(ValueError):
+    """Warteschlangen-Datei ist nicht lesbar (wird nicht überschrieben)."""
+
+
+class SyncQueue:
+    """
+    Persistente Warteschlange ausstehender Remote-Dateien pro Host.
+
+    Jede Operation liest und schreibt die Datei unter einem flock() auf
+    <Datei>.lock neu, damit Recorder und Sync-Dienst in getrennten Prozessen
+    eintragen bzw. abarbeiten können, ohne sich Einträge zu überschreiben.
+    """
+
+    def __init__(self, hostname: str, path: Optional[Path] = None):
+        """
+        Args:
+            hostname: Remote-Host (Schlüssel in der Warteschlange)
+            path: Warteschlangen-Datei (default: ~/.cache/vogel-kamera/sync-queue.json)
+        """
+        self.hostname = hostname
+        self.path = Path(path) if path else DEFAULT_QUEUE_PATH
+
+    @contextmanager
+    def _locked(self, exclusive: bool = True) -> Iterator[None]:
+        """Sperrt die Warteschlange prozessübergreifend (eigene Lock-Datei, da _save die Datei ersetzt)."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path.with_name(self.path.name + ".lock"), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _load(self) -> dict:
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+        except ValueError as e:
+            # Nicht als leer behandeln - das nächste _save() würde alle Einträge löschen
+            raise SyncQueueError(f"Sync-Warteschlange {self.path} beschädigt ({e}) - bitte prüfen oder entfernen")
+
+    def _save(self, data: dict):
+        fd, tmp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name + ".", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def add(self, remote_file: str, local_file: str) -> bool:
+        """
+        Trägt eine Remote-Datei ein (vorhandene Einträge bleiben unverändert).
+
+        Returns:
+            True, wenn der Eintrag neu ist
+        """
+        with self._locked():
+            data = self._load()
+            entries = data.setdefault(self.hostname, {})
+            if remote_file in entries:
+                return False
+            entries[remote_file] = {"local": local_file, "added": time.time(), "attempts": 0, "error": None}
+            self._save(data)
+        return True
+
+    def update(self, remote_file: str, **fields):
+        with self._locked():
+            data = self._load()
+            entry = data.get(self.hostname, {}).get(remote_file)
+            if entry is not None:
+                entry.update(fields)
+                self._save(data)
+
+    def remove(self, remote_file: str):
+        with self._locked():
+            data = self._load()
+            if data.get(self.hostname, {}).pop(remote_file, None) is not None:
+                self._save(data)
+
+    def entries(self) -> Dict[str, Dict[str, Any]]:
+        """Alle Einträge des Hosts (Remote-Pfad -> Eintrag), älteste zuerst."""
+        with self._locked(exclusive=False):
+            entries = self._load().get(self.hostname, {})
+        return dict(sorted(entries.items(), key=lambda item: item[1]["added"]))
+
+
+def local_path_for(remote_file: str, subdir: str = "Sync") -> str:
+    """
+    Lokaler Zielpfad für eine Remote-Datei <root>/<Jahr>/<Zeitstempel>/<Datei>
+    (gleiche Ablage wie die Recorder, Kalenderwoche aus dem Zeitstempel).
+    """
+    from config import config
+
+    parts = remote_file.rstrip("/").split("/")
+    filename, timestamp, year = parts[-1], parts[-2], parts[-3]
+    try:
+        # Zeitstempel: <Wochentag>__YYYY-MM-DD__HH-MM-SS
+        week = datetime.strptime(timestamp.split("__")[1], "%Y-%m-%d").isocalendar()[1]
+    except (IndexError, ValueError):
+        week = "unbekannt"
+    return os.path.join(config.get_video_path(year, week, timestamp, subdir), filename)
+
+
+class SyncDaemon:
+    """
+    Arbeitet die Sync-Warteschlange ab: fortsetzbarer Transfer, Prüfung,
+    Löschen auf dem Pi.
+    """
+
+    def __init__(self, queue: SyncQueue, remote_host: Optional[Dict[str, Any]] = None,
+                 bwlimit_mbit: Optional[float] = None, delete_remote: bool = True,
+                 max_attempts: int = 5, min_age: float = 120, chunk_size: int = CHUNK_SIZE,
+                 scheduler: Optional[TransferScheduler] = None):
+        """
+        Args:
+            queue: SyncQueue des Hosts
+            remote_host: SSH-Konfiguration (default: aus .env)
+            bwlimit_mbit: Feste Übertragungsrate in Mbit/s (None = unbegrenzt,
+                          ignoriert bei eigenem scheduler)
+            delete_remote: Datei auf dem Pi nach erfolgreicher Prüfung löschen
+            max_attempts: Prüfsummen-Fehler bis ein Eintrag als fehlgeschlagen gilt
+            min_age: Dateien erst übertragen, wenn sie so lange (Sekunden) unverändert
+                     sind (Schutz vor laufenden Aufnahmen)
+            chunk_size: Lesegröße pro SFTP-Anfrage
+            scheduler: Gemeinsamer Transfer-Scheduler (z.B. mit dem Auto-Trigger)
+        """
+        if remote_host is None:
+            from config import config
+            remote_host = config.get_remote_host_config()
+        self.queue = queue
+        self.remote_host = remote_host
+        if scheduler is None and bwlimit_mbit:
+            scheduler = TransferScheduler(rate_mbit=bwlimit_mbit)
+        self.scheduler = scheduler
+        self.delete_remote = delete_remote
+        self.max_attempts = max_attempts
+        self.min_age = min_age
+        self.chunk_size = chunk_size
+        self.stats = {"files": 0, "bytes": 0, "resumed": 0, "failed": 0, "transfer_s": 0.0}
+        self._running = True
+
+    def stop(self):
+        self._running = False
+
+    def scan(self, agent, roots: List[str], subdir: str = "Sync") -> int:
+        """
+        Trägt alle Aufnahme-Dateien unter <root>/<Jahr>/<Zeitstempel>/ ein.
+
+        Returns:
+            Anzahl neuer Einträge
+        """
+        added = 0
+        for root in roots:
+            for pattern in SCAN_PATTERNS:
+                for remote_file in agent.glob(f"{root}/*/*/{pattern}"):
+                    if self.queue.add(remote_file, local_path_for(remote_file, subdir)):
+                        added += 1
+        return added
+
+    def sync_once(self, agent) -> int:
+        """
+        Überträgt alle ausstehenden Einträge über eine bestehende Agent-Sitzung.
+
+        Returns:
+            Anzahl erfolgreich übertragener Dateien
+        """
+        done = 0
+        sftp = agent.ssh.open_sftp()
+        try:
+            for remote_file, entry in self.queue.entries().items():
+                if not self._running:
+                    break
+                if entry["attempts"] >= self.max_attempts:
+                    continue
+                if self.transfer(agent, sftp, remote_file, entry):
+                    done += 1
+        finally:
+            sftp.close()
+        return done
+
+    def transfer(self, agent, sftp, remote_file: str, entry: Dict[str, Any]) -> bool:
+        """Überträgt eine Datei (ggf. fortgesetzt), prüft sie und löscht sie auf dem Pi."""
+        local_file = entry["local"]
+        part_file = local_file + PART_SUFFIX
+        name = os.path.basename(remote_file)
+
+        stat = agent.file_stat(remote_file)
+        if stat is None:
+            if os.path.exists(local_file):
+                print(f"✅ {name}: bereits lokal vorhanden - Eintrag entfernt")
+            else:
+                print(f"⚠️  {name}: auf dem Pi nicht mehr vorhanden - Eintrag entfernt")
+            self.queue.remove(remote_file)
+            return False
+        if time.time() - stat["mtime"] < self.min_age:
+            return False  # wird evtl. noch geschrieben
+
+        os.makedirs(os.path.dirname(local_file), exist_ok=True)
+        offset = os.path.getsize(part_file) if os.path.exists(part_file) else 0
+        if offset > stat["size"]:
+            offset = 0
+        digest = hashlib.sha256()
+        if offset:
+            # Vorhandenen Teil einmal einlesen, danach wird die Prüfsumme mitgeführt
+            with open(part_file, "rb") as f:
+                for block in iter(lambda: f.read(self.chunk_size), b""):
+                    digest.update(block)
+            self.stats["resumed"] += 1
+            print(f"⏯️  {name}: setze bei {offset / 1024 / 1024:.1f} von {stat['size'] / 1024 / 1024:.1f} MB fort")
+        else:
+            print(f"📥 {name}: {stat['size'] / 1024 / 1024:.1f} MB")
+
+        start = time.time()
+        transferred = 0
+        transfer = self.scheduler.transfer(stat["size"] - offset) if self.scheduler else None
+        try:
+            with sftp.open(remote_file, "rb") as remote, open(part_file, "ab" if offset else "wb") as local:
+                remote.seek(offset)
+                while self._running:
+                    data = remote.read(self.chunk_size)
+                    if not data:
+                        break
+                    local.write(data)
+                    digest.update(data)
+                    transferred += len(data)
+                    if transfer:
+                        transfer.advance(len(data))
+        except (IOError, OSError) as e:
+            # .part-Datei bleibt liegen, der nächste Durchlauf setzt fort
+            self.queue.update(remote_file, error=str(e))
+            print(f"❌ {name}: Übertragung abgebrochen bei {(offset + transferred) / 1024 / 1024:.1f} MB ({e})")
+            return False
+        finally:
+            if transfer:
+                transfer.close()
+            self.stats["bytes"] += transferred
+            self.stats["transfer_s"] += time.time() - start
+        if not self._running:
+            return False
+
+        if digest.hexdigest() != agent.file_checksum(remote_file):
+            os.remove(part_file)
+            self.queue.update(remote_file, attempts=entry["attempts"] + 1, error="Prüfsumme stimmt nicht")
+            if entry["attempts"] + 1 >= self.max_attempts:
+                self.stats["failed"] += 1
+            print(f"⚠️  {name}: Prüfsumme stimmt nicht (Versuch {entry['attempts'] + 1}/{self.max_attempts})")
+            return False
+
+        os.replace(part_file, local_file)
+        ChecksumManifest(os.path.dirname(local_file)).add(os.path.basename(local_file), digest.hexdigest())
+        if self.delete_remote:
+            agent.remove_files([remote_file])
+        self.queue.remove(remote_file)
+        self.stats["files"] += 1
+        print(f"✅ {name} → {local_file} ({transferred / 1024 / 1024:.1f} MB in {time.time() - start:.1f}s, geprüft)")
+        return True
+
+    def _probe(self, agent):
+        """Durchsatz einmal messen und die Rate des Schedulers setzen."""
+        try:
+            probe = self.scheduler.probe(agent.ssh)
+            print(f"📶 Gemessen: {probe.get('throughput_mbit', 0):.1f} Mbit/s, "
+                  f"Latenz {probe.get('latency_ms') or 0:.1f} ms → Sync mit {probe['rate_mbit']:.1f} Mbit/s")
+        except Exception as e:
+            print(f"⚠️  Durchsatz-Messung fehlgeschlagen: {e}")
+
+    def run(self, interval: float = 60, roots: Optional[List[str]] = None):
+        """
+        Dienst-Schleife: verbindet sich bei Bedarf, arbeitet die Warteschlange
+        ab und wartet interval Sekunden. Ist der Pi nicht erreichbar, wird es
+        im nächsten Durchlauf erneut versucht.
+        """
+        from pi_agent_client import PiAgentClient
+
+        while self._running:
+            try:
+                with PiAgentClient.connect(self.remote_host, timeout=5) as agent:
+                    if self.scheduler and self.scheduler.hostname and self.scheduler.probe_throughput is None:
+                        self._probe(agent)
+                    if roots:
+                        added = self.scan(agent, roots)
+                        if added:
+                            print(f"🔎 {added} neue Datei(en) auf dem Pi gefunden")
+                    self.sync_once(agent)
+            except SyncQueueError:
+                raise
+            except Exception as e:
+                print(f"📴 {self.remote_host['hostname']} nicht erreichbar ({e}) - nächster Versuch in {interval:.0f}s")
+
+            deadline = time.time() + interval
+            while self._running and time.time() < deadline:
+                time.sleep(1)
+
+
+def main():
+    from config import config
+
+    parser = argparse.ArgumentParser(description="Store-and-Forward-Sync für Aufnahmen vom Raspberry Pi")
+    parser.add_argument("--host", default=config.hostname, help="Remote-Host (default: aus .env)")
+    parser.add_argument("--interval", type=float, default=60, help="Sekunden zwischen zwei Durchläufen (default: 60)")
+    parser.add_argument("--bwlimit", type=float, help="Maximale Übertragungsrate in Mbit/s (default: unbegrenzt)")
+    parser.add_argument("--adaptive", action="store_true",
+                        help="Rate aus Durchsatz-/Latenz-Messung bestimmen und die Preview-Bitrate freihalten")
+    parser.add_argument("--preview-kbit", type=float, default=1000,
+                        help="Bitrate des Preview-Streams in kbit/s für --adaptive (default: 1000)")
+    parser.add_argument("--keep-remote", action="store_true", help="Dateien nach der Prüfung nicht auf dem Pi löschen")
+    parser.add_argument("--scan", action="store_true",
+                        help="Zusätzlich alle Aufnahmen unter REMOTE_VIDEO_PATH/REMOTE_AUDIO_PATH eintragen")
+    parser.add_argument("--once", action="store_true", help="Nur einen Durchlauf, dann beenden")
+    parser.add_argument("--show", action="store_true", help="Warteschlange anzeigen")
+    args = parser.parse_args()
+
+    queue = SyncQueue(args.host)
+
+    if args.show:
+        entries = queue.entries()
+        if not entries:
+            print(f"ℹ️  Keine ausstehenden Dateien für {args.host} ({queue.path})")
+            return
+        print(f"📋 Ausstehend für {args.host}:")
+        for remote_file, entry in entries.items():
+            part_file = entry["local"] + PART_SUFFIX
+            partial = f", {os.path.getsize(part_file) / 1024 / 1024:.1f} MB übertragen" if os.path.exists(part_file) else ""
+            error = f" ⚠️  {entry['error']}" if entry["error"] else ""
+            print(f"   {remote_file} (Versuche: {entry['attempts']}{partial}){error}")
+        return
+
+    remote_host = dict(config.get_remote_host_config(), hostname=args.host)
+    scheduler = None
+    if args.adaptive:
+        scheduler = TransferScheduler(args.host, preview_kbit=args.preview_kbit, rate_mbit=args.bwlimit)
+    daemon = SyncDaemon(queue, remote_host, bwlimit_mbit=args.bwlimit, delete_remote=not args.keep_remote,
+                        scheduler=scheduler)
+    roots = [config.remote_video_path, config.remote_audio_path] if args.scan else None
+
+    signal.signal(signal.SIGINT, lambda sig, frame: daemon.stop())
+    signal.signal(signal.SIGTERM, lambda sig, frame: daemon.stop())
+
+    if args.once:
+        from pi_agent_client import PiAgentClient
+
+        with PiAgentClient.connect(remote_host, timeout=5) as agent:
+            if scheduler:
+                daemon._probe(agent)
+            if roots:
+                print(f"🔎 {daemon.scan(agent, roots)} neue Datei(en) auf dem Pi gefunden")
+            daemon.sync_once(agent)
+    else:
+        print(f"🔄 Sync-Dienst für {args.host} gestartet (alle {args.interval:.0f}s"
+              f"{f', max. {args.bwlimit} Mbit/s' if args.bwlimit else ''})")
+        daemon.run(args.interval, roots)
+
+    stats = daemon.stats
+    print(f"📊 {stats['files']} Datei(en), {stats['bytes'] / 1024 / 1024:.1f} MB in {stats['transfer_s']:.1f}s "
+          f"({stats['resumed']} fortgesetzt, {stats['failed']} fehlgeschlagen)")
+
+
+if __name__ == "__main__":
+    main()
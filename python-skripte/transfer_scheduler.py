@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Bandbreiten-bewusster Transfer-Scheduler
+========================================
+
+Große Kopien (4K-Clips) laufen über dieselbe WLAN-Strecke wie der
+Preview-Stream (ca. 1000 kbit/s). Ohne Begrenzung verdrängen sie den Stream:
+Frames fallen aus, die nächste Vogel-Erkennung verzögert sich.
+
+Der Scheduler
+- misst den verfügbaren Durchsatz mit den Messungen aus
+  network-tools/network_probes.py (Ping-Latenz, SCP-Download) und reserviert
+  davon die Preview-Bitrate,
+- begrenzt alle Bulk-Transfers gemeinsam über einen Token-Bucket,
+- senkt die Rate, wenn die Latenz während eines Transfers deutlich steigt
+  (Puffer auf der Strecke laufen voll), und erhöht sie danach wieder,
+- hält Transfers an, solange ein Vogel verfolgt wird oder eine Aufnahme läuft,
+- zählt Bytes in Bearbeitung und die tatsächlich erreichte Rate.
+
+Verwendung:
+    scheduler = TransferScheduler(remote_host['hostname'], preview_kbit=1000)
+    scheduler.probe(agent.ssh)
+
+    with scheduler.transfer(size) as transfer:
+        for chunk in chunks:
+            transfer.advance(len(chunk))   # blockiert gemäß Rate/Pause
+
+    scp = SCPClient(transport, progress=scheduler.scp_progress())
+    print(scheduler.get_statistics())
+"""
+
+import os
+import sys
+import time
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Optional
+
+# Messfunktionen aus network-tools wiederverwenden
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "network-tools"))
+try:
+    from network_probes import ping_latency, scp_throughput
+    HAS_PROBES = True
+except ImportError:
+    HAS_PROBES = False
+
+MBIT = 1_000_000 / 8  # Bytes/s pro Mbit/s
+
+
+class TokenBucket:
+    """
+    Token-Bucket in Bytes/s. Mehrere Threads teilen sich die Rate; ein Abruf
+    größer als der Vorrat wird als Schuld verbucht und abgewartet.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        """
+        Args:
+            rate: Rate in Bytes/s
+            burst: Maximaler Vorrat in Bytes (default: 0.25s bei voller Rate)
+        """
+        self._lock = threading.Lock()
+        self.rate = rate
+        self.burst = burst
+        self.tokens = self.capacity
+        self._last = time.monotonic()
+
+    @property
+    def capacity(self) -> float:
+        return self.burst if self.burst is not None else self.rate * 0.25
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self._refill()
+            self.rate = rate
+            self.tokens = min(self.tokens, self.capacity)
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    def consume(self, amount: float) -> float:
+        """
+        Entnimmt amount Bytes und wartet, bis die Rate eingehalten ist.
+
+        Returns:
+            Wartezeit in Sekunden
+        """
+        with self._lock:
+            self._refill()
+            self.tokens -= amount
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+
+class Transfer:
+    """Ein laufender Transfer (für Bytes in Bearbeitung und Rate)."""
+
+    def __init__(self, scheduler: "TransferScheduler", total: int):
+        self.scheduler = scheduler
+        self.total = total
+        self.done = 0
+
+    def advance(self, amount: int):
+        """Meldet übertragene Bytes; blockiert bei Pause und gemäß Rate."""
+        self.done += amount
+        self.scheduler._account(amount)
+
+    @property
+    def remaining(self) -> int:
+        return max(0, self.total - self.done)
+
+    def close(self):
+        """Meldet den Transfer ab (auch nach Abbruch)."""
+        self.scheduler._finish(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TransferScheduler:
+    """
+    Gemeinsame Rate, Pausen und Statistik für alle Bulk-Transfers zum Pi.
+    """
+
+    def __init__(self, hostname: Optional[str] = None, preview_kbit: float = 1000,
+                 share: float = 0.5, rate_mbit: Optional[float] = None,
+                 min_rate_mbit: float = 1.0, tracking_hold: float = 5.0,
+                 latency_factor: float = 2.0, adapt_interval: float = 10.0):
+        """
+        Args:
+            hostname: Pi für Latenz-Messungen (None = keine Messungen)
+            preview_kbit: Bitrate des Preview-Streams, die freigehalten wird
+            share: Anteil des freien Durchsatzes für Bulk-Transfers
+            rate_mbit: Feste Rate in Mbit/s (überschreibt die Messung), None = aus probe()
+            min_rate_mbit: Untergrenze der Rate
+            tracking_hold: Sekunden nach der letzten Erkennung, bis Transfers weiterlaufen
+            latency_factor: Rate senken, wenn die Latenz diesen Faktor über dem Leerlauf liegt
+            adapt_interval: Sekunden zwischen zwei Latenz-Messungen während Transfers
+        """
+        self.hostname = hostname
+        self.preview_kbit = preview_kbit
+        self.share = share
+        self.min_rate = min_rate_mbit * MBIT
+        self.tracking_hold = tracking_hold
+        self.latency_factor = latency_factor
+        self.adapt_interval = adapt_interval
+
+        self.fixed_rate = rate_mbit * MBIT if rate_mbit else None
+        # Bis zur ersten Messung vorsichtig starten
+        self.ceiling = self.fixed_rate or 10 * MBIT
+        self.bucket = TokenBucket(self.ceiling)
+
+        self.idle_latency_ms: Optional[float] = None
+        self.latency_ms: Optional[float] = None
+        self.probe_throughput: Optional[float] = None  # Bytes/s
+
+        self._lock = threading.Lock()
+        self._resume = threading.Condition(self._lock)
+        self._deferred = set()
+        self._last_detection = 0.0
+        self._transfers = []
+        self._window = deque()  # (Zeit, Bytes) der letzten Sekunden
+        self._total_bytes = 0
+        self._wait_s = 0.0
+        self._last_adapt = time.monotonic()
+        self._adapting = False
+
+    # ------------------------------------------------------------------
+    # Messung und Rate
+    # ------------------------------------------------------------------
+    def probe(self, ssh=None, size_mb: float = 2) -> Dict[str, Any]:
+        """
+        Misst Leerlauf-Latenz und (mit ssh) den SCP-Durchsatz und setzt die
+        Rate: (Durchsatz - Preview-Bitrate) * share.
+        """
+        result: Dict[str, Any] = {"rate_mbit": self.bucket.rate / MBIT}
+        if not HAS_PROBES:
+            return result
+        if self.hostname:
+            try:
+                latency = ping_latency(self.hostname, count=5, interval=0.2)
+            except Exception:
+                latency = None
+            if latency:
+                self.idle_latency_ms = self.latency_ms = latency["avg"]
+                result["latency_ms"] = latency["avg"]
+        if ssh is not None:
+            throughput = scp_throughput(ssh, size_mb=size_mb, upload=False)
+            self.probe_throughput = throughput["download_mb_s"] * 1024 * 1024
+            result["throughput_mbit"] = self.probe_throughput / MBIT
+
+        if self.probe_throughput and not self.fixed_rate:
+            free = self.probe_throughput - self.preview_kbit * 1000 / 8
+            self.ceiling = max(self.min_rate, free * self.share)
+            self.bucket.set_rate(self.ceiling)
+        result["rate_mbit"] = self.bucket.rate / MBIT
+        return result
+
+    def _maybe_adapt(self):
+        """Latenz während Transfers messen (im Hintergrund) und die Rate anpassen."""
+        if (not HAS_PROBES or not self.hostname or self.idle_latency_ms is None or self._adapting
+                or time.monotonic() - self._last_adapt < self.adapt_interval):
+            return
+        self._adapting = True
+        self._last_adapt = time.monotonic()
+        threading.Thread(target=self._adapt, daemon=True).start()
+
+    def _adapt(self):
+        try:
+            latency = ping_latency(self.hostname, count=3, interval=0.2)
+            if not latency:
+                return
+            self.latency_ms = latency["avg"]
+            if self.latency_ms > self.idle_latency_ms * self.latency_factor:
+                # Warteschlangen auf der Strecke: Rate multiplikativ senken
+                self.bucket.set_rate(max(self.min_rate, self.bucket.rate * 0.7))
+            elif self.bucket.rate < self.ceiling:
+                # Wieder additiv bis zur gemessenen Obergrenze erhöhen
+                self.bucket.set_rate(min(self.ceiling, self.bucket.rate + MBIT))
+        except Exception:
+            pass
+        finally:
+            self._adapting = False
+
+    # ------------------------------------------------------------------
+    # Pausen
+    # ------------------------------------------------------------------
+    def defer(self, reason: str):
+        """Hält alle Transfers an, bis resume(reason) aufgerufen wird."""
+        with self._lock:
+            self._deferred.add(reason)
+
+    def resume(self, reason: str):
+        with self._lock:
+            self._deferred.discard(reason)
+            self._resume.notify_all()
+
+    def note_detection(self, detected: bool):
+        """Vogel-Erkennung melden: Transfers pausieren bis tracking_hold Sekunden danach."""
+        if detected:
+            with self._lock:
+                self._last_detection = time.monotonic()
+
+    @property
+    def tracking(self) -> bool:
+        return time.monotonic() - self._last_detection < self.tracking_hold
+
+    def _wait_until_allowed(self):
+        with self._lock:
+            while self._deferred or self.tracking:
+                start = time.monotonic()
+                self._resume.wait(0.5)
+                self._wait_s += time.monotonic() - start
+
+    # ------------------------------------------------------------------
+    # Transfers
+    # ------------------------------------------------------------------
+    def transfer(self, total: int) -> Transfer:
+        """Registriert einen Transfer von total Bytes (Context-Manager)."""
+        transfer = Transfer(self, total)
+        with self._lock:
+            self._transfers.append(transfer)
+        return transfer
+
+    def _finish(self, transfer: Transfer):
+        with self._lock:
+            if transfer in self._transfers:
+                self._transfers.remove(transfer)
+
+    def _account(self, amount: int):
+        self._wait_until_allowed()
+        self._wait_s += self.bucket.consume(amount)
+        now = time.monotonic()
+        with self._lock:
+            self._total_bytes += amount
+            self._window.append((now, amount))
+            while self._window and now - self._window[0][0] > 5.0:
+                self._window.popleft()
+        self._maybe_adapt()
+
+    def scp_progress(self) -> Callable[[Any, int, int], None]:
+        """
+        Fortschritts-Callback für SCPClient(progress=...): drosselt scp.get()
+        über den Token-Bucket (der Callback läuft im Empfangs-Loop).
+        """
+        transfers: Dict[Any, Transfer] = {}
+
+        def progress(filename, size, sent):
+            transfer = transfers.get(filename)
+            if transfer is None:
+                transfer = transfers[filename] = self.transfer(size)
+            transfer.advance(sent - transfer.done)
+            if sent >= size:
+                transfer.close()
+        return progress
+
+    # ------------------------------------------------------------------
+    # Statistik
+    # ------------------------------------------------------------------
+    @property
+    def bytes_in_flight(self) -> int:
+        with self._lock:
+            return sum(t.remaining for t in self._transfers)
+
+    @property
+    def achieved_rate(self) -> float:
+        """Erreichte Rate der letzten 5 Sekunden in Bytes/s."""
+        with self._lock:
+            if not self._window:
+                return 0.0
+            span = max(time.monotonic() - self._window[0][0], 1.0)
+            return sum(amount for _, amount in self._window) / span
+
+    def get_statistics(self) -> Dict[str, Any]:
+        """Bytes in Bearbeitung, erreichte und erlaubte Rate, Pausen und Latenz."""
+        with self._lock:
+            deferred = sorted(self._deferred)
+            transfers = len(self._transfers)
+        if self.tracking:
+            deferred.append("tracking")
+        return {
+            "transfers": transfers,
+            "bytes_in_flight": self.bytes_in_flight,
+            "total_bytes": self._total_bytes,
+            "achieved_mbit": self.achieved_rate / MBIT,
+            "rate_mbit": self.bucket.rate / MBIT,
+            "deferred": deferred,
+            "wait_s": self._wait_s,
+            "latency_ms": self.latency_ms,
+            "idle_latency_ms": self.idle_latency_ms
+        }
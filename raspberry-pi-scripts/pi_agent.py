@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Vogel-Kamera Pi-Agent
+=====================
+
+Langlebiger Agent auf dem Raspberry Pi, der einmal pro Sitzung über einen
+einzigen SSH-Kanal gestartet wird und zeilenweise JSON-RPC 2.0 über
+stdin/stdout spricht. Ersetzt die vielen einzelnen exec_command-Aufrufe
+(je eine Shell) durch typisierte Methoden für Prozess-Steuerung,
+Datei-Prüfungen, Telemetrie und Aufnahme-Start/-Stopp.
+
+Nur Standardbibliothek - läuft mit dem System-Python des Pi.
+
+Protokoll (eine JSON-Nachricht pro Zeile):
+    -> {"jsonrpc": "2.0", "id": 1, "method": "file.exists", "params": {"path": "~/x"}}
+    <- {"jsonrpc": "2.0", "id": 1, "result": true}
+
+Beim Ende von stdin (SSH-Kanal geschlossen) werden noch laufende Aufnahmen
+beendet, damit die Kamera nicht blockiert bleibt.
+
+Anfragen werden nacheinander bearbeitet. Wartende Methoden (capture.wait,
+capture.stop) sind deshalb auf MAX_WAIT Sekunden begrenzt, der Client
+wartet bei Bedarf in mehreren Aufrufen.
+
+Lokaler Test:
+    echo '{"jsonrpc": "2.0", "id": 1, "method": "telemetry"}' | python3 pi_agent.py
+"""
+
+import os
+import sys
+import json
+import glob
+import hashlib
+import time
+import shutil
+import signal
+import inspect
+import subprocess
+from typing import Dict, Any, List, Optional
+
+AGENT_VERSION = "1.2"
+
+# Längste Wartezeit eines einzelnen Aufrufs (Sekunden)
+MAX_WAIT = 10.0
+
+# JSON-RPC Fehlercodes
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+INTERNAL_ERROR = -32603
+
+
+class RPCError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _path(path: str) -> str:
+    return os.path.expanduser(path)
+
+
+class PiAgent:
+    """
+    Methoden-Implementierungen des Agents (Name -> Methode über METHODS).
+    """
+
+    def __init__(self):
+        self.captures: Dict[str, subprocess.Popen] = {}
+        # Lese-Position pro wachsender H.264-Datei (video.activity)
+        self.activity: Dict[str, Dict[str, Any]] = {}
+
+    # ------------------------------------------------------------------
+    # Allgemein
+    # ------------------------------------------------------------------
+    def ping(self) -> Dict[str, Any]:
+        return {"version": AGENT_VERSION, "pid": os.getpid(), "time": time.time()}
+
+    # ------------------------------------------------------------------
+    # Prozess-Steuerung
+    # ------------------------------------------------------------------
+    def process_kill(self, patterns: List[str], signal_name: str = "KILL") -> Dict[str, int]:
+        """Beendet Prozesse per pkill -f (ein Aufruf pro Muster, ohne Shell)."""
+        result = {}
+        for pattern in patterns:
+            proc = subprocess.run(["pkill", f"-{signal_name}", "-f", pattern],
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            # pkill: 0 = Prozesse gefunden, 1 = keine Treffer
+            result[pattern] = proc.returncode
+        return result
+
+    def process_list(self, pattern: str) -> List[int]:
+        proc = subprocess.run(["pgrep", "-f", pattern], capture_output=True, text=True)
+        own = os.getpid()
+        return [int(pid) for pid in proc.stdout.split() if int(pid) != own]
+
+    def process_spawn(self, argv: List[str], log: Optional[str] = None, cwd: Optional[str] = None) -> int:
+        """Startet einen Prozess losgelöst von der Sitzung (z.B. Preview-Stream)."""
+        log_file = open(_path(log), "ab") if log else subprocess.DEVNULL
+        try:
+            proc = subprocess.Popen([_path(a) if a.startswith("~") else a for a in argv],
+                                    cwd=_path(cwd) if cwd else None,
+                                    stdin=subprocess.DEVNULL, stdout=log_file, stderr=subprocess.STDOUT,
+                                    start_new_session=True)
+        finally:
+            if log:
+                log_file.close()
+        return proc.pid
+
+    # ------------------------------------------------------------------
+    # Dateien
+    # ------------------------------------------------------------------
+    def file_exists(self, path: str) -> bool:
+        return os.path.exists(_path(path))
+
+    def file_stat(self, path: str) -> Optional[Dict[str, Any]]:
+        try:
+            st = os.stat(_path(path))
+        except OSError:
+            return None
+        return {"size": st.st_size, "mtime": st.st_mtime}
+
+    def file_glob(self, pattern: str) -> List[str]:
+        return sorted(glob.glob(_path(pattern)))
+
+    def file_checksum(self, path: str, algorithm: str = "sha256") -> str:
+        """Prüfsumme einer Datei (blockweise, für Transfer-Prüfung)."""
+        try:
+            digest = hashlib.new(algorithm)
+        except ValueError:
+            raise RPCError(INVALID_PARAMS, f"Unbekannter Algorithmus: {algorithm}")
+        with open(_path(path), "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    def file_mkdir(self, path: str) -> bool:
+        os.makedirs(_path(path), exist_ok=True)
+        return True
+
+    def file_write(self, path: str, content: str, sudo: bool = False) -> bool:
+        """Schreibt eine Datei, bei sudo=True über 'sudo tee' (Systemverzeichnisse)."""
+        if sudo:
+            proc = subprocess.run(["sudo", "-n", "tee", _path(path)], input=content.encode(),
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            if proc.returncode != 0:
+                raise RPCError(INTERNAL_ERROR, proc.stderr.decode().strip() or "sudo tee fehlgeschlagen")
+            return True
+        with open(_path(path), "w", encoding="utf-8") as f:
+            f.write(content)
+        return True
+
+    def file_remove(self, patterns: List[str]) -> int:
+        removed = 0
+        for pattern in patterns:
+            for path in glob.glob(_path(pattern)):
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError:
+                    pass
+        return removed
+
+    # ------------------------------------------------------------------
+    # Hardware / Telemetrie
+    # ------------------------------------------------------------------
+    def audio_devices(self) -> List[Dict[str, Any]]:
+        """Parst 'arecord -l' in eine Liste von Aufnahmegeräten."""
+        try:
+            proc = subprocess.run(["arecord", "-l"], capture_output=True, text=True)
+        except FileNotFoundError:
+            return []
+        devices = []
+        for line in proc.stdout.splitlines():
+            # Format: "card 2: Device [USB PnP Sound Device], device 0: USB Audio [USB Audio]"
+            if not line.startswith("card "):
+                continue
+            head, _, rest = line.partition(",")
+            card = head.split()[1].rstrip(":")
+            device = rest.split()[1].rstrip(":") if rest.strip().startswith("device") else "0"
+            devices.append({
+                "card": int(card),
+                "device": int(device),
+                "name": line,
+                "usb": "USB" in line,
+                "alsa": f"hw:{card},{device}"
+            })
+        return devices
+
+    def telemetry(self) -> Dict[str, Any]:
+        """CPU-Temperatur, Load, Speicher, Festplatte und Uptime ohne Shell-Aufrufe."""
+        data: Dict[str, Any] = {}
+
+        try:
+            with open("/sys/class/thermal/thermal_zone0/temp") as f:
+                data["cpu_temp"] = int(f.read().strip()) / 1000.0
+        except (OSError, ValueError):
+            data["cpu_temp"] = None
+
+        data["load"] = list(os.getloadavg())
+
+        disk = shutil.disk_usage("/")
+        data["disk"] = {
+            "total": disk.total,
+            "used": disk.used,
+            "free": disk.free,
+            "percent": round(disk.used / disk.total * 100, 1) if disk.total else 0.0
+        }
+
+        meminfo = {}
+        try:
+            with open("/proc/meminfo") as f:
+                for line in f:
+                    key, value = line.split(":", 1)
+                    meminfo[key] = int(value.split()[0]) * 1024
+        except (OSError, ValueError):
+            pass
+        data["memory"] = {"total": meminfo.get("MemTotal"), "available": meminfo.get("MemAvailable")}
+
+        try:
+            with open("/proc/uptime") as f:
+                data["uptime"] = float(f.read().split()[0])
+        except (OSError, ValueError):
+            data["uptime"] = None
+
+        return data
+
+    # ------------------------------------------------------------------
+    # Aufnahmen
+    # ------------------------------------------------------------------
+    def capture_start(self, name: str, argv: List[str], cwd: Optional[str] = None,
+                      log: Optional[str] = None) -> int:
+        """Startet eine benannte Aufnahme (rpicam-vid, arecord, ...)."""
+        if name in self.captures and self.captures[name].poll() is None:
+            raise RPCError(INVALID_PARAMS, f"Aufnahme '{name}' läuft bereits")
+
+        if cwd:
+            os.makedirs(_path(cwd), exist_ok=True)
+        log_file = open(_path(log), "ab") if log else subprocess.DEVNULL
+        try:
+            proc = subprocess.Popen(argv, cwd=_path(cwd) if cwd else None,
+                                    stdin=subprocess.DEVNULL, stdout=log_file, stderr=subprocess.STDOUT)
+        finally:
+            if log:
+                log_file.close()
+        self.captures[name] = proc
+        return proc.pid
+
+    def capture_status(self, name: str) -> Dict[str, Any]:
+        proc = self._capture(name)
+        return {"pid": proc.pid, "running": proc.poll() is None, "returncode": proc.returncode}
+
+    def capture_wait(self, name: str, timeout: Optional[float] = None) -> Optional[int]:
+        """Wartet auf das Ende der Aufnahme (höchstens MAX_WAIT Sekunden); None bei Timeout."""
+        timeout = MAX_WAIT if timeout is None else min(timeout, MAX_WAIT)
+        try:
+            return self._capture(name).wait(timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None
+
+    def capture_stop(self, name: str, timeout: float = 5.0) -> Optional[int]:
+        """Beendet eine Aufnahme per SIGINT (Dateien werden sauber geschlossen), notfalls SIGKILL."""
+        proc = self._capture(name)
+        if proc.poll() is None:
+            proc.send_signal(signal.SIGINT)
+            try:
+                proc.wait(timeout=min(timeout, MAX_WAIT))
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+        return proc.returncode
+
+    def video_activity(self, path: str, reset: bool = False) -> Dict[str, int]:
+        """
+        Liest die seit dem letzten Aufruf geschriebenen Bytes einer laufenden
+        H.264-Aufnahme und summiert Frames und Slice-Größen (P/IDR getrennt).
+
+        Die Größe der P-Frames folgt der Bewegung im Bild - ein statisches
+        Vogelhaus ergibt sehr kleine P-Frames. So lässt sich Aktivität
+        während der Aufnahme ohne Dekodieren und ohne zweiten Kamera-Stream
+        messen.
+        """
+        path = _path(path)
+        state = self.activity.get(path)
+        if reset or state is None:
+            state = self.activity[path] = {"offset": 0, "rest": b""}
+
+        try:
+            with open(path, "rb") as f:
+                f.seek(state["offset"])
+                data = f.read()
+        except OSError:
+            data = b""
+        state["offset"] += len(data)
+        buf = state["rest"] + data
+
+        result = {"frames": 0, "idr_frames": 0, "p_bytes": 0, "idr_bytes": 0}
+        # NAL-Units an Startcodes trennen; die letzte ist evtl. noch unvollständig
+        starts = []
+        pos = buf.find(b"\x00\x00\x01")
+        while pos != -1:
+            starts.append(pos)
+            pos = buf.find(b"\x00\x00\x01", pos + 3)
+
+        for start, end in zip(starts, starts[1:]):
+            if start + 4 >= end:
+                continue
+            nal_type = buf[start + 3] & 0x1F
+            if nal_type not in (1, 5):
+                continue
+            # first_mb_in_slice == 0 (ue(v) '1') markiert den ersten Slice eines Frames
+            first_slice = bool(buf[start + 4] & 0x80)
+            if nal_type == 5:
+                result["idr_bytes"] += end - start
+                result["idr_frames"] += first_slice
+            else:
+                result["p_bytes"] += end - start
+            result["frames"] += first_slice
+
+        state["rest"] = buf[starts[-1]:] if starts else buf[-2:]
+        return result
+
+    def _capture(self, name: str) -> subprocess.Popen:
+        if name not in self.captures:
+            raise RPCError(INVALID_PARAMS, f"Unbekannte Aufnahme: {name}")
+        return self.captures[name]
+
+    def shutdown(self):
+        for name in list(self.captures):
+            try:
+                self.capture_stop(name)
+            except Exception:
+                pass
+
+
+METHODS = {
+    "ping": PiAgent.ping,
+    "process.kill": PiAgent.process_kill,
+    "process.list": PiAgent.process_list,
+    "process.spawn": PiAgent.process_spawn,
+    "file.exists": PiAgent.file_exists,
+    "file.stat": PiAgent.file_stat,
+    "file.glob": PiAgent.file_glob,
+    "file.checksum": PiAgent.file_checksum,
+    "file.mkdir": PiAgent.file_mkdir,
+    "file.write": PiAgent.file_write,
+    "file.remove": PiAgent.file_remove,
+    "audio.devices": PiAgent.audio_devices,
+    "telemetry": PiAgent.telemetry,
+    "capture.start": PiAgent.capture_start,
+    "capture.status": PiAgent.capture_status,
+    "capture.wait": PiAgent.capture_wait,
+    "capture.stop": PiAgent.capture_stop,
+    "video.activity": PiAgent.video_activity,
+}
+
+
+def handle_request(agent: PiAgent, line: str) -> Optional[Dict[str, Any]]:
+    """
+    Verarbeitet eine JSON-RPC-Zeile und gibt die Antwort zurück
+    (None bei Notifications ohne id).
+    """
+    request_id = None
+    notification = False
+    try:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            raise RPCError(PARSE_ERROR, "Ungültiges JSON")
+
+        if not isinstance(request, dict) or "method" not in request:
+            raise RPCError(INVALID_REQUEST, "Ungültige Anfrage")
+        request_id = request.get("id")
+        notification = "id" not in request
+
+        method = METHODS.get(request["method"])
+        if method is None:
+            raise RPCError(METHOD_NOT_FOUND, f"Unbekannte Methode: {request['method']}")
+
+        params = request.get("params") or {}
+        # Nur Fehler beim Binden der Argumente sind ungültige Parameter -
+        # ein TypeError in der Methode selbst ist ein interner Fehler
+        try:
+            if isinstance(params, list):
+                bound = inspect.signature(method).bind(agent, *params)
+            else:
+                bound = inspect.signature(method).bind(agent, **params)
+        except TypeError as e:
+            raise RPCError(INVALID_PARAMS, str(e))
+        result = method(*bound.args, **bound.kwargs)
+
+        response = {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+    except RPCError as e:
+        response = {"jsonrpc": "2.0", "id": request_id, "error": {"code": e.code, "message": e.message}}
+    except Exception as e:
+        response = {"jsonrpc": "2.0", "id": request_id,
+                    "error": {"code": INTERNAL_ERROR, "message": f"{type(e).__name__}: {e}"}}
+
+    return None if notification else response
+
+
+def main():
+    agent = PiAgent()
+    try:
+        for line in sys.stdin:
+            if not line.strip():
+                continue
+            response = handle_request(agent, line)
+            if response is not None:
+                sys.stdout.write(json.dumps(response) + "\n")
+                sys.stdout.flush()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        agent.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
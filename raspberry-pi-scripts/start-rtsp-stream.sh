@@ -8,7 +8,10 @@
 #   sudo apt install gstreamer1.0-rtsp python3-gi gir1.2-gst-rtsp-server-1.0
 #
 # Verwendung:
-#   ./start-rtsp-stream.sh [--stop|--status]
+#   ./start-rtsp-stream.sh [--stop|--status] [--gop N]
+#
+#   --gop N   Keyframe (IDR) alle N Frames. Kurze GOPs (z.B. N=FPS) erlauben
+#             dem Client im Leerlauf nur Keyframes zu dekodieren.
 # =============================================================================
 
 set -e
@@ -20,6 +23,7 @@ FPS=5
 ROTATION=180
 BITRATE=1000
 CAMERA=0
+GOP="${STREAM_GOP:-}"
 PIDFILE="/tmp/rtsp-stream.pid"
 
 RED='\033[0;31m'
@@ -71,6 +75,7 @@ start_stream() {
     echo "  📹 Kamera: $CAMERA"
     echo "  📐 Auflösung: ${WIDTH}x${HEIGHT} @ ${FPS}fps"
     echo "  🔌 Port: $PORT"
+    [ -n "$GOP" ] && echo "  🔑 Keyframe alle $GOP Frames"
     echo ""
     
     # Verwende einfaches TCP mit libcamera, aber mit Short-Circuit-Schutz
@@ -89,6 +94,7 @@ while true; do
         --codec h264 \
         --profile baseline \
         --level 4.2 \
+        STREAM_INTRA_OPT \
         --flush \
         --listen \
         -t 0 \
@@ -109,6 +115,11 @@ WRAPPER_EOF
     sed -i "s/STREAM_ROTATION/$ROTATION/g" /tmp/stream-wrapper.sh
     sed -i "s/STREAM_BITRATE/$((BITRATE * 1000))/g" /tmp/stream-wrapper.sh
     sed -i "s/STREAM_PORT/$PORT/g" /tmp/stream-wrapper.sh
+    if [ -n "$GOP" ]; then
+        sed -i "s/STREAM_INTRA_OPT/--intra $GOP/g" /tmp/stream-wrapper.sh
+    else
+        sed -i "s/STREAM_INTRA_OPT//g" /tmp/stream-wrapper.sh
+    fi
     
     chmod +x /tmp/stream-wrapper.sh
     
@@ -135,7 +146,26 @@ WRAPPER_EOF
     fi
 }
 
-case "${1:-start}" in
+ACTION="start"
+while [ $# -gt 0 ]; do
+    case "$1" in
+        --gop)
+            GOP="$2"
+            shift 2
+            ;;
+        *)
+            ACTION="$1"
+            shift
+            ;;
+    esac
+done
+
+if [ -n "$GOP" ] && ! [[ "$GOP" =~ ^[0-9]+$ ]]; then
+    print_error "Ungültiger GOP-Wert: $GOP"
+    exit 1
+fi
+
+case "$ACTION" in
     --stop|stop)
         stop_stream
         ;;